@@ -0,0 +1,186 @@
+"""End-to-end benchmark of the coordinator against the Plenticore simulator.
+
+Starts benchmarks/simulator.py in a subprocess, so its CPU time is not
+counted, and drives InverterCoordinator through many refresh cycles. It
+reports cycle latency percentiles, requests per cycle, CPU time per cycle
+and the memory allocated per cycle. With --max-p99-ms or --max-cpu-ms the
+run fails when a figure exceeds the limit, so hot path regressions show up
+before a release. The percentiles are measured cycle times, never
+interpolated beyond the slowest cycle.
+
+tests/test_bench_coordinator.py runs a short pass of it with pytest.
+
+Needs Home Assistant installed. Run from the repository root:
+
+    python benchmarks/bench_coordinator.py --cycles 500 --latency 0.02 --jitter 0.005
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.kostal_plenticore_modubs.const import (  # noqa: E402
+    CONF_IP_ADDRESS,
+    CONF_PIPELINE_DEPTH,
+    CONF_PORT,
+    DEFAULT_PIPELINE_DEPTH,
+    DEFAULT_PORT,
+)
+from custom_components.kostal_plenticore_modubs.coordinator import InverterCoordinator  # noqa: E402
+
+from simulator import PlenticoreSimulator  # noqa: E402
+
+HOST = "127.0.0.1"
+
+
+def run_simulator(port: int, latency: float, jitter: float, ready) -> None:
+    """Serve the simulator until the process is terminated."""
+
+    async def serve() -> None:
+        simulator = PlenticoreSimulator(latency=latency, jitter=jitter)
+        server = await simulator.async_start(HOST, port)
+        ready.set()
+        async with server:
+            while True:
+                await asyncio.sleep(1)
+                simulator.step()
+
+    asyncio.run(serve())
+
+
+async def async_refresh(coordinator: InverterCoordinator, all_tiers: bool) -> None:
+    """Run one refresh cycle and fail loudly if it did not succeed."""
+    if all_tiers:
+        # Back to back refreshes would only read the fast tier, make every
+        # cycle a full one so runs are comparable.
+        coordinator.async_force_tiers()
+    await coordinator.async_refresh()
+    if not coordinator.last_update_success:
+        raise SystemExit("Refresh failed, is the simulator reachable?")
+
+
+async def async_benchmark(args: argparse.Namespace) -> dict:
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        entry = types.SimpleNamespace(
+            entry_id="benchmark",
+            title="Benchmark",
+            data={CONF_IP_ADDRESS: HOST, CONF_PORT: args.port},
+            options={CONF_PIPELINE_DEPTH: args.pipeline_depth},
+        )
+        coordinator = InverterCoordinator(hass, entry, HOST)
+        try:
+            for _ in range(args.warmup):
+                await async_refresh(coordinator, args.all_tiers)
+
+            durations = []
+            requests = []
+            cpu_started = time.process_time()
+            for _ in range(args.cycles):
+                started = time.perf_counter()
+                await async_refresh(coordinator, args.all_tiers)
+                durations.append(time.perf_counter() - started)
+                requests.append(coordinator.cycle_statistics.requests)
+            cpu = time.process_time() - cpu_started
+
+            # Allocations are traced in a separate pass, tracing slows everything down.
+            peaks = []
+            tracemalloc.start()
+            retained_started = tracemalloc.get_traced_memory()[0]
+            for _ in range(args.alloc_cycles):
+                before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                await async_refresh(coordinator, args.all_tiers)
+                peaks.append(tracemalloc.get_traced_memory()[1] - before)
+            retained = tracemalloc.get_traced_memory()[0] - retained_started
+            tracemalloc.stop()
+        finally:
+            await coordinator.async_shutdown()
+
+    percentiles = statistics.quantiles(durations, n=100, method="inclusive")
+    return {
+        "p50_ms": percentiles[49] * 1000,
+        "p90_ms": percentiles[89] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+        "max_ms": max(durations) * 1000,
+        "requests": statistics.mean(requests),
+        "cpu_ms": cpu / args.cycles * 1000,
+        "peak_kib": statistics.mean(peaks) / 1024 if peaks else 0.0,
+        "retained_b": retained / args.alloc_cycles if args.alloc_cycles else 0.0,
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=500)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port of the simulator")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--alloc-cycles", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.005, help="+/- seconds added to the latency")
+    parser.add_argument("--pipeline-depth", type=int, default=DEFAULT_PIPELINE_DEPTH)
+    parser.add_argument(
+        "--fast-tier-only",
+        dest="all_tiers",
+        action="store_false",
+        help="read only what is due back to back instead of every tier per cycle",
+    )
+    parser.add_argument("--max-p99-ms", type=float, help="fail if the p99 cycle latency is higher")
+    parser.add_argument("--max-cpu-ms", type=float, help="fail if the CPU time per cycle is higher")
+    return parser.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args()
+    ready = multiprocessing.Event()
+    simulator = multiprocessing.Process(
+        target=run_simulator, args=(args.port, args.latency, args.jitter, ready), daemon=True
+    )
+    simulator.start()
+    try:
+        if not ready.wait(10):
+            raise SystemExit("Simulator did not start")
+        result = asyncio.run(async_benchmark(args))
+    finally:
+        simulator.terminate()
+        simulator.join()
+
+    print(
+        f"{args.cycles} cycles, latency {args.latency * 1000:.1f}+/-{args.jitter * 1000:.1f} ms,"
+        f" pipeline depth {args.pipeline_depth}"
+    )
+    print(
+        f"cycle latency   p50 {result['p50_ms']:7.2f} ms  p90 {result['p90_ms']:7.2f} ms"
+        f"  p99 {result['p99_ms']:7.2f} ms  max {result['max_ms']:7.2f} ms"
+    )
+    print(f"requests/cycle  {result['requests']:7.2f}")
+    print(f"CPU/cycle       {result['cpu_ms']:7.3f} ms")
+    print(
+        f"allocations     {result['peak_kib']:7.1f} KiB peak/cycle"
+        f"  {result['retained_b']:7.0f} B retained/cycle"
+    )
+
+    failures = []
+    if args.max_p99_ms is not None and result["p99_ms"] > args.max_p99_ms:
+        failures.append(f"p99 latency {result['p99_ms']:.2f} ms > {args.max_p99_ms} ms")
+    if args.max_cpu_ms is not None and result["cpu_ms"] > args.max_cpu_ms:
+        failures.append(f"CPU/cycle {result['cpu_ms']:.3f} ms > {args.max_cpu_ms} ms")
+    if failures:
+        raise SystemExit("Regression: " + ", ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Micro-benchmark of value decoding per refresh.
+
+Compares the batch decoder used by the coordinator with decoding every
+value on its own from its registers, as the read_* helpers used to, and
+times loading the register map with and without its compiled cache.
+
+Run from the repository root:
+
+    python benchmarks/bench_decoder.py
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from custom_components.kostal_plenticore_modubs.decoder import (  # noqa: E402
+    SnapshotDecoder,
+    decode_words,
+)
+from custom_components.kostal_plenticore_modubs.read_plan import build_read_plan  # noqa: E402
+from custom_components.kostal_plenticore_modubs import register_map  # noqa: E402
+from custom_components.kostal_plenticore_modubs.register_map import (  # noqa: E402
+    REGISTER_MAP_PATH,
+    load_register_map,
+)
+from custom_components.kostal_plenticore_modubs.register_store import RegisterStore  # noqa: E402
+
+
+def decode_per_value(store, registers):
+    """Decode every value on its own from its registers."""
+    values = {}
+    for ri in registers:
+        words = list(store.get(ri.address, ri.count))
+        if ri.word_order == "high_first":
+            words.reverse()
+        values[ri.unique_id] = decode_words(words, ri.type) * ri.scale
+    return values
+
+
+def time_register_map(repeat: int = 5, number: int = 50) -> None:
+    """Time loading the register map with and without its compiled caches."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "registers.json")
+        shutil.copyfile(REGISTER_MAP_PATH, path)
+
+        def load_compiling():
+            register_map._LOADED.clear()
+            shutil.rmtree(os.path.join(directory, "__pycache__"), ignore_errors=True)
+            load_register_map(path)
+
+        def load_from_disk():
+            register_map._LOADED.clear()
+            load_register_map(path)
+
+        for name, func in (
+            ("compile and cache", load_compiling),
+            ("load from __pycache__", load_from_disk),
+            ("load from memory", lambda: load_register_map(path)),
+        ):
+            best = min(timeit.repeat(func, repeat=repeat, number=number))
+            print(f"{name:22s} {best / number * 1e3:8.3f} ms")
+
+
+def main(repeat: int = 5, number: int = 2000) -> None:
+    registers = load_register_map().all_registers
+    plan = build_read_plan(((ri.address, ri.count) for ri in registers), 16)
+    store = RegisterStore(plan)
+    rng = random.Random(42)
+    for block_index, block in enumerate(plan.blocks):
+        store.set_block(block_index, [rng.randrange(0x10000) for _ in range(block.count)])
+
+    decoder = SnapshotDecoder(plan, registers)
+    reference = decode_per_value(store, registers)
+    batch = decoder.decode(store)
+    mismatches = [
+        key for key, value in reference.items()
+        if not (value == batch[key] or value != value and batch[key] != batch[key])
+    ]
+    if mismatches:
+        raise SystemExit(f"Decoders disagree on {mismatches}")
+
+    count = len(registers)
+    print(f"{count} values in {plan.requests} blocks, {number} refreshes per run")
+    for name, func in (
+        ("per value", lambda: decode_per_value(store, registers)),
+        ("batch decoder", lambda: decoder.decode(store)),
+    ):
+        best = min(timeit.repeat(func, repeat=repeat, number=number))
+        print(
+            f"{name:20s} {best / number * 1e6:8.1f} us/refresh"
+            f" {count * number / best:12,.0f} values/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
+    time_register_map()
@@ -0,0 +1,118 @@
+"""Entity memory benchmark for sites with many inverters.
+
+Sets up the sensor and number platforms for N inverters, like
+async_setup_entry does for every config entry, and reports the memory
+traced while creating their entities: per entity and for the whole site,
+together with the time to create one entity and to read its device info.
+No inverter is contacted, the coordinators are never refreshed.
+
+Needs Home Assistant installed. Run from the repository root:
+
+    python benchmarks/bench_entities.py --inverters 1 4 16 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.kostal_plenticore_modubs import number, sensor  # noqa: E402
+from custom_components.kostal_plenticore_modubs.const import CONF_IP_ADDRESS  # noqa: E402
+from custom_components.kostal_plenticore_modubs.coordinator import InverterCoordinator  # noqa: E402
+from custom_components.kostal_plenticore_modubs.register_map import load_register_map  # noqa: E402
+
+DEVICE_INFO_READS = 100_000
+
+
+def host(index: int) -> str:
+    """Return the address of inverter number `index`."""
+    return f"10.0.{index // 250}.{index % 250 + 1}"
+
+
+async def async_measure(hass: HomeAssistant, count: int) -> dict:
+    register_map = load_register_map()
+    coordinators = [
+        InverterCoordinator(
+            hass,
+            types.SimpleNamespace(
+                entry_id=f"inverter_{index}",
+                title=f"Inverter {index}",
+                data={CONF_IP_ADDRESS: host(index)},
+                options={},
+            ),
+            host(index),
+            register_map=register_map,
+        )
+        for index in range(count)
+    ]
+    entities = []
+    try:
+        gc.collect()
+        tracemalloc.start()
+        traced_before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        for coordinator in coordinators:
+            entry = types.SimpleNamespace(
+                runtime_data=types.SimpleNamespace(inverter_coordinator=coordinator)
+            )
+            await sensor.async_setup_entry(hass, entry, entities.extend)
+            await number.async_setup_entry(hass, entry, entities.extend)
+        elapsed = time.perf_counter() - started
+        gc.collect()
+        memory = tracemalloc.get_traced_memory()[0] - traced_before
+        tracemalloc.stop()
+
+        entity = entities[0]
+        started = time.perf_counter()
+        for _ in range(DEVICE_INFO_READS):
+            entity.device_info  # noqa: B018
+        device_info = (time.perf_counter() - started) / DEVICE_INFO_READS
+    finally:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        for coordinator in coordinators:
+            await coordinator.async_shutdown()
+
+    return {
+        "entities": len(entities),
+        "entity_bytes": memory / len(entities),
+        "site_kib": memory / 1024,
+        "create_us": elapsed / len(entities) * 1e6,
+        "device_info_ns": device_info * 1e9,
+    }
+
+
+async def async_benchmark(args: argparse.Namespace) -> None:
+    print(
+        f"{'inverters':>9} {'entities':>9} {'memory/entity':>14} {'site memory':>12}"
+        f" {'create/entity':>14} {'device_info':>12}"
+    )
+    for count in args.inverters:
+        with tempfile.TemporaryDirectory() as config_dir:
+            result = await async_measure(HomeAssistant(config_dir), count)
+        print(
+            f"{count:9d} {result['entities']:9d} {result['entity_bytes']:8.0f} bytes"
+            f" {result['site_kib']:8.1f} KiB {result['create_us']:11.1f} us"
+            f" {result['device_info_ns']:9.0f} ns"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--inverters", type=int, nargs="+", default=[1, 4, 16, 64])
+    asyncio.run(async_benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
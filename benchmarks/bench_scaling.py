@@ -0,0 +1,172 @@
+"""Scaling benchmark for sites with several inverters.
+
+Starts one simulator subprocess answering on 127.0.0.1 to 127.0.0.N, one
+address per inverter, and polls all of them with one coordinator each
+through the shared connection manager. With --gateway the simulator
+instead fronts all inverters on 127.0.0.1 as unit ids 1 to N, and every
+coordinator multiplexes its requests over the one gateway connection. For every N it reports the CPU
+time and the memory per inverter, the wall time of a round in which every
+inverter polls all tiers, and how many polls overlapped.
+
+Needs Home Assistant installed. Run from the repository root:
+
+    python benchmarks/bench_scaling.py --inverters 1 2 4 8 16 --latency 0.02
+    python benchmarks/bench_scaling.py --inverters 1 2 4 8 16 --latency 0.02 --gateway
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.kostal_plenticore_modubs.connection_manager import (  # noqa: E402
+    get_connection_manager,
+)
+from custom_components.kostal_plenticore_modubs.const import (  # noqa: E402
+    CONF_IP_ADDRESS,
+    CONF_UNIT_ID,
+    DEFAULT_PORT,
+)
+from custom_components.kostal_plenticore_modubs.coordinator import InverterCoordinator  # noqa: E402
+
+from simulator import PlenticoreSimulator  # noqa: E402
+
+
+def host(index: int, gateway: bool = False) -> str:
+    """Return the loopback address of inverter number `index`."""
+    return "127.0.0.1" if gateway else f"127.0.0.{index + 1}"
+
+
+def entry_data(index: int, gateway: bool) -> dict:
+    """Return the config entry data of inverter number `index`."""
+    data = {CONF_IP_ADDRESS: host(index, gateway)}
+    if gateway:
+        data[CONF_UNIT_ID] = index + 1
+    return data
+
+
+def run_simulator(count: int, latency: float, jitter: float, gateway: bool, ready) -> None:
+    """Serve the simulated inverters until terminated."""
+
+    async def serve() -> None:
+        if gateway:
+            simulator = PlenticoreSimulator(range(1, count + 1), latency=latency, jitter=jitter)
+            server = await simulator.async_start(host(0, gateway), DEFAULT_PORT)
+        else:
+            simulator = PlenticoreSimulator(latency=latency, jitter=jitter)
+            server = await simulator.async_start([host(index) for index in range(count)], DEFAULT_PORT)
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+async def async_round(coordinators) -> float:
+    """Let every inverter poll all tiers at once, return the wall time."""
+    for coordinator in coordinators:
+        coordinator.async_force_tiers()
+    started = time.perf_counter()
+    await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+    if not all(coordinator.last_update_success for coordinator in coordinators):
+        raise SystemExit("Refresh failed, is the simulator reachable?")
+    return time.perf_counter() - started
+
+
+async def async_measure(hass: HomeAssistant, count: int, rounds: int, gateway: bool) -> dict:
+    tracemalloc.start()
+    traced_before = tracemalloc.get_traced_memory()[0]
+    coordinators = [
+        InverterCoordinator(
+            hass,
+            types.SimpleNamespace(
+                entry_id=f"inverter_{index}",
+                title=f"Inverter {index}",
+                data=entry_data(index, gateway),
+                options={},
+            ),
+            host(index, gateway),
+        )
+        for index in range(count)
+    ]
+    try:
+        for _ in range(2):
+            await async_round(coordinators)
+        memory = (tracemalloc.get_traced_memory()[0] - traced_before) / count
+        tracemalloc.stop()
+
+        walls = []
+        cpu_started = time.process_time()
+        for _ in range(rounds):
+            walls.append(await async_round(coordinators))
+        cpu = time.process_time() - cpu_started
+        site = get_connection_manager(hass).as_dict()
+    finally:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        for coordinator in coordinators:
+            await coordinator.async_shutdown()
+
+    return {
+        "cpu_ms": cpu / (rounds * count) * 1000,
+        "memory_kib": memory / 1024,
+        "round_ms": sum(walls) / len(walls) * 1000,
+        "max_active_polls": site["max_active_polls"],
+        "connections": site["connections"],
+    }
+
+
+async def async_benchmark(args: argparse.Namespace) -> None:
+    print(
+        f"{'inverters':>9} {'CPU/inverter/poll':>18} {'memory/inverter':>16} {'round':>10}"
+        f" {'overlap':>8} {'sockets':>8}"
+    )
+    for count in args.inverters:
+        with tempfile.TemporaryDirectory() as config_dir:
+            result = await async_measure(HomeAssistant(config_dir), count, args.rounds, args.gateway)
+        print(
+            f"{count:9d} {result['cpu_ms']:15.3f} ms {result['memory_kib']:12.1f} KiB"
+            f" {result['round_ms']:7.1f} ms {result['max_active_polls']:8d} {result['connections']:8d}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--inverters", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.005, help="+/- seconds added to the latency")
+    parser.add_argument(
+        "--gateway", action="store_true", help="put all inverters behind one gateway address"
+    )
+    args = parser.parse_args()
+
+    ready = multiprocessing.Event()
+    simulator = multiprocessing.Process(
+        target=run_simulator,
+        args=(max(args.inverters), args.latency, args.jitter, args.gateway, ready),
+        daemon=True,
+    )
+    simulator.start()
+    try:
+        if not ready.wait(10):
+            raise SystemExit("Simulator did not start")
+        asyncio.run(async_benchmark(args))
+    finally:
+        simulator.terminate()
+        simulator.join()
+
+
+if __name__ == "__main__":
+    main()
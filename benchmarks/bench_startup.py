@@ -0,0 +1,184 @@
+"""Startup benchmark of the integration.
+
+Reports three figures, each as median and maximum over several runs:
+
+- import time: importing the integration and its platforms in a fresh
+  interpreter, with the Home Assistant modules a running instance has
+  loaded already imported beforehand,
+- time to first entity: from the start of the entry setup until the
+  sensor and number platforms created their entities,
+- time to first valid state and to all states valid: until the first and
+  until every register sensor is available with a value.
+
+The setup mirrors async_setup_entry against benchmarks/simulator.py in a
+subprocess, like a restart: the compiled register map comes from
+`__pycache__` but not from memory.
+
+Needs Home Assistant installed. Run from the repository root:
+
+    python benchmarks/bench_startup.py --runs 20 --latency 0.02
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, ROOT)
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.kostal_plenticore_modubs import number, register_map, sensor  # noqa: E402
+from custom_components.kostal_plenticore_modubs.const import (  # noqa: E402
+    CONF_IP_ADDRESS,
+    DEFAULT_PORT,
+)
+from custom_components.kostal_plenticore_modubs.coordinator import InverterCoordinator  # noqa: E402
+from custom_components.kostal_plenticore_modubs.register_map import load_register_map  # noqa: E402
+
+from simulator import PlenticoreSimulator  # noqa: E402
+
+HOST = "127.0.0.1"
+
+# Run in a fresh interpreter, prints the import time and whether pymodbus was loaded
+IMPORT_PROBE = """
+import sys, time
+import homeassistant.config_entries, homeassistant.core
+import homeassistant.components.number, homeassistant.components.sensor
+import homeassistant.helpers.update_coordinator
+started = time.perf_counter()
+import custom_components.kostal_plenticore_modubs
+import custom_components.kostal_plenticore_modubs.number
+import custom_components.kostal_plenticore_modubs.sensor
+print(time.perf_counter() - started, any(name.startswith("pymodbus") for name in sys.modules))
+"""
+
+
+def run_simulator(latency: float, jitter: float, ready) -> None:
+    """Serve the simulator until the process is terminated."""
+
+    async def serve() -> None:
+        simulator = PlenticoreSimulator(latency=latency, jitter=jitter)
+        server = await simulator.async_start(HOST, DEFAULT_PORT)
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+def measure_import(runs: int) -> tuple[list[float], bool]:
+    """Return the import times of `runs` fresh interpreters and whether pymodbus got imported."""
+    times = []
+    pymodbus_loaded = False
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE],
+            cwd=ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.split()
+        times.append(float(output[0]))
+        pymodbus_loaded |= output[1] == "True"
+    return times, pymodbus_loaded
+
+
+async def async_measure_setup(hass: HomeAssistant) -> dict:
+    """Set up one entry like async_setup_entry and time its milestones."""
+    entry = types.SimpleNamespace(
+        entry_id="benchmark",
+        title="Benchmark",
+        data={CONF_IP_ADDRESS: HOST},
+        options={},
+    )
+    entities = []
+    # A restart starts with an empty process, only __pycache__ survives
+    register_map._LOADED.clear()
+
+    started = time.perf_counter()
+    loaded_map = await hass.async_add_executor_job(load_register_map)
+    coordinator = InverterCoordinator(hass, entry, HOST, register_map=loaded_map)
+    try:
+        await coordinator.async_refresh()
+        entry.runtime_data = types.SimpleNamespace(inverter_coordinator=coordinator)
+        await sensor.async_setup_entry(hass, entry, entities.extend)
+        await number.async_setup_entry(hass, entry, entities.extend)
+        first_entity = time.perf_counter() - started
+
+        register_sensors = [entity for entity in entities if isinstance(entity, sensor.KostalSensor)]
+        first_valid = all_valid = None
+        while all_valid is None and time.perf_counter() - started < 10:
+            valid = sum(entity.available for entity in register_sensors)
+            if valid and first_valid is None:
+                first_valid = time.perf_counter() - started
+            if valid == len(register_sensors):
+                all_valid = time.perf_counter() - started
+                break
+            # What the scheduled refresh would do next
+            await coordinator.async_refresh()
+    finally:
+        await coordinator.async_shutdown()
+
+    if all_valid is None:
+        raise SystemExit("Sensors never became valid, is the simulator reachable?")
+    return {"first_entity": first_entity, "first_valid": first_valid, "all_valid": all_valid}
+
+
+async def async_benchmark(runs: int) -> list[dict]:
+    results = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as config_dir:
+            results.append(await async_measure_setup(HomeAssistant(config_dir)))
+    return results
+
+
+def report(name: str, values: list[float]) -> None:
+    print(f"{name:22s} median {statistics.median(values) * 1000:8.1f} ms  max {max(values) * 1000:8.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--import-runs", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.005, help="+/- seconds added to the latency")
+    args = parser.parse_args()
+
+    import_times, pymodbus_loaded = measure_import(args.import_runs)
+
+    ready = multiprocessing.Event()
+    simulator = multiprocessing.Process(
+        target=run_simulator, args=(args.latency, args.jitter, ready), daemon=True
+    )
+    simulator.start()
+    try:
+        if not ready.wait(10):
+            raise SystemExit("Simulator did not start")
+        results = asyncio.run(async_benchmark(args.runs))
+    finally:
+        simulator.terminate()
+        simulator.join()
+
+    print(f"{args.runs} setups, latency {args.latency * 1000:.1f}+/-{args.jitter * 1000:.1f} ms")
+    report("import", import_times)
+    print(f"{'':22s} pymodbus imported: {'yes' if pymodbus_loaded else 'no'}")
+    for key, name in (
+        ("first_entity", "time to first entity"),
+        ("first_valid", "time to first valid"),
+        ("all_valid", "time to all valid"),
+    ):
+        report(name, [result[key] for result in results])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Replay a recorded register trace through the coordinator.
+
+Feeds the trace files written with the "Record register trace" option
+back into InverterCoordinator, `--speed` times faster than recorded, and
+prints every value that changed per refresh. Reproduces odd readings
+without access to the inverter.
+
+Needs Home Assistant installed. Run from the repository root, oldest file
+first:
+
+    python benchmarks/replay_trace.py --speed 10 trace.gz.1 trace.gz
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.kostal_plenticore_modubs.coordinator import InverterCoordinator  # noqa: E402
+from custom_components.kostal_plenticore_modubs.trace import (  # noqa: E402
+    ReplayConnection,
+    read_trace,
+)
+
+
+async def async_replay(args: argparse.Namespace) -> None:
+    records = await asyncio.get_running_loop().run_in_executor(
+        None, lambda: list(read_trace(args.paths))
+    )
+    if not records:
+        raise SystemExit("The trace is empty")
+    print(f"{len(records)} records over {records[-1][0] - records[0][0]:.0f} s")
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        entry = types.SimpleNamespace(entry_id="replay", title="Replay", data={}, options={})
+        connection = ReplayConnection(records, args.speed)
+        coordinator = InverterCoordinator(hass, entry, "replay", connection)
+        keys = set(args.key)
+        previous = {}
+        try:
+            while not connection.finished:
+                await coordinator.async_refresh()
+                values = coordinator.data["values"]
+                changed = {
+                    key: value
+                    for key, value in values.items()
+                    if (not keys or key in keys) and previous.get(key) != value
+                }
+                previous = dict(values)
+                if changed:
+                    print(changed)
+                await asyncio.sleep(coordinator.update_interval.total_seconds() / args.speed)
+        finally:
+            await coordinator.async_shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="trace files, oldest first")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor")
+    parser.add_argument("--key", action="append", default=[], help="only print these values")
+    asyncio.run(async_replay(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Local Modbus TCP simulator of a Kostal Plenticore inverter.
+
+Serves the register map of the integration on unit 71 with the low word of
+32-bit values first, like the inverter. Given several unit ids it acts as a
+gateway fronting that many inverters with the same register image. Requests are answered concurrently
+after an injectable latency with jitter, so pipelining behaves as on the
+real device. Live values drift and energy counters grow on every step.
+
+Run from the repository root to point a development Home Assistant at it:
+
+    python benchmarks/simulator.py --port 1502 --latency 0.02 --jitter 0.005
+"""
+
+from __future__ import annotations
+
+import argparse
+from array import array
+import asyncio
+from collections.abc import Collection, Sequence
+import os
+import random
+import struct
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from custom_components.kostal_plenticore_modubs.const import (  # noqa: E402
+    DEFAULT_PORT,
+    DEFAULT_UNIT_ID,
+    POLL_TIER_FAST,
+)
+from custom_components.kostal_plenticore_modubs.decoder import STRUCT_FORMATS  # noqa: E402
+from custom_components.kostal_plenticore_modubs.register_map import load_register_map  # noqa: E402
+
+# MBAP header: transaction id, protocol id, length, unit id
+MBAP_HEADER = struct.Struct(">HHHB")
+
+# Typical values per unit, live values drift around them
+TYPICAL_VALUES = {
+    "W": 2500.0,
+    "Wh": 1.5e6,
+    "A": 4.0,
+    "V": 230.0,
+    "%": 55.0,
+    "°C": 35.0,
+    "s": 3.6e7,
+}
+
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+GATEWAY_TARGET_FAILED = 0x0B
+
+
+class PlenticoreSimulator:
+    """Register image of a Plenticore inverter served over Modbus TCP."""
+
+    def __init__(
+        self,
+        unit_id: int | Collection[int] = DEFAULT_UNIT_ID,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        seed: int = 0,
+    ):
+        self.unit_ids = {unit_id} if isinstance(unit_id, int) else set(unit_id)
+        self.latency = latency
+        self.jitter = jitter
+        self.registers = array("H", bytes(2 * 0x10000))
+        self.requests = 0
+        self.bytes = 0
+        self._random = random.Random(seed)
+        self._registers = load_register_map().all_registers
+        for ri in self._registers:
+            self.set_value(ri.address, ri.type, self._initial_value(ri))
+
+    def set_value(self, address: int, register_type: str, value) -> None:
+        """Store `value` at `address`, low word first for 32-bit values."""
+        code = STRUCT_FORMATS[register_type]
+        words = struct.unpack(f"<{struct.calcsize(code) // 2}H", struct.pack(f"<{code}", value))
+        self.registers[address : address + len(words)] = array("H", words)
+
+    def step(self) -> None:
+        """Let live values drift and energy counters grow."""
+        rng = self._random
+        for ri in self._registers:
+            if ri.unit == "Wh" and ri.type == "Float":
+                self.set_value(ri.address, ri.type, TYPICAL_VALUES["Wh"] + rng.uniform(0, 10))
+            elif ri.poll_tier == POLL_TIER_FAST and ri.type == "Float":
+                typical = TYPICAL_VALUES.get(ri.unit, 1.0)
+                self.set_value(ri.address, ri.type, typical * rng.uniform(0.9, 1.1))
+
+    async def async_start(
+        self, host: str | Sequence[str] = "127.0.0.1", port: int = DEFAULT_PORT
+    ) -> asyncio.Server:
+        """Start serving on `host`:`port`, `host` may list several addresses."""
+        return await asyncio.start_server(self._async_handle_client, host, port)
+
+    def _initial_value(self, ri):
+        if ri.type == "InverterState":
+            return 6  # FeedIn
+        if ri.address == 1025:
+            return 0  # power scale factor
+        if ri.type in ("U16", "S16", "U32", "S32"):
+            return int(TYPICAL_VALUES.get(ri.unit, 100))
+        return TYPICAL_VALUES.get(ri.unit, 1.0)
+
+    async def _async_handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        tasks = set()
+        try:
+            while True:
+                header = await reader.readexactly(MBAP_HEADER.size)
+                tid, _protocol, length, unit_id = MBAP_HEADER.unpack(header)
+                pdu = await reader.readexactly(length - 1)
+                task = asyncio.create_task(self._async_reply(writer, tid, unit_id, pdu))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def _async_reply(self, writer: asyncio.StreamWriter, tid: int, unit_id: int, pdu: bytes) -> None:
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter)))
+
+        self.requests += 1
+        response = self._respond(unit_id, pdu)
+        frame = MBAP_HEADER.pack(tid, 0, len(response) + 1, unit_id) + response
+        self.bytes += len(frame) + MBAP_HEADER.size + len(pdu)
+        if not writer.is_closing():
+            writer.write(frame)
+
+    def _respond(self, unit_id: int, pdu: bytes) -> bytes:
+        function = pdu[0]
+        if unit_id not in self.unit_ids:
+            return bytes((function | 0x80, GATEWAY_TARGET_FAILED))
+
+        if function == 0x03:
+            address, count = struct.unpack_from(">HH", pdu, 1)
+            if not 1 <= count <= 125:
+                return bytes((0x83, ILLEGAL_DATA_VALUE))
+            if address + count > 0x10000:
+                return bytes((0x83, ILLEGAL_DATA_ADDRESS))
+            return struct.pack(f">BB{count}H", 0x03, 2 * count, *self.registers[address : address + count])
+
+        if function == 0x10:
+            address, count, _size = struct.unpack_from(">HHB", pdu, 1)
+            if not 1 <= count <= 123 or address + count > 0x10000:
+                return bytes((0x90, ILLEGAL_DATA_VALUE))
+            self.registers[address : address + count] = array("H", struct.unpack_from(f">{count}H", pdu, 6))
+            return struct.pack(">BHH", 0x10, address, count)
+
+        return bytes((function | 0x80, ILLEGAL_FUNCTION))
+
+
+async def async_serve(args: argparse.Namespace) -> None:
+    simulator = PlenticoreSimulator(args.unit_id, args.latency, args.jitter, args.seed)
+    server = await simulator.async_start(args.host, args.port)
+    units = ", ".join(map(str, args.unit_id))
+    print(f"Simulating a Plenticore on {args.host}:{args.port}, unit {units}")
+    async with server:
+        while True:
+            await asyncio.sleep(args.step)
+            simulator.step()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unit-id", type=int, nargs="+", default=[DEFAULT_UNIT_ID])
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds added to the latency")
+    parser.add_argument("--step", type=float, default=5.0, help="seconds between value changes")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(async_serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
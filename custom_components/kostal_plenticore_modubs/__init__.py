@@ -3,6 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 import logging
 from homeassistant import config_entries, core
+from homeassistant.helpers import entity_registry as er
 
 from .const import (
     DOMAIN,
@@ -10,8 +11,10 @@ from .const import (
 )
 
 from .coordinator import (
-    InverterCoordinator
+    InverterCoordinator,
+    energy_store
 )
+from .register_map import load_register_map
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -34,21 +37,57 @@ async def async_setup_entry(hass: core.HomeAssistant, entry: config_entries.Conf
     _LOGGER.info(f"Setting up {DOMAIN} with {entry.data}")
 
     ip_address = entry.data[CONF_IP_ADDRESS]
-    inverter_coordinator = InverterCoordinator(hass, entry, ip_address)
+    register_map = await hass.async_add_executor_job(load_register_map)
+    inverter_coordinator = InverterCoordinator(hass, entry, ip_address, register_map=register_map)
+    await inverter_coordinator.async_load_energy()
 
     await inverter_coordinator.async_config_entry_first_refresh()
     entry.runtime_data = KostalPlenticoreModbusData(
         inverter_coordinator = inverter_coordinator
     )
 
+    _async_migrate_unique_ids(hass, entry, inverter_coordinator.device_key)
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    # The first refresh only read the critical values, fill in the rest right away
+    entry.async_create_background_task(
+        hass, inverter_coordinator.async_refresh(), f"{DOMAIN} first full refresh"
+    )
 
     return True
 
+@core.callback
+def _async_migrate_unique_ids(
+    hass: core.HomeAssistant, entry: config_entries.ConfigEntry, device_key: str
+) -> None:
+    """Move the inverter state sensor to a unique id that includes the device key.
+
+    It used to be the bare register key, which collided between inverters
+    behind one gateway.
+    """
+    registry = er.async_get(hass)
+    old_unique_id = "inverter_state_sensor"
+    entity_id = registry.async_get_entity_id("sensor", DOMAIN, old_unique_id)
+    if entity_id is None or registry.async_get(entity_id).config_entry_id != entry.entry_id:
+        return
+    new_unique_id = f"{old_unique_id}_{device_key.replace('.', '_')}"
+    _LOGGER.info("Migrating unique id of %s to %s", entity_id, new_unique_id)
+    registry.async_update_entity(entity_id, new_unique_id=new_unique_id)
+
 async def async_unload_entry(hass: core.HomeAssistant, entry: config_entries.ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
+        # The coordinator shuts itself down through the entry's unload callbacks
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return unload_ok
+
+async def async_remove_entry(hass: core.HomeAssistant, entry: config_entries.ConfigEntry) -> None:
+    """Remove the energy counters of a deleted config entry."""
+    await energy_store(hass, entry.entry_id).async_remove()
+
+async def async_reload_entry(hass: core.HomeAssistant, entry: config_entries.ConfigEntry) -> None:
+    """Reload a config entry after its options changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
@@ -0,0 +1,114 @@
+"""Windowed aggregates of fast-polled power values.
+
+Polling power values every second gives good peak visibility, but writing
+every sample to the recorder does not scale. Instead the minimum, maximum,
+mean and last value of every window are published once the window ends.
+Each value keeps a running aggregate, so memory does not grow with the
+number of samples in a window.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from types import MappingProxyType
+
+from .const import POLL_TIER_FAST
+from .register_info import RegisterInfo
+
+
+def is_aggregated(ri: RegisterInfo) -> bool:
+    """Return True if windowed aggregates are kept for `ri`."""
+    return ri.poll_tier == POLL_TIER_FAST and ri.unit == "W"
+
+
+class RunningAggregate:
+    """Minimum, maximum, sum and last of the samples of one value."""
+
+    __slots__ = ("samples", "total", "minimum", "maximum", "last")
+
+    def __init__(self, value: float):
+        self.samples = 1
+        self.total = value
+        self.minimum = value
+        self.maximum = value
+        self.last = value
+
+    def add(self, value: float) -> None:
+        """Add a sample."""
+        self.samples += 1
+        self.total += value
+        if value < self.minimum:
+            self.minimum = value
+        elif value > self.maximum:
+            self.maximum = value
+        self.last = value
+
+    def as_dict(self) -> dict:
+        """Return the aggregates of the samples added."""
+        return {
+            "min": self.minimum,
+            "max": self.maximum,
+            "mean": self.total / self.samples,
+            "last": self.last,
+            "samples": self.samples,
+        }
+
+
+class WindowAggregator:
+    """Aggregates of values over consecutive windows of `window` seconds.
+
+    Samples are only counted when their register was read again. The
+    aggregates of a window are published when it ends; a value without a
+    sample in the window is left out.
+    """
+
+    def __init__(self, window: float):
+        self._window = window
+        self._started: float | None = None
+        self._running: dict[str, RunningAggregate] = {}
+        self._read_at: dict[str, float] = {}
+        self._published: Mapping[str, Mapping[str, float]] = MappingProxyType({})
+
+    @property
+    def window(self) -> float:
+        """Return the seconds per window."""
+        return self._window
+
+    @property
+    def published(self) -> Mapping[str, Mapping[str, float]]:
+        """Return the aggregates of the last complete window, by key.
+
+        A new mapping is returned once per window.
+        """
+        return self._published
+
+    def add(self, key: str, value: float | None, read_at: float | None) -> None:
+        """Add the sample `value` of `key`, read at `read_at`."""
+        if value is None or read_at is None or value != value:
+            return
+        if self._read_at.get(key, float("-inf")) >= read_at:
+            return
+
+        self._read_at[key] = read_at
+        running = self._running.get(key)
+        if running is None:
+            self._running[key] = RunningAggregate(value)
+        else:
+            running.add(value)
+
+    def roll(self, now: float) -> bool:
+        """Publish the aggregates if the window ended at `now`, return True if so."""
+        if self._started is None:
+            self._started = now
+            return False
+        elapsed = now - self._started
+        if elapsed < self._window:
+            return False
+
+        self._published = MappingProxyType(
+            {key: MappingProxyType(running.as_dict()) for key, running in self._running.items()}
+        )
+        self._running = {}
+        # Keep the windows on their grid when a refresh comes late
+        self._started += elapsed // self._window * self._window
+        return True
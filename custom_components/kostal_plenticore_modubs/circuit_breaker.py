@@ -0,0 +1,95 @@
+"""Circuit breaker for the connection to an unreachable inverter."""
+
+from __future__ import annotations
+
+import random
+import time
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Hold requests back while the inverter is unreachable.
+
+    The breaker opens on a failure. While open, requests are refused without
+    touching the network. Once the backoff elapsed, a single probe is let
+    through (half-open): success closes the breaker, failure opens it again
+    with twice the backoff, up to `max_backoff`. Every backoff is randomized
+    by `jitter` so several inverters do not retry in lockstep.
+    """
+
+    def __init__(self, initial_backoff: float, max_backoff: float, jitter: float):
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max_backoff
+        self._jitter = jitter
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._retry_at = 0.0
+        self._opened = 0
+
+    @property
+    def state(self) -> str:
+        """Return the breaker state."""
+        return self._state
+
+    def ready(self, now: float | None = None) -> bool:
+        """Return True if a request would be let through at `now`."""
+        if self._state == STATE_CLOSED:
+            return True
+        if now is None:
+            now = time.monotonic()
+        return self._state == STATE_OPEN and now >= self._retry_at
+
+    def allow_request(self, now: float | None = None) -> bool:
+        """Return True if a request may be sent, starting the probe when due."""
+        if not self.ready(now):
+            return False
+        if self._state == STATE_OPEN:
+            self._state = STATE_HALF_OPEN
+        return True
+
+    def retry_in(self, now: float | None = None) -> float:
+        """Seconds until the next probe, 0 if requests are let through."""
+        if self._state != STATE_OPEN:
+            return 0.0
+        if now is None:
+            now = time.monotonic()
+        return max(0.0, self._retry_at - now)
+
+    def record_success(self) -> bool:
+        """Close the breaker, return True if it was not closed before."""
+        if self._state == STATE_CLOSED:
+            return False
+        self._state = STATE_CLOSED
+        self._failures = 0
+        return True
+
+    def record_failure(self, now: float | None = None) -> float | None:
+        """Open the breaker and return the backoff in seconds.
+
+        Returns None if the breaker is already open, failures of requests
+        that were in flight when it opened do not extend the backoff.
+        """
+        if self._state == STATE_OPEN:
+            return None
+        if now is None:
+            now = time.monotonic()
+
+        backoff = min(self._max_backoff, self._initial_backoff * 2**self._failures)
+        backoff *= random.uniform(1 - self._jitter, 1 + self._jitter)
+        self._failures += 1
+        self._opened += 1
+        self._state = STATE_OPEN
+        self._retry_at = now + backoff
+        return backoff
+
+    def as_dict(self) -> dict:
+        """Return the breaker state for diagnostics."""
+        return {
+            "state": self._state,
+            "consecutive_failures": self._failures,
+            "retry_in": round(self.retry_in(), 1),
+            "times_opened": self._opened,
+        }
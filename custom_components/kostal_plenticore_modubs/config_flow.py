@@ -1,12 +1,41 @@
 import voluptuous as vol
 from homeassistant import config_entries
+from homeassistant.core import callback
 from homeassistant.helpers import config_validation as cv
 
-from .const import DOMAIN, NAME, CONF_IP_ADDRESS
+from .const import (
+    DOMAIN,
+    NAME,
+    CONF_IP_ADDRESS,
+    CONF_PORT,
+    CONF_AGGREGATE_WINDOW,
+    CONF_UNIT_ID,
+    CONF_FAST_POLL_INTERVAL,
+    CONF_MAX_SILENCE,
+    CONF_PIPELINE_DEPTH,
+    CONF_RECORD_TRACE,
+    CONF_STALE_TTL,
+    DEFAULT_AGGREGATE_WINDOW,
+    DEFAULT_FAST_POLL_INTERVAL,
+    DEFAULT_MAX_SILENCE,
+    DEFAULT_PIPELINE_DEPTH,
+    DEFAULT_PORT,
+    DEFAULT_STALE_TTL,
+    DEFAULT_UNIT_ID,
+    MAX_FAST_POLL_INTERVAL,
+    MAX_PIPELINE_DEPTH,
+    MIN_AGGREGATE_WINDOW,
+)
 
 class HaKostalPlenticoreModbusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Kostal Plenticore Modbus."""
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return HaKostalPlenticoreModbusOptionsFlow()
+
     async def async_step_user(self, user_input=None):
         """Handle the initial step."""
         if user_input is not None:
@@ -16,5 +45,49 @@ class HaKostalPlenticoreModbusConfigFlow(config_entries.ConfigFlow, domain=DOMAI
             step_id="user",
             data_schema=vol.Schema({
                 vol.Required(CONF_IP_ADDRESS, default="192.168.1.23"): cv.string,
+                vol.Required(CONF_PORT, default=DEFAULT_PORT): cv.port,
+                vol.Required(CONF_UNIT_ID, default=DEFAULT_UNIT_ID): vol.All(
+                    vol.Coerce(int), vol.Range(min=0, max=255)
+                ),
+            }),
+        )
+
+
+class HaKostalPlenticoreModbusOptionsFlow(config_entries.OptionsFlow):
+    """Handle the options for Kostal Plenticore Modbus."""
+
+    async def async_step_init(self, user_input=None):
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema({
+                vol.Required(
+                    CONF_PIPELINE_DEPTH,
+                    default=options.get(CONF_PIPELINE_DEPTH, DEFAULT_PIPELINE_DEPTH),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_PIPELINE_DEPTH)),
+                vol.Required(
+                    CONF_FAST_POLL_INTERVAL,
+                    default=options.get(CONF_FAST_POLL_INTERVAL, DEFAULT_FAST_POLL_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_FAST_POLL_INTERVAL)),
+                vol.Required(
+                    CONF_MAX_SILENCE,
+                    default=options.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                vol.Required(
+                    CONF_STALE_TTL,
+                    default=options.get(CONF_STALE_TTL, DEFAULT_STALE_TTL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                vol.Required(
+                    CONF_AGGREGATE_WINDOW,
+                    default=options.get(CONF_AGGREGATE_WINDOW, DEFAULT_AGGREGATE_WINDOW),
+                ): vol.All(vol.Coerce(int), vol.Range(min=MIN_AGGREGATE_WINDOW)),
+                vol.Required(
+                    CONF_RECORD_TRACE,
+                    default=options.get(CONF_RECORD_TRACE, False),
+                ): bool,
             }),
         )
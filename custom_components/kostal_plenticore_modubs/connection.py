@@ -0,0 +1,425 @@
+"""Persistent Modbus TCP connection to a Kostal Plenticore inverter."""
+
+from __future__ import annotations
+
+from array import array
+import asyncio
+import logging
+import socket
+import struct
+import sys
+import time
+
+from .circuit_breaker import STATE_HALF_OPEN, CircuitBreaker
+from .const import (
+    BACKOFF_INITIAL,
+    BACKOFF_JITTER,
+    BACKOFF_MAX,
+    DEFAULT_PIPELINE_DEPTH,
+    DEFAULT_PORT,
+    DEFAULT_UNIT_ID,
+    IDLE_PROBE_ADDRESS,
+    IDLE_PROBE_INTERVAL,
+    IDLE_PROBE_TIMEOUT,
+    MAX_CONSECUTIVE_TIMEOUTS,
+    REQUEST_TIMEOUT,
+    TCP_KEEPALIVE_COUNT,
+    TCP_KEEPALIVE_IDLE,
+    TCP_KEEPALIVE_INTERVAL,
+)
+from .scheduler import PRIORITY_BACKGROUND, PRIORITY_CONTROL, RequestScheduler
+
+_LOGGER = logging.getLogger(__name__)
+
+# MBAP header: transaction id, protocol id, length, unit id
+_MBAP_HEADER = struct.Struct(">HHHB")
+
+_READ_HOLDING_REGISTERS = 0x03
+_WRITE_MULTIPLE_REGISTERS = 0x10
+
+
+# The exceptions mirror pymodbus' names. Importing anything from pymodbus
+# loads all of its clients, framers and the simulator, which took longer
+# than the rest of the integration together.
+class ModbusException(Exception):
+    """Base class of the Modbus errors."""
+
+
+class ConnectionException(ModbusException):
+    """The inverter cannot be reached."""
+
+
+class ModbusIOException(ModbusException):
+    """A request got no valid response."""
+
+
+class ModbusResponseError(ModbusException):
+    """The inverter answered a request with a Modbus exception response."""
+
+
+class _ModbusTcpProtocol(asyncio.Protocol):
+    """Modbus TCP client protocol with several transactions in flight.
+
+    Requests are tagged with a transaction id and responses are matched by
+    that id, so they may be sent back to back without waiting for the
+    previous answer.
+    """
+
+    def __init__(self) -> None:
+        self.transport: asyncio.Transport | None = None
+        self._buffer = bytearray()
+        self._pending: dict[int, asyncio.Future[bytes]] = {}
+        self._next_tid = 0
+
+    @property
+    def is_open(self) -> bool:
+        """Return True while the transport is usable."""
+        return self.transport is not None and not self.transport.is_closing()
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self.transport = None
+        self._fail_pending(ConnectionException(f"Connection lost: {exc}"))
+
+    def data_received(self, data: bytes) -> None:
+        buffer = self._buffer
+        buffer.extend(data)
+        header_size = _MBAP_HEADER.size
+        while len(buffer) >= header_size:
+            tid, protocol_id, length, _unit = _MBAP_HEADER.unpack_from(buffer)
+            if protocol_id != 0 or length < 2:
+                # Not Modbus or no function code, the stream cannot be framed any more
+                self._fail_pending(
+                    ModbusIOException(f"Malformed frame: protocol id {protocol_id}, length {length}")
+                )
+                buffer.clear()
+                self.close()
+                return
+            frame_size = header_size - 1 + length
+            if len(buffer) < frame_size:
+                break
+            pdu = bytes(buffer[header_size:frame_size])
+            del buffer[:frame_size]
+
+            future = self._pending.pop(tid, None)
+            if future is not None and not future.done():
+                future.set_result(pdu)
+
+    async def async_request(self, unit_id: int, pdu: bytes, timeout: float) -> bytes:
+        """Send `pdu` to `unit_id` and return the response PDU."""
+        if not self.is_open:
+            raise ConnectionException("Not connected")
+
+        tid = self._allocate_tid()
+        future = asyncio.get_running_loop().create_future()
+        self._pending[tid] = future
+        self.transport.write(_MBAP_HEADER.pack(tid, 0, len(pdu) + 1, unit_id) + pdu)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError as err:
+            raise ModbusIOException(f"No response to transaction {tid}") from err
+        finally:
+            self._pending.pop(tid, None)
+
+    def close(self) -> None:
+        """Close the transport."""
+        if self.transport is not None:
+            self.transport.close()
+
+    def _fail_pending(self, exc: Exception) -> None:
+        """Fail every transaction in flight with `exc`."""
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(exc)
+        self._pending.clear()
+
+    def _allocate_tid(self) -> int:
+        """Return the next transaction id that is not in flight."""
+        tid = self._next_tid
+        while True:
+            tid = tid % 0xFFFF + 1
+            if tid not in self._pending:
+                self._next_tid = tid
+                return tid
+
+
+class ModbusConnection:
+    """Long-lived Modbus TCP connection shared by all reads and writes.
+
+    The connection is opened lazily on the first request and reopened on the
+    next request after it was lost. Half-open sockets are detected by TCP
+    keepalive and, after a period without traffic, by a cheap probe read
+    before the connection is reused.
+
+    Up to `max_in_flight` requests are pipelined on the socket, callers that
+    issue requests concurrently only wait for the round trips they overlap.
+    Requests waiting for a pipeline slot are served by priority.
+
+    Every request may name its own unit id, so the inverters behind one
+    Modbus TCP gateway share a single socket and request stream. `unit_id`
+    is used where a request does not name one.
+
+    While the inverter is unreachable a circuit breaker refuses requests
+    right away instead of letting each of them run into a timeout. After the
+    backoff, the next request reconnects and a probe read decides whether
+    the connection is usable again. A unit that does not answer only fails
+    its own requests. The connection is dropped when it is lost, or when
+    several requests in a row time out and the last unit that answered does
+    not answer a probe either.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = DEFAULT_PORT,
+        unit_id: int = DEFAULT_UNIT_ID,
+        max_in_flight: int = DEFAULT_PIPELINE_DEPTH,
+    ):
+        self._host = host
+        self._port = port
+        self._unit_id = unit_id
+        self._probe_unit_id = unit_id
+        self._protocol: _ModbusTcpProtocol | None = None
+        self._connect_lock = asyncio.Lock()
+        self._scheduler = RequestScheduler(max_in_flight)
+        self._breaker = CircuitBreaker(BACKOFF_INITIAL, BACKOFF_MAX, BACKOFF_JITTER)
+        self._last_activity = 0.0
+        self._timeouts_in_a_row = 0
+        self._closed = False
+        self._connects = 0
+        self._bytes_transferred = 0
+
+    @property
+    def connected(self) -> bool:
+        """Return True if the underlying socket is open."""
+        return self._protocol is not None and self._protocol.is_open
+
+    @property
+    def ready(self) -> bool:
+        """Return False while the circuit breaker holds requests back."""
+        return self._breaker.ready()
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """Return the circuit breaker of the connection."""
+        return self._breaker
+
+    @property
+    def scheduler(self) -> RequestScheduler:
+        """Return the request scheduler of the connection."""
+        return self._scheduler
+
+    @property
+    def reconnects(self) -> int:
+        """Number of connections opened after the first one."""
+        return max(0, self._connects - 1)
+
+    @property
+    def bytes_transferred(self) -> int:
+        """Bytes of Modbus frames sent and received so far."""
+        return self._bytes_transferred
+
+    def as_dict(self) -> dict:
+        """Return connection metrics for diagnostics."""
+        return {
+            "connected": self.connected,
+            "reconnects": self.reconnects,
+            "bytes_transferred": self._bytes_transferred,
+            "circuit_breaker": self._breaker.as_dict(),
+            "scheduler": self._scheduler.as_dict(),
+        }
+
+    async def async_read_holding_registers(
+        self,
+        address: int,
+        count: int,
+        priority: int = PRIORITY_BACKGROUND,
+        unit_id: int | None = None,
+    ) -> array:
+        """Read `count` holding registers starting at `address`."""
+        response = await self._async_execute(
+            struct.pack(">BHH", _READ_HOLDING_REGISTERS, address, count), priority, unit_id
+        )
+        if (
+            len(response) < 2
+            or response[0] != _READ_HOLDING_REGISTERS
+            or response[1] != 2 * count
+            or len(response) != 2 + 2 * count
+        ):
+            raise ModbusResponseError(
+                f"Error reading registers: unit={self._unit(unit_id)} addr={address} count={count}"
+            )
+        registers = array("H", response[2:])
+        if sys.byteorder == "little":
+            registers.byteswap()
+        return registers
+
+    async def async_write_registers(
+        self,
+        address: int,
+        values: list[int],
+        priority: int = PRIORITY_CONTROL,
+        unit_id: int | None = None,
+    ) -> None:
+        """Write `values` to consecutive holding registers starting at `address`."""
+        count = len(values)
+        response = await self._async_execute(
+            struct.pack(f">BHHB{count}H", _WRITE_MULTIPLE_REGISTERS, address, count, 2 * count, *values),
+            priority,
+            unit_id,
+        )
+        if response[0] != _WRITE_MULTIPLE_REGISTERS:
+            raise ModbusResponseError(
+                f"Error writing registers: unit={self._unit(unit_id)} addr={address} count={count}"
+            )
+
+    async def async_close(self) -> None:
+        """Close the connection and refuse further requests."""
+        self._closed = True
+        async with self._connect_lock:
+            if self._protocol is not None:
+                self._drop(self._protocol)
+
+    def _unit(self, unit_id: int | None) -> int:
+        """Return the unit id a request for `unit_id` is sent to."""
+        return self._unit_id if unit_id is None else unit_id
+
+    async def _async_execute(self, pdu: bytes, priority: int, unit_id: int | None = None) -> bytes:
+        """Send `pdu` once the scheduler grants a pipeline slot and return the response PDU."""
+        return await self._scheduler.async_run(priority, lambda: self._async_send(pdu, unit_id))
+
+    async def _async_send(self, pdu: bytes, unit_id: int | None = None) -> bytes:
+        """Send `pdu` to `unit_id` on the connection and return the response PDU."""
+        unit_id = self._unit(unit_id)
+        protocol = await self._async_get_protocol()
+        try:
+            response = await protocol.async_request(unit_id, pdu, REQUEST_TIMEOUT)
+        except ModbusIOException:
+            # Behind a gateway a single silent unit must not cut off the others
+            self._timeouts_in_a_row += 1
+            if (
+                self._timeouts_in_a_row == MAX_CONSECUTIVE_TIMEOUTS
+                and not await self._async_probe(protocol)
+            ):
+                self._drop(protocol)
+                self._record_failure()
+            raise
+        except ModbusException:
+            self._drop(protocol)
+            self._record_failure()
+            raise
+
+        self._timeouts_in_a_row = 0
+        if not response[0] & 0x80:
+            # Probe a unit that is known to answer, behind a gateway not every unit id does.
+            self._probe_unit_id = unit_id
+        self._last_activity = time.monotonic()
+        self._bytes_transferred += 2 * _MBAP_HEADER.size + len(pdu) + len(response)
+        return response
+
+    async def _async_get_protocol(self) -> _ModbusTcpProtocol:
+        """Return a connected protocol, (re)connecting if required."""
+        async with self._connect_lock:
+            if self._closed:
+                raise ConnectionException(f"Connection to {self._host} is closed")
+
+            protocol = self._protocol
+            if protocol is not None and protocol.is_open:
+                idle = time.monotonic() - self._last_activity
+                if idle < IDLE_PROBE_INTERVAL or await self._async_probe(protocol):
+                    return protocol
+                _LOGGER.debug("Idle connection to %s went stale, reconnecting", self._host)
+                self._drop(protocol)
+
+            if not self._breaker.allow_request():
+                raise ConnectionException(
+                    f"Connection to {self._host} suspended for {self._breaker.retry_in():.0f} s"
+                )
+
+            protocol = None
+            try:
+                _transport, protocol = await asyncio.wait_for(
+                    asyncio.get_running_loop().create_connection(
+                        _ModbusTcpProtocol, self._host, self._port
+                    ),
+                    REQUEST_TIMEOUT,
+                )
+                self._enable_keepalive(protocol)
+                probed = self._breaker.state != STATE_HALF_OPEN or await self._async_probe(protocol)
+            except BaseException as err:
+                if protocol is not None:
+                    protocol.close()
+                if isinstance(err, (OSError, asyncio.TimeoutError)):
+                    self._record_failure()
+                    raise ConnectionException(
+                        f"Connection to {self._host}:{self._port} failed"
+                    ) from err
+                # Cancelled while connecting or probing, a half-open breaker
+                # would never let another request through.
+                if self._breaker.state == STATE_HALF_OPEN:
+                    self._record_failure()
+                raise
+
+            if not probed:
+                protocol.close()
+                self._record_failure()
+                raise ConnectionException(f"Probe of {self._host}:{self._port} failed")
+
+            if self._breaker.record_success():
+                _LOGGER.info("Connection to %s:%s restored", self._host, self._port)
+
+            self._protocol = protocol
+            self._connects += 1
+            self._last_activity = time.monotonic()
+            _LOGGER.debug("Connected to %s:%s", self._host, self._port)
+            return protocol
+
+    async def _async_probe(self, protocol: _ModbusTcpProtocol) -> bool:
+        """Check an idle connection with a single register read."""
+        try:
+            await protocol.async_request(
+                self._probe_unit_id,
+                struct.pack(">BHH", _READ_HOLDING_REGISTERS, IDLE_PROBE_ADDRESS, 1),
+                IDLE_PROBE_TIMEOUT,
+            )
+        except ModbusException:
+            return False
+
+        # An exception response still proves the socket is alive.
+        self._last_activity = time.monotonic()
+        self._timeouts_in_a_row = 0
+        return True
+
+    @staticmethod
+    def _enable_keepalive(protocol: _ModbusTcpProtocol) -> None:
+        """Enable TCP keepalive so half-open sockets are torn down by the kernel."""
+        sock = protocol.transport.get_extra_info("socket")
+        if sock is None:
+            return
+
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        for option, value in (
+            ("TCP_KEEPIDLE", TCP_KEEPALIVE_IDLE),
+            ("TCP_KEEPINTVL", TCP_KEEPALIVE_INTERVAL),
+            ("TCP_KEEPCNT", TCP_KEEPALIVE_COUNT),
+        ):
+            if hasattr(socket, option):
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+
+    def _record_failure(self) -> None:
+        """Open the circuit breaker after a failed connect or request."""
+        backoff = self._breaker.record_failure()
+        if backoff is not None:
+            _LOGGER.warning(
+                "Connection to %s:%s failed, retrying in %.0f s", self._host, self._port, backoff
+            )
+
+    def _drop(self, protocol: _ModbusTcpProtocol) -> None:
+        """Close `protocol` and forget it if it is the current connection."""
+        protocol.close()
+        if self._protocol is protocol:
+            self._protocol = None
+            self._timeouts_in_a_row = 0
@@ -0,0 +1,120 @@
+"""Connections and poll timing shared by all inverters of the integration."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from homeassistant.core import HomeAssistant
+
+from .connection import ModbusConnection
+from .const import DATA_CONNECTION_MANAGER, DEFAULT_UNIT_ID, DOMAIN, MAX_CONCURRENT_POLLS
+
+_T = TypeVar("_T")
+
+# Golden ratio conjugate, consecutive multiples spread evenly over [0, 1)
+_PHASE_STEP = 0.6180339887
+
+
+def get_connection_manager(hass: HomeAssistant) -> ConnectionManager:
+    """Return the connection manager of the integration, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    manager = domain_data.get(DATA_CONNECTION_MANAGER)
+    if manager is None:
+        manager = domain_data[DATA_CONNECTION_MANAGER] = ConnectionManager(MAX_CONCURRENT_POLLS)
+    return manager
+
+
+class ConnectionManager:
+    """Share connections and spread the polls of several inverters.
+
+    Config entries that point at the same host and port share one
+    connection, and with it its request scheduler and circuit breaker. This
+    covers several inverters behind one Modbus TCP gateway, their requests
+    carry their own unit ids and are pipelined on the same socket. The
+    connection is closed when its last user releases it.
+
+    Every coordinator gets a phase slot, so their polls do not all start on
+    the same second, and at most `max_concurrent_polls` poll cycles
+    exchange requests at the same time.
+    """
+
+    def __init__(self, max_concurrent_polls: int):
+        self._connections: dict[tuple[str, int], ModbusConnection] = {}
+        self._users: dict[tuple[str, int], int] = {}
+        self._phase_slots: set[int] = set()
+        self._max_concurrent_polls = max_concurrent_polls
+        self._poll_slots = asyncio.Semaphore(max_concurrent_polls)
+        self._active_polls = 0
+        self._max_active_polls = 0
+
+    def acquire(
+        self, host: str, port: int, max_in_flight: int, unit_id: int = DEFAULT_UNIT_ID
+    ) -> ModbusConnection:
+        """Return the connection to `host`:`port`, opening a new one if needed.
+
+        `max_in_flight` and the default `unit_id` only apply when the
+        connection is created, requests name their unit id themselves.
+        """
+        key = (host, port)
+        connection = self._connections.get(key)
+        if connection is None:
+            connection = self._connections[key] = ModbusConnection(
+                host, port, unit_id, max_in_flight
+            )
+        self._users[key] = self._users.get(key, 0) + 1
+        return connection
+
+    async def async_release(self, connection: ModbusConnection) -> None:
+        """Give up a connection from `acquire`, closing it once unused."""
+        key = next(
+            (key for key, shared in self._connections.items() if shared is connection), None
+        )
+        if key is None:
+            return
+        self._users[key] -= 1
+        if self._users[key]:
+            return
+
+        del self._users[key]
+        del self._connections[key]
+        await connection.async_close()
+
+    def acquire_phase(self) -> int:
+        """Reserve the lowest free phase slot."""
+        slot = 0
+        while slot in self._phase_slots:
+            slot += 1
+        self._phase_slots.add(slot)
+        return slot
+
+    def release_phase(self, slot: int) -> None:
+        """Free a phase slot from `acquire_phase`."""
+        self._phase_slots.discard(slot)
+
+    @staticmethod
+    def phase_offset(slot: int, interval: float) -> float:
+        """Return the whole seconds slot number `slot` is shifted by within `interval`."""
+        return float(round(slot * _PHASE_STEP % 1 * interval) % max(1, round(interval)))
+
+    async def async_run_poll(self, poll: Callable[[], Awaitable[_T]]) -> _T:
+        """Run `poll` once fewer than the maximum number of polls are running."""
+        async with self._poll_slots:
+            self._active_polls += 1
+            self._max_active_polls = max(self._max_active_polls, self._active_polls)
+            try:
+                return await poll()
+            finally:
+                self._active_polls -= 1
+
+    def as_dict(self) -> dict:
+        """Return the shared state for diagnostics."""
+        return {
+            "connections": len(self._connections),
+            "users": sum(self._users.values()),
+            "phase_slots": sorted(self._phase_slots),
+            "max_concurrent_polls": self._max_concurrent_polls,
+            "active_polls": self._active_polls,
+            "max_active_polls": self._max_active_polls,
+        }
@@ -3,4 +3,93 @@ MANUFACTURER = "Kostal"
 MODEL = "Plenticore"
 NAME = "Kostal Plenticore Modbus"
 
-CONF_IP_ADDRESS = 'ip_address'
\ No newline at end of file
+CONF_IP_ADDRESS = 'ip_address'
+CONF_PORT = 'port'
+CONF_UNIT_ID = 'unit_id'
+CONF_PIPELINE_DEPTH = 'pipeline_depth'
+CONF_MAX_SILENCE = 'max_silence'
+CONF_STALE_TTL = 'stale_ttl'
+CONF_RECORD_TRACE = 'record_trace'
+CONF_AGGREGATE_WINDOW = 'aggregate_window'
+
+DEFAULT_PORT = 1502
+DEFAULT_UNIT_ID = 71
+DEFAULT_PIPELINE_DEPTH = 4
+MAX_PIPELINE_DEPTH = 16
+
+# Seconds after which a sensor writes its state even if the value stayed within its deadband
+DEFAULT_MAX_SILENCE = 300
+
+# Seconds a value may keep failing to refresh before its entity becomes unavailable
+DEFAULT_STALE_TTL = 120
+
+# Seconds per window of the min/max/mean aggregates of fast power values
+DEFAULT_AGGREGATE_WINDOW = 60
+MIN_AGGREGATE_WINDOW = 10
+
+# Key of the connection manager in hass.data[DOMAIN]
+DATA_CONNECTION_MANAGER = 'connection_manager'
+# Inverters polled at the same time across all config entries
+MAX_CONCURRENT_POLLS = 4
+
+# Connection handling
+REQUEST_TIMEOUT = 3.0
+# Timeouts in a row, without any unit answering in between, after which a
+# probe of the last unit that answered decides whether the connection is lost
+MAX_CONSECUTIVE_TIMEOUTS = 3
+# Seconds the first refresh may take, entities are set up without what did not arrive
+FIRST_REFRESH_TIMEOUT = 1.5
+IDLE_PROBE_INTERVAL = 60.0
+IDLE_PROBE_TIMEOUT = 2.0
+IDLE_PROBE_ADDRESS = 56
+TCP_KEEPALIVE_IDLE = 30
+TCP_KEEPALIVE_INTERVAL = 10
+TCP_KEEPALIVE_COUNT = 3
+
+# Backoff in seconds while the inverter is unreachable, doubled per failed retry
+BACKOFF_INITIAL = 5.0
+BACKOFF_MAX = 300.0
+BACKOFF_JITTER = 0.2
+
+# Registers closer than this are fetched in one request, the gap is read and discarded
+READ_PLAN_MAX_GAP = 16
+
+# Poll tiers, every register is read at the interval of its tier
+POLL_TIER_FAST = 'fast'
+POLL_TIER_NORMAL = 'normal'
+POLL_TIER_SLOW = 'slow'
+POLL_TIER_STATIC = 'static'
+
+CONF_FAST_POLL_INTERVAL = 'fast_poll_interval'
+DEFAULT_FAST_POLL_INTERVAL = 15
+MAX_FAST_POLL_INTERVAL = 15
+
+# Seconds between reads per tier, the fast tier is configurable
+POLL_TIER_INTERVALS = {
+    POLL_TIER_FAST: DEFAULT_FAST_POLL_INTERVAL,
+    POLL_TIER_NORMAL: 15,
+    POLL_TIER_SLOW: 60,
+    POLL_TIER_STATIC: 3600,
+}
+
+# Inverter states (register 56) without production: Off, Standby, Shutdown
+IDLE_INVERTER_STATES = (0, 10, 15)
+# DC power in W below which an inverter in one of these states counts as idle
+IDLE_DC_POWER_THRESHOLD = 10
+# Seconds between heartbeat reads while the inverter is idle
+IDLE_POLL_INTERVAL = 30
+
+# Seconds without a new value before queued register writes are sent
+WRITE_DEBOUNCE_DELAY = 1.0
+
+# Energy counters integrated from power values, see energy.py. No energy is
+# added across a gap in the power samples of more seconds than the maximum.
+ENERGY_MAX_GAP = 90
+ENERGY_SAVE_DELAY = 60
+ENERGY_STORAGE_VERSION = 1
+
+# Register trace recording, see trace.py
+TRACE_MAX_BYTES = 10 * 1024 * 1024
+TRACE_BACKUPS = 2
+TRACE_FLUSH_RECORDS = 1024
+TRACE_FLUSH_INTERVAL = 60
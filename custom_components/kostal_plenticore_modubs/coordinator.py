@@ -2,26 +2,101 @@
 
 from __future__ import annotations
 
+from array import array
+import asyncio
 from datetime import timedelta
 import logging
-from pymodbus.client import AsyncModbusTcpClient
-from pymodbus.exceptions import ModbusException
+import time
+from types import MappingProxyType
 
 from homeassistant.helpers.entity import Entity
 from homeassistant.const import PERCENTAGE
 
-from homeassistant.core import callback
+from homeassistant.core import CALLBACK_TYPE, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
     UpdateFailed,
 )
 
-from .const import DOMAIN, NAME, MANUFACTURER, MODEL
+from .aggregate import WindowAggregator, is_aggregated
+from .connection import (
+    ConnectionException,
+    ModbusConnection,
+    ModbusException,
+    ModbusIOException,
+    ModbusResponseError,
+)
+from .connection_manager import ConnectionManager, get_connection_manager
+from .decoder import encode_value
+from .derived import derive_values, derived_inputs
+from .energy import INTEGRATED_ENERGIES, SOURCE_INPUTS, EnergyIntegrator, integrated_inputs
+from .metrics import BlockStatistics, CycleStatistics
+from .const import (
+    CONF_AGGREGATE_WINDOW,
+    CONF_FAST_POLL_INTERVAL,
+    CONF_MAX_SILENCE,
+    CONF_PIPELINE_DEPTH,
+    CONF_PORT,
+    CONF_RECORD_TRACE,
+    CONF_STALE_TTL,
+    CONF_UNIT_ID,
+    DEFAULT_AGGREGATE_WINDOW,
+    DEFAULT_FAST_POLL_INTERVAL,
+    DEFAULT_MAX_SILENCE,
+    DEFAULT_PIPELINE_DEPTH,
+    DEFAULT_PORT,
+    DEFAULT_STALE_TTL,
+    DEFAULT_UNIT_ID,
+    DOMAIN,
+    ENERGY_MAX_GAP,
+    ENERGY_SAVE_DELAY,
+    ENERGY_STORAGE_VERSION,
+    FIRST_REFRESH_TIMEOUT,
+    IDLE_DC_POWER_THRESHOLD,
+    IDLE_INVERTER_STATES,
+    IDLE_POLL_INTERVAL,
+    MANUFACTURER,
+    MODEL,
+    NAME,
+    POLL_TIER_FAST,
+    POLL_TIER_INTERVALS,
+    TRACE_BACKUPS,
+    TRACE_FLUSH_INTERVAL,
+    TRACE_FLUSH_RECORDS,
+    TRACE_MAX_BYTES,
+    WRITE_DEBOUNCE_DELAY,
+)
+from .read_plan import ReadBlock, ReadPlan
+from .register_map import TIER_ORDER, RegisterMap, load_register_map
+from .register_store import RegisterStore
+from .scheduler import PRIORITY_BACKGROUND, PRIORITY_FAST, RequestScheduler
+from .trace import TraceRecorder
+from .write_coalescer import WriteCoalescer
 
 _LOGGER = logging.getLogger(__name__)
 
+# Values the coordinator needs to detect an idle inverter, polled even
+# without an entity consuming them
+IDLE_DETECTION_KEYS = frozenset({"inverter_state_sensor", "total_dc_power"})
+
+# Values the first refresh is limited to, so setup does not wait for a full
+# poll. The following refresh fills in the rest.
+CRITICAL_KEYS = frozenset(
+    {"inverter_state_sensor", "total_ac_active_power", "act_state_of_charge", "battery_actual_soc"}
+)
+
+def _computed_inputs(keys) -> set[str]:
+    """Return the register keys the derived values and energy counters among `keys` need."""
+    return derived_inputs(keys) | integrated_inputs(keys)
+
+
+def energy_store(hass, entry_id: str) -> Store:
+    """Return the store of the energy counters of config entry `entry_id`."""
+    return Store(hass, ENERGY_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.energy")
+
 
 class InverterCoordinator(DataUpdateCoordinator):
     """Inverter coordinator.
@@ -33,20 +108,92 @@ class InverterCoordinator(DataUpdateCoordinator):
         available
     """
 
-    def __init__(self, hass, entry, ip_address):
-        """Initialize coordinator."""
+    def __init__(
+        self,
+        hass,
+        entry,
+        ip_address,
+        connection: ModbusConnection | None = None,
+        register_map: RegisterMap | None = None,
+    ):
+        """Initialize coordinator.
+
+        `connection` replaces the connection to `ip_address`, e.g. to replay a trace.
+        `register_map` is loaded from registers.json if not given, which blocks.
+        """
+        self._tier_intervals = {
+            **POLL_TIER_INTERVALS,
+            POLL_TIER_FAST: entry.options.get(CONF_FAST_POLL_INTERVAL, DEFAULT_FAST_POLL_INTERVAL),
+        }
+
         super().__init__(
             hass,
             _LOGGER,
             # Name of the data. For logging purposes.
             name=DOMAIN,
             # Polling interval. Will only be polled if there are subscribers.
-            update_interval=timedelta(seconds=15),
+            # Every poll reads the blocks of the tiers that are due.
+            update_interval=timedelta(seconds=self._tier_intervals[POLL_TIER_FAST]),
         )
 
         self._hass = hass
         self._entry = entry
         self._ip_address = ip_address
+        self._register_map = register_map or load_register_map()
+        self._port = entry.data.get(CONF_PORT, DEFAULT_PORT)
+        self._unit_id = entry.data.get(CONF_UNIT_ID, DEFAULT_UNIT_ID)
+        # Shared by all entities of the inverter instead of one dict each
+        self._device_info = {
+            "identifiers": {(DOMAIN, f"{NAME}_{self.device_key.replace('.', '_')}")},
+            "name": NAME,
+            "manufacturer": MANUFACTURER,
+            "model": MODEL,
+        }
+        self._manager = get_connection_manager(hass)
+        self._owns_connection = connection is not None
+        # Set by the first shutdown, later ones must not release shared state again
+        self._shut_down = False
+        # Inverters behind the same gateway share its connection
+        self._connection = connection or self._manager.acquire(
+            ip_address,
+            self._port,
+            entry.options.get(CONF_PIPELINE_DEPTH, DEFAULT_PIPELINE_DEPTH),
+            self._unit_id,
+        )
+        # Shift the polls of this inverter against the other ones of the site
+        self._phase_slot = self._manager.acquire_phase()
+        self._phase_delay = ConnectionManager.phase_offset(
+            self._phase_slot, self._tier_intervals[POLL_TIER_FAST]
+        )
+        # Seconds the scheduled poll currently runs late by
+        self._phase_shift = 0.0
+        self._energy = EnergyIntegrator(INTEGRATED_ENERGIES, ENERGY_MAX_GAP)
+        self._energy_store = energy_store(hass, entry.entry_id)
+        self._aggregator = WindowAggregator(
+            entry.options.get(CONF_AGGREGATE_WINDOW, DEFAULT_AGGREGATE_WINDOW)
+        )
+        self._trace_recorder = None
+        if entry.options.get(CONF_RECORD_TRACE, False):
+            self._trace_recorder = TraceRecorder(
+                hass,
+                hass.config.path(DOMAIN, f"{entry.entry_id}.trace.gz"),
+                TRACE_MAX_BYTES,
+                TRACE_BACKUPS,
+                TRACE_FLUSH_RECORDS,
+                TRACE_FLUSH_INTERVAL,
+            )
+        self._stale_ttl = entry.options.get(CONF_STALE_TTL, DEFAULT_STALE_TTL)
+        self._tier_last_read: dict[str, float] = {}
+        self._forced_tiers: set[str] = set()
+        self._cycle_statistics = CycleStatistics()
+        # While idle only the heartbeat blocks are read
+        self._idle = False
+        # Set once a refresh read more than the critical blocks
+        self._startup_complete = False
+        self._write_coalescer = WriteCoalescer(hass, WRITE_DEBOUNCE_DELAY, self._async_write_batch)
+        # Number of enabled entities consuming each value, by unique_id
+        self._consumers: dict[str, int] = {}
+        self._update_read_plan()
 
         hass.data.setdefault(DOMAIN, {})
         hass.data[DOMAIN].setdefault(
@@ -61,214 +208,518 @@ class InverterCoordinator(DataUpdateCoordinator):
 
     @property
     def device_info(self):
-        """Return information to link this entity with the correct device."""
-        return {
-            "identifiers": {(DOMAIN, self._entry.entry_id)},
-            "name": NAME,
-            "manufacturer": MANUFACTURER,
-            "model": MODEL,
-        }
-
-    async def _async_update_data(self):
-        """Fetch data from API endpoint.
+        """Return information to link the entities of this inverter with its device."""
+        return self._device_info
 
-        This is the place to pre-process the data to lookup tables
-        so entities can quickly look up their data.
-        """
-
-        client = AsyncModbusTcpClient(
-            self._ip_address, port=1502
-        )  # IP-Adresse und Port des Inverters
-
-        data = {"inverter_state": 18, "registers": [0 for _ in range(40355)]}
+    @property
+    def max_silence(self) -> float:
+        """Seconds after which sensors write their state regardless of deadbands."""
+        return self._entry.options.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE)
 
-        async def read_holding_registers(address, count):
-            result = await client.read_holding_registers(
-                address, count=count, device_id=71
-            )
-            if not result.isError():
-                data["registers"][address : address + count] = result.registers
-            else:
-                _LOGGER.error("Error reading registers: addr=%s count=%s", address, count)
+    @property
+    def register_map(self) -> RegisterMap:
+        """Return the register map the inverter is polled with."""
+        return self._register_map
 
-        try:
-            connection = await client.connect()
+    @property
+    def connection(self) -> ModbusConnection:
+        """Return the connection to the inverter."""
+        return self._connection
 
-            if connection:
-                # read Registers
-                await read_holding_registers(98, 124)
+    @property
+    def device_key(self) -> str:
+        """Return the part of unique ids that identifies this inverter.
 
-                # Powermeter
-                await read_holding_registers(220, 38)
+        The port and unit id are only included when they differ from the
+        defaults, so existing entities keep their ids.
+        """
+        key = self._ip_address
+        if self._port != DEFAULT_PORT:
+            key = f"{key}_{self._port}"
+        if self._unit_id != DEFAULT_UNIT_ID:
+            key = f"{key}_unit_{self._unit_id}"
+        return key
 
-                # DC1, DC2, DC3
-                await read_holding_registers(258, 30)
+    @property
+    def aggregate_window(self) -> float:
+        """Return the seconds per window of the aggregates in data["aggregates"]."""
+        return self._aggregator.window
 
-                # yield
-                await read_holding_registers(320, 8)
+    @property
+    def energy_totals(self) -> dict[str, float]:
+        """Return the integrated energy counters in Wh, by key."""
+        return self._energy.totals
 
-                # read Registers (Battery)
-                await read_holding_registers(512, 18)
+    @property
+    def startup_complete(self) -> bool:
+        """Return True once every block was polled after the first refresh."""
+        return self._startup_complete
 
-                # read Registers (Power Scale Factor)
-                await read_holding_registers(1025, 1)
+    @property
+    def cycle_statistics(self) -> CycleStatistics:
+        """Return the figures of the poll cycles."""
+        return self._cycle_statistics
 
-                # read Registers (Battery max. charge/discharge power limit and Minimum/Maximum SOC)
-                await read_holding_registers(1030, 53)
+    @property
+    def scheduler(self) -> RequestScheduler:
+        """Return the request scheduler with its queue metrics."""
+        return self._connection.scheduler
 
-                # total real energy exported/imported
-                await read_holding_registers(40346, 2)
-                await read_holding_registers(40354, 2)
+    @property
+    def idle(self) -> bool:
+        """Return True while the inverter is idle and only the heartbeat is polled."""
+        return self._idle
 
+    @property
+    def read_plan(self) -> ReadPlan:
+        """Return the block reads performed per poll cycle."""
+        return self._read_plan
 
-                # Inverter State
-                result = await client.read_holding_registers(56, count=2, device_id=71)
-                if not result.isError():
-                    result_uint = client.convert_from_registers(
-                        registers=list(reversed(result.registers)),
-                        data_type=client.DATATYPE.UINT32,
-                    )
-                    data["inverter_state"] = result_uint
-                else:
-                    _LOGGER.error("Error reading registers")
+    @callback
+    def async_add_consumer(self, keys) -> CALLBACK_TYPE:
+        """Register an entity that consumes the values `keys`.
 
-            else:
-                _LOGGER.error("Connection failed")
+        Only registers consumed by an enabled entity are polled. Returns a
+        callback that removes the consumer again.
+        """
+        keys = tuple(keys)
+        for key in keys:
+            self._consumers[key] = self._consumers.get(key, 0) + 1
+        self._async_consumers_changed(keys)
+
+        @callback
+        def remove_consumer() -> None:
+            for key in keys:
+                self._consumers[key] -= 1
+                if not self._consumers[key]:
+                    del self._consumers[key]
+            self._async_consumers_changed(())
+
+        return remove_consumer
+
+    @callback
+    def async_force_tiers(self, tiers=TIER_ORDER) -> None:
+        """Read the blocks of `tiers` with the next refresh, whether they are due or not."""
+        self._forced_tiers.update(tiers)
+
+    @callback
+    def _async_consumers_changed(self, added_keys) -> None:
+        """Replan with the next refresh, refresh now if a new value is needed."""
+        self._plan_dirty = True
+        if any(
+            key in self._register_map.keys and key not in self._plan_keys
+            for key in (*added_keys, *_computed_inputs(added_keys))
+        ):
+            self.hass.async_create_task(self.async_request_refresh())
+
+    def _update_read_plan(self) -> None:
+        """Build the read plan and decoder for the consumed registers.
+
+        Until the first entity registers, every register is polled. Derived
+        values and energy counters consume the registers they are computed from.
+        """
+        compiled = self._register_map.compile_plan(
+            {*self._consumers, *_computed_inputs(self._consumers), *IDLE_DETECTION_KEYS}
+            if self._consumers
+            else None
+        )
+        self._registers = compiled.registers
+        self._read_plan = compiled.plan
+        self._key_blocks = {
+            ri.unique_id: self._read_plan.locate(ri.address, ri.count)[0] for ri in self._registers
+        }
+        self._heartbeat_blocks = {
+            self._key_blocks[ri.unique_id] for ri in self._registers if ri.heartbeat
+        }
+        self._critical_blocks = {
+            self._key_blocks[ri.unique_id] for ri in self._registers if ri.unique_id in CRITICAL_KEYS
+        }
+        # Values read with a block of a faster tier, by their own tier
+        self._early_keys: dict[str, list[str]] = {}
+        for ri in self._registers:
+            if self._read_plan.blocks[self._key_blocks[ri.unique_id]].tier != ri.poll_tier:
+                self._early_keys.setdefault(ri.poll_tier, []).append(ri.unique_id)
+        self._decoder = compiled.decoder
+        self._block_statistics = [BlockStatistics() for _block in self._read_plan.blocks]
+        self._plan_keys = {ri.unique_id for ri in self._registers}
+        self._aggregated_keys = tuple(ri.unique_id for ri in self._registers if is_aggregated(ri))
+        self._plan_dirty = False
+        # The segments of the old plan do not carry over, read every tier.
+        self._tier_last_read.clear()
+        _LOGGER.debug("Read plan for %s: %s", self._ip_address, self._read_plan.as_dict())
 
-        except ModbusException as e:
-            _LOGGER.error("Modbus error: %s", e)
+    async def _async_update_data(self):
+        """Fetch data from API endpoint.
 
-        finally:
-            client.close()
+        This is the place to pre-process the data to lookup tables
+        so entities can quickly look up their data.
+        """
 
-        return data
+        if self._plan_dirty:
+            self._update_read_plan()
 
-    async def async_set_min_soc(self, value: float) -> None:
-        """set minimum soc"""
-        _LOGGER.warning("InverterCoordinator async_set_min_soc")
+        previous = self.data
+        # The first refresh only reads the critical blocks within a tight timeout
+        first_refresh = previous is None
+        if self._phase_shift:
+            # The shifted poll has started, the following ones keep its offset.
+            self.update_interval -= timedelta(seconds=self._phase_shift)
+            self._phase_shift = 0.0
 
-        client = AsyncModbusTcpClient(
-            self._ip_address, port=1502
-        )  # IP-Adresse und Port des Inverters
+        data = {
+            "inverter_state": previous["inverter_state"] if previous else 18,
+            "registers": RegisterStore(self._read_plan, previous["registers"] if previous else None),
+        }
 
-        try:
-            connection = await client.connect()
-            if connection:
-                registers = client.convert_to_registers(
-                    value=value, data_type=client.DATATYPE.FLOAT32
-                )
-                result = await client.write_registers(
-                    1042, values=list(reversed(registers)), device_id=71
+        started = time.perf_counter()
+        transferred = self._connection.bytes_transferred
+        now = time.monotonic()
+        if first_refresh:
+            # No tier counts as read, the next refresh reads all of them.
+            due_tiers = set()
+        elif self._idle:
+            # Tiers are only read when a write forced them or the plan changed.
+            due_tiers = {
+                tier
+                for tier in TIER_ORDER
+                if tier in self._forced_tiers or tier not in self._tier_last_read
+            }
+        else:
+            due_tiers = self._due_tiers(now)
+        self._forced_tiers.clear()
+        due_blocks = [
+            (block_index, block)
+            for block_index, block in enumerate(self._read_plan.blocks)
+            if block.tier in due_tiers
+            or (self._idle and block_index in self._heartbeat_blocks)
+            or (first_refresh and block_index in self._critical_blocks)
+        ]
+
+        suspended = not self._connection.ready
+        if suspended:
+            # The inverter is unreachable, keep the last good values instead
+            # of waiting for timeouts until the backoff elapsed.
+            _LOGGER.debug(
+                "Skipping poll of %s, retrying in %.0f s",
+                self._ip_address,
+                self._connection.breaker.retry_in(),
+            )
+            results = [ConnectionException("Connection suspended")] * len(due_blocks)
+        else:
+            # All due blocks are requested at once, the connection pipelines
+            # them up to its in-flight limit. Results are applied only after
+            # every block has answered so the snapshot is consistent.
+            results = await self._manager.async_run_poll(
+                lambda: self._async_read_blocks(
+                    due_blocks, FIRST_REFRESH_TIMEOUT if first_refresh else None
                 )
-                if result.isError():
-                    _LOGGER.error("Error writing registers")
+            )
 
+        connection_failed = False
+        failed_tiers = set()
+        for (block_index, block), result in zip(due_blocks, results):
+            if not isinstance(result, BaseException):
+                data["registers"].set_block(block_index, result, now)
+                continue
+
+            data["registers"].set_failed(block_index, now)
+            failed_tiers.add(block.tier)
+            if isinstance(result, ModbusResponseError):
+                _LOGGER.error("%s", result)
+            elif isinstance(result, ConnectionException):
+                connection_failed = True
+            elif isinstance(result, ModbusException):
+                _LOGGER.error("Modbus error: %s", result)
             else:
-                _LOGGER.error("Connection failed")
-
-        except ModbusException as e:
-            _LOGGER.error("Modbus error: %s", e)
-
-        finally:
-            client.close()
+                raise result
+
+        for tier in due_tiers - failed_tiers:
+            self._tier_last_read[tier] = now
+
+        if self._trace_recorder is not None and not suspended:
+            timestamp = time.time()
+            for (_block_index, block), result in zip(due_blocks, results):
+                self._trace_recorder.async_record(
+                    timestamp,
+                    block.address,
+                    block.count,
+                    None if isinstance(result, BaseException) else result,
+                )
 
-    async def async_set_float_value(self, address: int, value: float) -> None:
-        """Set Float Value"""
+        if connection_failed and not suspended:
+            _LOGGER.error("Connection failed")
+
+        # Decode every value once per refresh, entities only look them up.
+        # Values of blocks that kept failing for longer than the staleness
+        # TTL are left out, their entities become unavailable.
+        decode_started = time.perf_counter()
+        store = data["registers"]
+        stale_blocks = {
+            block_index
+            for block_index in range(len(self._read_plan.blocks))
+            if store.failing_for(block_index, now) > self._stale_ttl
+        }
+        values = self._decoder.decode(store, stale_blocks)
+        if previous is not None:
+            self._hold_early_values(values, previous["values"], due_tiers)
+        derive_values(values)
+        if self._integrate_energy(store, values):
+            self._energy_store.async_delay_save(self._energy_data, ENERGY_SAVE_DELAY)
+        values.update(self._energy.totals)
+        for key in self._aggregated_keys:
+            self._aggregator.add(key, values.get(key), store.read_at(self._key_blocks[key]))
+        self._aggregator.roll(now)
+        data["aggregates"] = self._aggregator.published
+        data["values"] = MappingProxyType(values)
+
+        # Inverter State
+        if 56 in store and "inverter_state_sensor" in values:
+            data["inverter_state"] = values["inverter_state_sensor"]
+
+        self._update_idle(store, values)
+        if not first_refresh:
+            self._startup_complete = True
+            if self._phase_delay:
+                # Schedule the next poll later once instead of waiting in here,
+                # refreshes requested in between are not held up by the offset.
+                self._phase_shift, self._phase_delay = self._phase_delay, 0.0
+                self.update_interval += timedelta(seconds=self._phase_shift)
+
+        finished = time.perf_counter()
+        self._cycle_statistics.record(
+            finished - started,
+            0 if suspended else len(due_blocks),
+            self._connection.bytes_transferred - transferred,
+            finished - decode_started,
+        )
+        return data
 
-        client = AsyncModbusTcpClient(
-            self._ip_address, port=1502
-        )  # IP-Adresse und Port des Inverters
+    async def _async_read_blocks(
+        self, due_blocks: list[tuple[int, ReadBlock]], timeout: float | None
+    ) -> list[array | BaseException]:
+        """Read `due_blocks` at once, return the registers or the error per block.
 
+        Reads still outstanding after `timeout` seconds are cancelled and
+        count as failed.
+        """
+        reads = [
+            self._async_read_block(block_index, block) for block_index, block in due_blocks
+        ]
+        if timeout is None:
+            return await asyncio.gather(*reads, return_exceptions=True)
+
+        tasks = [asyncio.ensure_future(read) for read in reads]
+        _done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        return [
+            ModbusIOException(f"No response within {timeout} s")
+            if task in pending
+            else task.exception() or task.result()
+            for task in tasks
+        ]
+
+    async def _async_read_block(self, block_index: int, block: ReadBlock) -> array:
+        """Read block number `block_index` and record its latency and outcome."""
+        started = time.perf_counter()
         try:
-            connection = await client.connect()
-            if connection:
-                registers = client.convert_to_registers(
-                    value=value, data_type=client.DATATYPE.FLOAT32
-                )
-                result = await client.write_registers(
-                    address, values=list(reversed(registers)), device_id=71
-                )
-                if result.isError():
-                    _LOGGER.error("Error writing registers")
-
-            else:
-                _LOGGER.error("Connection failed")
+            registers = await self._connection.async_read_holding_registers(
+                block.address,
+                block.count,
+                PRIORITY_FAST if block.tier == POLL_TIER_FAST else PRIORITY_BACKGROUND,
+                self._unit_id,
+            )
+        except ModbusException as err:
+            self._block_statistics[block_index].record(time.perf_counter() - started, err)
+            raise
+
+        self._block_statistics[block_index].record(time.perf_counter() - started)
+        return registers
+
+    def as_diagnostics(self) -> dict:
+        """Return the read plan, the last raw blocks and the poll metrics."""
+        now = time.monotonic()
+        store = self.data["registers"] if self.data else None
+        blocks = []
+        for block_index, block in enumerate(self._read_plan.blocks):
+            info = {
+                "address": block.address,
+                "count": block.count,
+                "wasted": block.wasted,
+                "tier": block.tier,
+                "heartbeat": block.heartbeat,
+                **self._block_statistics[block_index].as_dict(),
+            }
+            if store is not None:
+                segment = store.segment(block_index)
+                age = store.age(block_index, now)
+                info["age"] = None if age is None else round(age, 1)
+                info["failing_for"] = round(store.failing_for(block_index, now), 1)
+                info["registers"] = None if segment is None else segment.tolist()
+            blocks.append(info)
 
-        except ModbusException as e:
-            _LOGGER.error("Modbus error: %s", e, exc_info=True)
+        return {
+            "unit_id": self._unit_id,
+            "idle": self._idle,
+            "update_interval": self.update_interval.total_seconds(),
+            "tier_intervals": self._tier_intervals,
+            "stale_ttl": self._stale_ttl,
+            "aggregate_window": self._aggregator.window,
+            "consumed_values": sorted(self._consumers),
+            "read_plan": {
+                "max_gap": self._read_plan.max_gap,
+                "requests": self._read_plan.requests,
+                "registers": self._read_plan.registers,
+                "wasted": self._read_plan.wasted,
+            },
+            "blocks": blocks,
+            "cycle": self._cycle_statistics.as_dict(),
+            "connection": self._connection.as_dict(),
+            "phase_offset": ConnectionManager.phase_offset(
+                self._phase_slot, self._tier_intervals[POLL_TIER_FAST]
+            ),
+            "site": self._manager.as_dict(),
+        }
 
-        finally:
-            client.close()
+    async def async_load_energy(self) -> None:
+        """Restore the energy counters saved before the last restart."""
+        stored = await self._energy_store.async_load()
+        if stored:
+            self._energy = EnergyIntegrator(INTEGRATED_ENERGIES, ENERGY_MAX_GAP, stored["totals"])
 
+    def _energy_data(self) -> dict:
+        """Return the energy counters to save."""
+        return {"totals": dict(self._energy.totals)}
 
+    def _integrate_energy(self, store: RegisterStore, values: dict) -> bool:
+        """Add the power values of this refresh to the energy counters.
 
-    def read_float32(self, address: int) -> float:
+        A power value is sampled at the time its oldest register was read, so
+        values not read again add nothing. Returns True if a counter changed.
         """
-        Read Float32 value from registers
-
-        :param address: The starting address of the registers
-        :type address: int
-        :return: The Float32 value read from the registers
-        :rtype: float
+        changed = False
+        for source in self._energy.sources:
+            read_at = [
+                store.read_at(self._key_blocks[key]) if key in self._key_blocks else None
+                for key in SOURCE_INPUTS[source]
+            ]
+            if None in read_at:
+                # Not polled, e.g. while its sensor is disabled
+                self._energy.add_sample(source, None, 0.0)
+                continue
+            changed |= self._energy.add_sample(source, values.get(source), min(read_at))
+        return changed
+
+    def _hold_early_values(self, values: dict, previous_values, due_tiers: set[str]) -> None:
+        """Keep the last values read with a faster block until their own tier is due.
+
+        Values of stale blocks stay left out.
         """
-        return AsyncModbusTcpClient.convert_from_registers(
-            registers=list(reversed(self.data["registers"][address : address + 2])),
-            data_type=AsyncModbusTcpClient.DATATYPE.FLOAT32,
+        for tier, keys in self._early_keys.items():
+            if tier in due_tiers:
+                continue
+            for key in keys:
+                if key in values and key in previous_values:
+                    values[key] = previous_values[key]
+
+    def _update_idle(self, store: RegisterStore, values: dict) -> None:
+        """Switch between full polling and the heartbeat of an idle inverter.
+
+        The inverter is idle while it is off, in standby or shut down and
+        gets no DC power. Any change of that brings back full polling with
+        the next refresh.
+        """
+        idle = (
+            56 in store
+            and 100 in store
+            and values.get("inverter_state_sensor") in IDLE_INVERTER_STATES
+            and abs(values.get("total_dc_power", 0.0)) < IDLE_DC_POWER_THRESHOLD
         )
+        if idle == self._idle:
+            return
+
+        self._idle = idle
+        if idle:
+            _LOGGER.info(
+                "Inverter %s is idle, polling the heartbeat every %s s",
+                self._ip_address,
+                IDLE_POLL_INTERVAL,
+            )
+            self.update_interval = timedelta(seconds=IDLE_POLL_INTERVAL)
+        else:
+            _LOGGER.info("Inverter %s is active, resuming full polling", self._ip_address)
+            self.update_interval = timedelta(seconds=self._tier_intervals[POLL_TIER_FAST])
+
+    def _due_tiers(self, now: float) -> set[str]:
+        """Return the poll tiers whose interval has elapsed."""
+        # Allow half a poll interval of slack so a tier is not pushed to the
+        # next cycle by scheduling jitter.
+        slack = self.update_interval.total_seconds() / 2
+        return {
+            tier
+            for tier, interval in self._tier_intervals.items()
+            if tier in self._forced_tiers
+            or tier not in self._tier_last_read
+            or now - self._tier_last_read[tier] + slack >= interval
+        }
 
-    def read_int16(self, address: int) -> int:
-        """
-        Read Int16 value from registers
+    async def async_shutdown(self) -> None:
+        """Cancel refreshes, send pending writes, close the connection and flush the trace.
 
-        :param address: The starting address of the registers
-        :type address: int
-        :return: The Int16 value read from the registers
-        :rtype: int
+        Home Assistant calls this when the config entry unloads; further calls
+        do nothing, so a connection shared with other entries is released once.
         """
-        return AsyncModbusTcpClient.convert_from_registers(
-            registers=list(self.data["registers"][address : address + 1]),
-            data_type=AsyncModbusTcpClient.DATATYPE.INT16,
-        )
+        await super().async_shutdown()
+        if self._shut_down:
+            return
+        self._shut_down = True
+        await self._write_coalescer.async_flush()
+        if self._owns_connection:
+            await self._connection.async_close()
+        else:
+            await self._manager.async_release(self._connection)
+        self._manager.release_phase(self._phase_slot)
+        if self._trace_recorder is not None:
+            await self._trace_recorder.async_flush()
+        await self._energy_store.async_save(self._energy_data())
 
-    def read_uint16(self, address: int) -> int:
-        """
-        Read UInt16 value from registers
+    async def async_set_float_value(self, address: int, value: float) -> None:
+        """Set Float Value
 
-        :param address: The starting address of the registers
-        :type address: int
-        :return: The UInt16 value read from the registers
-        :rtype: int
+        The write is debounced, only the last value set within the quiet
+        period is sent to the inverter.
         """
-        return AsyncModbusTcpClient.convert_from_registers(
-            registers=list(self.data["registers"][address : address + 1]),
-            data_type=AsyncModbusTcpClient.DATATYPE.UINT16,
-        )
 
+        self._write_coalescer.async_queue(address, encode_value(value, "Float"))
 
-    def read_int32(self, address: int) -> int:
-        """
-        Read Int32 value from registers
+    async def _async_write_batch(self, writes: list[tuple[int, list[int]]]) -> None:
+        """Send coalesced writes and read the written registers back."""
+        written = False
+        for address, values in writes:
+            try:
+                await self._connection.async_write_registers(
+                    address, values, unit_id=self._unit_id
+                )
 
-        :param address: The starting address of the registers
-        :type address: int
-        :return: The Int32 value read from the registers
-        :rtype: int
-        """
-        return AsyncModbusTcpClient.convert_from_registers(
-            registers=list(reversed(self.data["registers"][address : address + 2])),
-            data_type=AsyncModbusTcpClient.DATATYPE.INT32,
-        )
+            except ModbusResponseError:
+                _LOGGER.error("Error writing registers")
+                continue
 
-    def read_uint32(self, address: int) -> int:
-        """
-        Read UInt32 value from registers
+            except ConnectionException:
+                _LOGGER.error("Connection failed")
+                continue
 
-        :param address: The starting address of the registers
-        :type address: int
-        :return: The UInt32 value read from the registers
-        :rtype: int
-        """
-        return AsyncModbusTcpClient.convert_from_registers(
-            registers=list(reversed(self.data["registers"][address : address + 2])),
-            data_type=AsyncModbusTcpClient.DATATYPE.UINT32,
-        )
\ No newline at end of file
+            except ModbusException as e:
+                _LOGGER.error("Modbus error: %s", e, exc_info=True)
+                continue
+
+            written = True
+            for register in range(address, address + len(values)):
+                location = self._read_plan.index.get(register)
+                if location is not None:
+                    self._forced_tiers.add(self._read_plan.blocks[location[0]].tier)
+
+        # Read the written registers back with the next refresh.
+        if written:
+            await self.async_request_refresh()
@@ -0,0 +1,172 @@
+"""Batch decoding of register segments into values."""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Callable, Container, Iterable
+import struct
+import sys
+
+from .read_plan import ReadPlan
+from .register_info import RegisterInfo
+from .register_store import RegisterStore
+
+# struct format per register type. Segments are decoded as little-endian
+# 16-bit words; since Kostal sends the low word of 32-bit values first, the
+# two words of a FLOAT32/U32/S32 then form one little-endian 32-bit value.
+STRUCT_FORMATS = {
+    "Float": "f",
+    "S16": "h",
+    "U16": "H",
+    "S32": "i",
+    "U32": "I",
+    "InverterState": "I",
+}
+
+_NATIVE_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def decode_words(words: Iterable[int], register_type: str):
+    """Decode the value of type `register_type` from its registers, low word first."""
+    code = STRUCT_FORMATS[register_type]
+    return struct.unpack(f"<{code}", struct.pack(f"<{struct.calcsize(code) // 2}H", *words))[0]
+
+
+def encode_value(value, register_type: str) -> list[int]:
+    """Return the registers of `value` as type `register_type`, low word first."""
+    code = STRUCT_FORMATS[register_type]
+    return list(struct.unpack(f"<{struct.calcsize(code) // 2}H", struct.pack(f"<{code}", value)))
+
+# One row per value: block number, offset in the block, register type, key,
+# whether the high word comes first and the scale factor.
+DecodeTable = tuple[tuple[int, int, str, str, bool, float], ...]
+
+
+def decode_table(plan: ReadPlan, registers: Iterable[RegisterInfo]) -> DecodeTable:
+    """Return the flat decode table of the `registers` covered by `plan`."""
+    table = []
+    for ri in registers:
+        location = plan.locate(ri.address, ri.count)
+        if location is None:
+            continue
+        block_index, offset = location
+        table.append(
+            (block_index, offset, ri.type, ri.unique_id, ri.word_order == "high_first", ri.scale)
+        )
+    return tuple(table)
+
+
+def _converter(register_type: str, high_word_first: bool, scale: float) -> Callable | None:
+    """Return the function that turns the unpacked field into the value, None if it is the value."""
+    if high_word_first and struct.calcsize(STRUCT_FORMATS[register_type]) == 4:
+        # Unpacked as 4 raw bytes, high word first, swap them into place
+        layout = struct.Struct("<" + STRUCT_FORMATS[register_type])
+        if scale == 1:
+            return lambda raw: layout.unpack(raw[2:] + raw[:2])[0]
+        return lambda raw: layout.unpack(raw[2:] + raw[:2])[0] * scale
+    if scale != 1:
+        return lambda value: value * scale
+    return None
+
+
+class BlockDecoder:
+    """Precompiled decoder for the values stored in one block.
+
+    Values are unpacked with one `struct.Struct` per layer straight from the
+    segment's memory. Fields that overlap an earlier field of the block go to
+    an extra layer, registers listed twice share one field. Scaled values and
+    32-bit values sent high word first are fixed up after unpacking.
+    """
+
+    __slots__ = ("_layers",)
+
+    def __init__(self, fields: Iterable[tuple[int, str, str, bool, float]]):
+        """Compile `(offset, register type, key, high word first, scale)` fields of one block."""
+        grouped: dict[tuple[int, str, bool, float], list[str]] = {}
+        for offset, register_type, key, high_word_first, scale in fields:
+            grouped.setdefault((offset, register_type, high_word_first, scale), []).append(key)
+
+        layers = []
+        layout: list[str] = []
+        keys: list[tuple[str, ...]] = []
+        fixups: list[tuple[int, Callable]] = []
+        cursor = 0
+        pending = sorted(grouped.items())
+        while pending:
+            overlapping = []
+            for field, field_keys in pending:
+                offset, register_type, high_word_first, scale = field
+                if offset < cursor:
+                    overlapping.append((field, field_keys))
+                    continue
+                code = STRUCT_FORMATS[register_type]
+                size = struct.calcsize(code)
+                converter = _converter(register_type, high_word_first, scale)
+                if converter is not None:
+                    fixups.append((len(keys), converter))
+                    if high_word_first and size == 4:
+                        code = "4s"
+                layout.append(f"{2 * (offset - cursor)}x{code}")
+                keys.append(tuple(field_keys))
+                cursor = offset + size // 2
+
+            layers.append((struct.Struct("<" + "".join(layout)), tuple(keys), tuple(fixups)))
+            layout, keys, fixups, cursor, pending = [], [], [], 0, overlapping
+
+        self._layers = tuple(layers)
+
+    def decode_into(self, segment: array, values: dict) -> None:
+        """Decode `segment` and add its values to `values`."""
+        if not _NATIVE_LITTLE_ENDIAN:
+            segment = array("H", segment)
+            segment.byteswap()
+
+        view = memoryview(segment).cast("B")
+        for layout, keys, fixups in self._layers:
+            fields = layout.unpack_from(view)
+            if fixups:
+                fields = list(fields)
+                for position, converter in fixups:
+                    fields[position] = converter(fields[position])
+            for field_keys, value in zip(keys, fields):
+                for key in field_keys:
+                    values[key] = value
+
+
+class SnapshotDecoder:
+    """Precompiled decoder for all values of a read plan."""
+
+    __slots__ = ("_block_decoders",)
+
+    def __init__(self, plan: ReadPlan, registers: Iterable[RegisterInfo]):
+        self._compile(decode_table(plan, registers))
+
+    @classmethod
+    def from_table(cls, table: DecodeTable) -> SnapshotDecoder:
+        """Return the decoder for a table from `decode_table`."""
+        decoder = cls.__new__(cls)
+        decoder._compile(table)
+        return decoder
+
+    def _compile(self, table: DecodeTable) -> None:
+        fields: dict[int, list[tuple[int, str, str, bool, float]]] = {}
+        for block_index, *field in table:
+            fields.setdefault(block_index, []).append(tuple(field))
+
+        self._block_decoders = tuple(
+            (block_index, BlockDecoder(block_fields))
+            for block_index, block_fields in sorted(fields.items())
+        )
+
+    def decode(self, store: RegisterStore, skip: Container[int] = ()) -> dict:
+        """Decode every value held in `store` in one pass per block.
+
+        Blocks that were never read and the block numbers in `skip` are left
+        out, their values are missing from the result rather than zero.
+        """
+        values: dict = {}
+        for block_index, block_decoder in self._block_decoders:
+            segment = store.segment(block_index)
+            if segment is not None and block_index not in skip:
+                block_decoder.decode_into(segment, values)
+        return values
@@ -0,0 +1,165 @@
+"""Power flows derived from the decoded values of one snapshot.
+
+Every derived value is computed once per refresh from register values of
+the same snapshot, so e.g. grid import and autarky never mix two polls.
+A derived value is left out while one of its inputs is missing.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+
+from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
+
+HOME_CONSUMPTION_KEYS = ("consumption_battery", "consumption_grid", "consumption_pv")
+PV_STRING_KEYS = ("power_dc_sensor_1", "power_dc_sensor_2", "power_dc_sensor_3")
+
+
+@dataclass(frozen=True, slots=True)
+class DerivedValue:
+    """Value computed from the register values `inputs` by `compute`.
+
+    `compute` may return None when the value is undefined, e.g. a ratio of
+    zero power. Like the registers, the deadband defaults to half the last
+    displayed digit; power values use the one of the fast power registers.
+    """
+
+    key: str
+    name: str
+    unit: str
+    icon: str
+    device_class: str | None
+    precision: int
+    inputs: tuple[str, ...]
+    compute: Callable[[Mapping[str, float]], float | None]
+    state_class: SensorStateClass = SensorStateClass.MEASUREMENT
+    deadband_abs: float | None = None
+    deadband_rel: float = 0.0
+
+
+def _home_consumption(values: Mapping[str, float]) -> float:
+    return sum(values[key] for key in HOME_CONSUMPTION_KEYS)
+
+
+def _grid_power(values: Mapping[str, float]) -> float:
+    """Return the power fed into the grid, negative while drawing from it."""
+    return values["total_ac_active_power"] - _home_consumption(values)
+
+
+def _pv_power(values: Mapping[str, float]) -> float:
+    return sum(values[key] for key in PV_STRING_KEYS)
+
+
+def _ratio(part: float, total: float) -> float | None:
+    """Return `part` in percent of `total`, None without a total."""
+    if total <= 0:
+        return None
+    return min(100.0, max(0.0, 100.0 * part / total))
+
+
+DERIVED_VALUES = (
+    DerivedValue(
+        "home_consumption_power",
+        "Home consumption",
+        "W",
+        "mdi:home-lightning-bolt",
+        SensorDeviceClass.POWER,
+        0,
+        HOME_CONSUMPTION_KEYS,
+        _home_consumption,
+        deadband_abs=5.0,
+        deadband_rel=0.01,
+    ),
+    DerivedValue(
+        "grid_export_power",
+        "Grid export power",
+        "W",
+        "mdi:transmission-tower",
+        SensorDeviceClass.POWER,
+        0,
+        ("total_ac_active_power", *HOME_CONSUMPTION_KEYS),
+        lambda values: max(0.0, _grid_power(values)),
+        deadband_abs=5.0,
+        deadband_rel=0.01,
+    ),
+    DerivedValue(
+        "grid_import_power",
+        "Grid import power",
+        "W",
+        "mdi:transmission-tower",
+        SensorDeviceClass.POWER,
+        0,
+        ("total_ac_active_power", *HOME_CONSUMPTION_KEYS),
+        lambda values: max(0.0, -_grid_power(values)),
+        deadband_abs=5.0,
+        deadband_rel=0.01,
+    ),
+    DerivedValue(
+        "battery_power",
+        "Battery power",
+        "W",
+        "mdi:battery-charging",
+        SensorDeviceClass.POWER,
+        0,
+        ("battery_voltage", "actual_battery_charge"),
+        # Positive while discharging, like the current
+        lambda values: values["battery_voltage"] * values["actual_battery_charge"],
+        deadband_abs=5.0,
+        deadband_rel=0.01,
+    ),
+    DerivedValue(
+        "pv_power",
+        "PV power",
+        "W",
+        "mdi:solar-power",
+        SensorDeviceClass.POWER,
+        0,
+        PV_STRING_KEYS,
+        _pv_power,
+        deadband_abs=5.0,
+        deadband_rel=0.01,
+    ),
+    DerivedValue(
+        "self_consumption_ratio",
+        "Self-consumption",
+        "%",
+        "mdi:percent",
+        None,
+        1,
+        ("total_ac_active_power", *HOME_CONSUMPTION_KEYS, *PV_STRING_KEYS),
+        lambda values: _ratio(
+            _pv_power(values) - max(0.0, _grid_power(values)), _pv_power(values)
+        ),
+        deadband_abs=0.5,
+    ),
+    DerivedValue(
+        "autarky_ratio",
+        "Autarky",
+        "%",
+        "mdi:home-percent",
+        None,
+        1,
+        ("total_ac_active_power", *HOME_CONSUMPTION_KEYS),
+        lambda values: _ratio(
+            _home_consumption(values) - max(0.0, -_grid_power(values)), _home_consumption(values)
+        ),
+        deadband_abs=0.5,
+    ),
+)
+
+_INPUTS = {derived.key: derived.inputs for derived in DERIVED_VALUES}
+
+
+def derive_values(values: dict[str, float]) -> None:
+    """Add the derived values computable from `values` to it."""
+    for derived in DERIVED_VALUES:
+        if all(key in values for key in derived.inputs):
+            result = derived.compute(values)
+            if result is not None:
+                values[derived.key] = result
+
+
+def derived_inputs(keys: Iterable[str]) -> set[str]:
+    """Return the register keys the derived values among `keys` are computed from."""
+    return {key for derived_key in keys for key in _INPUTS.get(derived_key, ())}
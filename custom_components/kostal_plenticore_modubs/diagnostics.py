@@ -0,0 +1,23 @@
+"""Diagnostics support for Kostal Plenticore Modbus."""
+
+from __future__ import annotations
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_IP_ADDRESS
+
+TO_REDACT = {CONF_IP_ADDRESS}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return diagnostics for a config entry."""
+    coordinator = entry.runtime_data.inverter_coordinator
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "coordinator": coordinator.as_diagnostics(),
+    }
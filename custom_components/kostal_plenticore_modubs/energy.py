@@ -0,0 +1,153 @@
+"""Energy counters integrated from power values at every poll.
+
+Some energy flows have no counter in the inverter. These are integrated
+from the power values of every refresh with the trapezoidal rule, not from
+the published sensor states, so deadbands and state throttling do not
+cost precision. Only the positive or only the negative part of a power
+value is integrated; when the power changes sign between two samples the
+interval is split at the interpolated zero crossing.
+
+A power value is only sampled when all of its registers were read again,
+and no energy is added across a gap longer than the maximum gap, e.g.
+while reads failed. The counters are persisted, they survive restarts.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+
+from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
+
+from .derived import derived_inputs
+
+
+@dataclass(frozen=True, slots=True)
+class IntegratedEnergy:
+    """Energy counter in Wh integrated from the power value `source`.
+
+    `sign` 1 integrates the positive part of the power, -1 the negative part.
+    The deadband defaults to the one of the energy registers.
+    """
+
+    key: str
+    name: str
+    icon: str
+    source: str
+    sign: int
+    unit: str = "Wh"
+    device_class: str | None = SensorDeviceClass.ENERGY
+    precision: int = 0
+    state_class: SensorStateClass = SensorStateClass.TOTAL_INCREASING
+    deadband_abs: float | None = None
+    deadband_rel: float = 0.0
+
+    @property
+    def inputs(self) -> tuple[str, ...]:
+        """Return the register keys the power value is read from."""
+        return tuple(derived_inputs((self.source,))) or (self.source,)
+
+
+INTEGRATED_ENERGIES = (
+    IntegratedEnergy(
+        "battery_charge_energy", "Battery charge energy", "mdi:battery-arrow-up", "battery_power", -1
+    ),
+    IntegratedEnergy(
+        "battery_discharge_energy",
+        "Battery discharge energy",
+        "mdi:battery-arrow-down",
+        "battery_power",
+        1,
+    ),
+    # The powermeter counts power drawn from the grid as positive
+    *(
+        IntegratedEnergy(
+            f"grid_export_energy_phase_{phase}",
+            f"Grid export energy phase {phase}",
+            "mdi:transmission-tower",
+            f"active_power_phase_{phase}_powermeter",
+            -1,
+        )
+        for phase in (1, 2, 3)
+    ),
+)
+
+_INPUTS = {energy.key: energy.inputs for energy in INTEGRATED_ENERGIES}
+
+# Register keys per integrated power value
+SOURCE_INPUTS = {energy.source: energy.inputs for energy in INTEGRATED_ENERGIES}
+
+
+def integrated_inputs(keys: Iterable[str]) -> set[str]:
+    """Return the register keys the energy counters among `keys` are integrated from."""
+    return {key for energy_key in keys for key in _INPUTS.get(energy_key, ())}
+
+
+def signed_area(start: float, end: float, duration: float) -> float:
+    """Return the area of the positive part of a power ramp from `start` to `end`."""
+    if start >= 0 and end >= 0:
+        return (start + end) / 2 * duration
+    if start <= 0 and end <= 0:
+        return 0.0
+    # Only the triangle up to or from the zero crossing counts
+    peak = max(start, end)
+    return peak * peak / (2 * (abs(start) + abs(end))) * duration
+
+
+class EnergyIntegrator:
+    """Trapezoidal integration of power samples into energy counters."""
+
+    def __init__(
+        self,
+        energies: Iterable[IntegratedEnergy],
+        max_gap: float,
+        totals: Mapping[str, float] | None = None,
+    ):
+        self._max_gap = max_gap
+        self._energies_by_source: dict[str, list[IntegratedEnergy]] = {}
+        for energy in energies:
+            self._energies_by_source.setdefault(energy.source, []).append(energy)
+        self._totals = {
+            energy.key: float((totals or {}).get(energy.key, 0.0))
+            for energies in self._energies_by_source.values()
+            for energy in energies
+        }
+        # Last sample per power value: time in seconds and power in W
+        self._samples: dict[str, tuple[float, float]] = {}
+
+    @property
+    def sources(self) -> Iterable[str]:
+        """Return the power values integrated."""
+        return self._energies_by_source.keys()
+
+    @property
+    def totals(self) -> dict[str, float]:
+        """Return the energy counters in Wh, by key."""
+        return self._totals
+
+    def add_sample(self, source: str, power: float | None, sampled_at: float) -> bool:
+        """Integrate up to the `power` of `source` read at `sampled_at`.
+
+        None means the power is not known, nothing is integrated until the
+        next two samples. Returns True if a counter changed.
+        """
+        if power is None or power != power:
+            self._samples.pop(source, None)
+            return False
+
+        last = self._samples.get(source)
+        if last is not None and sampled_at <= last[0]:
+            # Not read again since the last sample
+            return False
+        self._samples[source] = (sampled_at, power)
+        if last is None or sampled_at - last[0] > self._max_gap:
+            return False
+
+        duration = sampled_at - last[0]
+        changed = False
+        for energy in self._energies_by_source[source]:
+            area = signed_area(energy.sign * last[1], energy.sign * power, duration)
+            if area:
+                self._totals[energy.key] += area / 3600
+                changed = True
+        return changed
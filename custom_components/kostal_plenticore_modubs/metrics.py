@@ -0,0 +1,112 @@
+"""Cheap counters describing the poll cycles of one inverter."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+
+# Upper bounds in milliseconds of the latency histogram buckets, the last
+# bucket collects everything slower
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class LatencyHistogram:
+    """Request latencies counted into fixed buckets."""
+
+    __slots__ = ("_counts",)
+
+    def __init__(self) -> None:
+        self._counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def record(self, latency: float) -> None:
+        """Count one latency in seconds."""
+        self._counts[bisect_left(LATENCY_BUCKETS_MS, latency * 1000)] += 1
+
+    def as_dict(self) -> dict:
+        """Return the count per bucket."""
+        buckets = {f"<={bound}ms": count for bound, count in zip(LATENCY_BUCKETS_MS, self._counts)}
+        buckets[f">{LATENCY_BUCKETS_MS[-1]}ms"] = self._counts[-1]
+        return buckets
+
+
+class BlockStatistics:
+    """Outcome and latency of the reads of one block."""
+
+    __slots__ = ("requests", "errors", "latency", "last_latency", "last_error")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors: dict[str, int] = {}
+        self.latency = LatencyHistogram()
+        self.last_latency = 0.0
+        self.last_error: str | None = None
+
+    def record(self, latency: float, error: Exception | None = None) -> None:
+        """Record one read that took `latency` seconds and failed with `error`, if any."""
+        self.requests += 1
+        self.last_latency = latency
+        self.latency.record(latency)
+        if error is not None:
+            name = type(error).__name__
+            self.errors[name] = self.errors.get(name, 0) + 1
+            self.last_error = str(error)
+
+    def as_dict(self) -> dict:
+        """Return the statistics for diagnostics."""
+        return {
+            "requests": self.requests,
+            "errors": dict(self.errors),
+            "last_error": self.last_error,
+            "last_latency_ms": round(self.last_latency * 1000, 3),
+            "latency": self.latency.as_dict(),
+        }
+
+
+class CycleStatistics:
+    """Figures of the last poll cycle and totals over all cycles."""
+
+    __slots__ = (
+        "cycles",
+        "duration",
+        "requests",
+        "bytes",
+        "decode_time",
+        "total_duration",
+        "total_requests",
+        "total_bytes",
+    )
+
+    def __init__(self) -> None:
+        self.cycles = 0
+        self.duration = 0.0
+        self.requests = 0
+        self.bytes = 0
+        self.decode_time = 0.0
+        self.total_duration = 0.0
+        self.total_requests = 0
+        self.total_bytes = 0
+
+    def record(self, duration: float, requests: int, transferred: int, decode_time: float) -> None:
+        """Record one poll cycle, times in seconds."""
+        self.cycles += 1
+        self.duration = duration
+        self.requests = requests
+        self.bytes = transferred
+        self.decode_time = decode_time
+        self.total_duration += duration
+        self.total_requests += requests
+        self.total_bytes += transferred
+
+    def as_dict(self) -> dict:
+        """Return the statistics for diagnostics."""
+        return {
+            "cycles": self.cycles,
+            "duration_ms": round(self.duration * 1000, 3),
+            "mean_duration_ms": (
+                round(self.total_duration / self.cycles * 1000, 3) if self.cycles else 0.0
+            ),
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "decode_time_ms": round(self.decode_time * 1000, 3),
+            "total_requests": self.total_requests,
+            "total_bytes": self.total_bytes,
+        }
@@ -17,22 +17,15 @@ from .coordinator import (
     InverterCoordinator
 )
 
-from .const import (
-    DOMAIN,
-    CONF_IP_ADDRESS,
-    MANUFACTURER,
-    MODEL,
-    NAME
-)
-
 _LOGGER = logging.getLogger(__name__)
 
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up the number inputs from a config entry."""
     
-    ip_address = entry.data[CONF_IP_ADDRESS]
 
     inverter_coordinator = entry.runtime_data.inverter_coordinator
+    # Inverters behind one gateway share the address, the key tells them apart
+    ip_address = inverter_coordinator.device_key
     async_add_entities([
         MinimumSocNumber(inverter_coordinator, ip_address),
         MaximumSocNumber(inverter_coordinator, ip_address),
@@ -53,7 +46,6 @@ class  KostalModbusNumber(CoordinatorEntity, NumberEntity):
         self._state = None
         self._name = name
         self._unique_id = f"{property_name}_number_{ip_address.replace('.', '_')}"
-        self._device_id = f"{NAME}_{ip_address.replace('.', '_')}"
         self._property_name = property_name
         self._modbus_address = modbus_address
         self._is_scaled = is_scaled
@@ -73,20 +65,33 @@ class  KostalModbusNumber(CoordinatorEntity, NumberEntity):
     @property
     def device_info(self):
         """Get information about this device."""
-        return {
-            "identifiers": {(DOMAIN, self._device_id)},
-            "name": NAME,
-            "manufacturer": MANUFACTURER,
-            "model": MODEL,
-        }
+        return self.coordinator.device_info
 
     @property
     def scale_factor(self) -> float:
-        return 10 ** self.coordinator.read_float32(1025) if self._is_scaled else 1.0
+        """Return the factor of scaled values, from the S16 power scale factor (register 1025)."""
+        return 10 ** self.coordinator.data["values"]["power_scale_factor"] if self._is_scaled else 1.0
+
+    @property
+    def available(self) -> bool:
+        """Return False while the value or its scale factor was never read or went stale."""
+        values = self.coordinator.data["values"]
+        return (
+            super().available
+            and self._property_name in values
+            and (not self._is_scaled or "power_scale_factor" in values)
+        )
 
     @property
     def native_value(self):
-        return self.coordinator.read_float32(self._modbus_address) * self.scale_factor
+        value = self.coordinator.data["values"].get(self._property_name)
+        return None if value is None else value * self.scale_factor
+
+    async def async_added_to_hass(self) -> None:
+        """Register the consumed values when the entity is enabled."""
+        await super().async_added_to_hass()
+        keys = (self._property_name, "power_scale_factor") if self._is_scaled else (self._property_name,)
+        self.async_on_remove(self.coordinator.async_add_consumer(keys))
 
 
     @callback
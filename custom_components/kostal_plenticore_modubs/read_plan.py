@@ -0,0 +1,213 @@
+"""Compile register definitions into a minimal list of block reads."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, replace
+from functools import cached_property
+
+# Modbus limits a single read_holding_registers request to 125 registers.
+MAX_REGISTERS_PER_READ = 125
+
+
+@dataclass(frozen=True)
+class ReadBlock:
+    """One read_holding_registers request of a read plan."""
+
+    address: int
+    count: int
+    used: int
+    tier: str | None = None
+    heartbeat: bool = False
+
+    @property
+    def end(self) -> int:
+        """First address after the block."""
+        return self.address + self.count
+
+    @property
+    def wasted(self) -> int:
+        """Registers fetched by this block that no value needs."""
+        return self.count - self.used
+
+
+@dataclass(frozen=True)
+class ReadPlan:
+    """Ordered block reads covering a set of register spans."""
+
+    blocks: tuple[ReadBlock, ...]
+    max_gap: int
+
+    @property
+    def requests(self) -> int:
+        """Number of requests per poll cycle."""
+        return len(self.blocks)
+
+    @property
+    def registers(self) -> int:
+        """Number of registers transferred per poll cycle."""
+        return sum(block.count for block in self.blocks)
+
+    @property
+    def wasted(self) -> int:
+        """Number of transferred registers that no value needs."""
+        return sum(block.wasted for block in self.blocks)
+
+    @cached_property
+    def index(self) -> dict[int, tuple[int, int]]:
+        """Map every covered address to its block number and offset.
+
+        An address covered by several blocks maps to the first of them.
+        """
+        index: dict[int, tuple[int, int]] = {}
+        for block_index, block in enumerate(self.blocks):
+            for address in range(block.address, block.end):
+                index.setdefault(address, (block_index, address - block.address))
+        return index
+
+    def locate(self, address: int, count: int = 1) -> tuple[int, int] | None:
+        """Return the block number and offset of the `count` registers at `address`.
+
+        Resolves to the first block holding all of them, which is not the
+        block of the address index when a span overlaps the end of a faster
+        block. Returns None if no block holds the whole span.
+        """
+        location = self.index.get(address)
+        if location is None or location[1] + count <= self.blocks[location[0]].count:
+            return location
+        for block_index, block in enumerate(self.blocks):
+            if block.address <= address and address + count <= block.end:
+                return block_index, address - block.address
+        return None
+
+    def as_dict(self) -> dict:
+        """Return the plan in a form suitable for logging and diagnostics."""
+        return {
+            "max_gap": self.max_gap,
+            "requests": self.requests,
+            "registers": self.registers,
+            "wasted": self.wasted,
+            "blocks": [
+                {
+                    "address": b.address,
+                    "count": b.count,
+                    "wasted": b.wasted,
+                    "tier": b.tier,
+                    "heartbeat": b.heartbeat,
+                }
+                for b in self.blocks
+            ],
+        }
+
+
+def build_read_plan(
+    spans: Iterable[tuple[int, int]],
+    max_gap: int,
+    max_count: int = MAX_REGISTERS_PER_READ,
+) -> ReadPlan:
+    """Build the read plan with the fewest requests for `spans`.
+
+    Each span is an `(address, count)` pair that is never split across
+    requests, so 32-bit values always arrive in one response. Neighbouring
+    spans share a request when they are at most `max_gap` registers apart
+    and the request stays within `max_count` registers.
+    """
+    # Merge overlapping spans first, they must end up in the same request.
+    merged: list[list[int]] = []
+    for address, count in sorted(spans):
+        if merged and address < merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], address + count)
+        else:
+            merged.append([address, address + count])
+
+    blocks: list[ReadBlock] = []
+    start = end = used = None
+    for span_start, span_end in merged:
+        if span_end - span_start > max_count:
+            raise ValueError(
+                f"Register span at {span_start} exceeds {max_count} registers"
+            )
+
+        if start is not None and span_start - end <= max_gap and span_end - start <= max_count:
+            end = span_end
+            used += span_end - span_start
+            continue
+
+        if start is not None:
+            blocks.append(ReadBlock(start, end - start, used))
+        start, end, used = span_start, span_end, span_end - span_start
+
+    if start is not None:
+        blocks.append(ReadBlock(start, end - start, used))
+
+    return ReadPlan(tuple(blocks), max_gap)
+
+
+def build_tiered_read_plan(
+    spans_by_group: Mapping[tuple[str, bool], Iterable[tuple[int, int]]],
+    max_gap: int,
+    max_count: int = MAX_REGISTERS_PER_READ,
+) -> ReadPlan:
+    """Build one read plan whose blocks are tagged with a poll tier.
+
+    Spans are grouped by `(tier, heartbeat)`, groups are expected fastest
+    tier first. Every tier is planned on its own and its blocks are tagged
+    with the tier name, so a poll cycle can read just the blocks of the
+    tiers that are due. Heartbeat spans are planned apart from the others,
+    so an idle inverter is polled with a few small blocks.
+
+    A span of a slower tier that a faster block already covers is not read
+    again, and one within `max_gap` of a faster block that is no heartbeat
+    block is read with it: that costs a few registers per poll but no
+    request. Its value is still only due with its own tier. Use
+    `ReadPlan.locate` to find the block holding a span.
+    """
+    spans_by_tier: dict[str, list[tuple[int, int, bool]]] = {}
+    for (tier, heartbeat), spans in spans_by_group.items():
+        spans_by_tier.setdefault(tier, []).extend(
+            (address, count, heartbeat) for address, count in spans
+        )
+
+    blocks: list[ReadBlock] = []
+    for tier, spans in spans_by_tier.items():
+        own: list[tuple[int, int, bool]] = []
+        for address, count, heartbeat in sorted(spans):
+            position = _absorbing_block(blocks, address, count, heartbeat, max_gap, max_count)
+            if position is None:
+                own.append((address, count, heartbeat))
+                continue
+
+            block = blocks[position]
+            start = min(block.address, address)
+            stop = max(block.end, address + count)
+            blocks[position] = ReadBlock(
+                start, stop - start, block.used + count, block.tier, block.heartbeat or heartbeat
+            )
+
+        for heartbeat in (True, False):
+            group = [(address, count) for address, count, flag in own if flag == heartbeat]
+            plan = build_read_plan(group, max_gap, max_count)
+            blocks.extend(replace(block, tier=tier, heartbeat=heartbeat) for block in plan.blocks)
+
+    return ReadPlan(tuple(blocks), max_gap)
+
+
+def _absorbing_block(
+    blocks: list[ReadBlock], address: int, count: int, heartbeat: bool, max_gap: int, max_count: int
+) -> int | None:
+    """Return the position of the block that reads the span at `address` too, None if none does."""
+    end = address + count
+    for position, block in enumerate(blocks):
+        if block.address <= address and end <= block.end:
+            return position
+    if heartbeat:
+        return None
+    for position, block in enumerate(blocks):
+        if (
+            not block.heartbeat
+            and address - block.end <= max_gap
+            and block.address - end <= max_gap
+            and max(block.end, end) - min(block.address, address) <= max_count
+        ):
+            return position
+    return None
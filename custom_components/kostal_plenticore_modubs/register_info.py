@@ -1,12 +1,49 @@
+from dataclasses import dataclass
+
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorStateClass
 )
 
+from .const import POLL_TIER_NORMAL
+
+# Number of registers per data type, everything else is 32 bit wide
+REGISTER_COUNTS = {
+    "U16": 1,
+    "S16": 1,
+}
+
+
+@dataclass(frozen=True)
+class Deadband:
+    """Minimum change of a value before its entity writes a new state.
+
+    A change is significant when it exceeds the absolute deadband and the
+    relative deadband applied to the last written value. A state is written
+    anyway once `max_silence` seconds passed since the last write, None
+    means the integration default.
+    """
+
+    absolute: float = 0.0
+    relative: float = 0.0
+    max_silence: float | None = None
+
+    def is_significant(self, last, value) -> bool:
+        """Return True if the change from `last` to `value` must be written."""
+        if not isinstance(value, (int, float)) or not isinstance(last, (int, float)):
+            return value != last
+
+        delta = abs(value - last)
+        if delta != delta:
+            # NaN on one side, significant unless both are NaN
+            return (value == value) != (last == last)
+        return delta > max(self.absolute, self.relative * abs(last))
+
+
 class RegisterInfo():
     """Register Information"""
 
-    def __init__(self, address, unique_id, name, unit, type, icon, device_class, display_precision, sensor_state_class = SensorStateClass.MEASUREMENT, access = "RO"):
+    def __init__(self, address, unique_id, name, unit, type, icon, device_class, display_precision, sensor_state_class = SensorStateClass.MEASUREMENT, access = "RO", poll_tier = POLL_TIER_NORMAL, deadband_abs = None, deadband_rel = 0.0, max_silence = None, heartbeat = False, word_order = "low_first", scale = 1):
         """
         Initialize a new RegisterInfo object.
 
@@ -21,6 +58,13 @@ class RegisterInfo():
             display_precision (str): Display precision
             sensor_state_class (SensorStateClass, optional): Home Assistant sensor state class
             access (str, optional): Access mode (e.g. "RO", "RW")
+            poll_tier (str, optional): Poll tier (e.g. "fast", "normal", "slow", "static")
+            deadband_abs (float, optional): Absolute deadband, defaults to half the last displayed digit
+            deadband_rel (float, optional): Relative deadband (e.g. 0.01 for 1 %)
+            max_silence (float, optional): Seconds after which the state is written regardless of the deadband
+            heartbeat (bool, optional): Keep polling the register while the inverter is idle
+            word_order (str, optional): Word order of 32-bit values, "low_first" like Kostal or "high_first"
+            scale (float, optional): Factor the raw value is multiplied with
         """
         self._address = address
         self._unique_id = unique_id
@@ -32,6 +76,15 @@ class RegisterInfo():
         self._display_precision = display_precision
         self._access = access
         self._sensor_state_class = sensor_state_class
+        self._poll_tier = poll_tier
+        self._heartbeat = heartbeat
+        self._word_order = word_order
+        self._scale = scale
+        self._deadband = Deadband(
+            deadband_abs if deadband_abs is not None else 0.5 * 10 ** -display_precision,
+            deadband_rel,
+            max_silence,
+        )
 
     # Getter for address
     @property
@@ -62,6 +115,11 @@ class RegisterInfo():
         """Getter for type"""
         return self._type
 
+    @property
+    def count(self):
+        """Number of 16-bit registers occupied by the value"""
+        return REGISTER_COUNTS.get(self._type, 2)
+
     # Getter for icon
     @property
     def icon(self):
@@ -91,61 +149,28 @@ class RegisterInfo():
         """Getter for sensor_state_class"""
         return self._sensor_state_class
 
+    @property
+    def poll_tier(self):
+        """Getter for poll_tier"""
+        return self._poll_tier
+
+    @property
+    def heartbeat(self):
+        """Getter for heartbeat"""
+        return self._heartbeat
+
+    @property
+    def word_order(self):
+        """Getter for word_order"""
+        return self._word_order
+
+    @property
+    def scale(self):
+        """Getter for scale"""
+        return self._scale
+
+    @property
+    def deadband(self):
+        """Getter for deadband"""
+        return self._deadband
 
-REGISTERS: list[RegisterInfo] = [
-    RegisterInfo(56, "inverter_state_sensor", "Inverter State", None, "InverterState", "mdi:state-machine", None, 0),
-    RegisterInfo(98, "controller_temperature_sensor", "Controller Temperature", "°C", "Float", "mdi:thermometer", "TEMPERATURE", 1),
-    RegisterInfo(100, "total_dc_power", "Total DC power", "W", "Float", "mdi:flash", "power", 0),
-    RegisterInfo(106, "consumption_battery", "Home own consumption from battery", "W", "Float", "mdi:flash", "power", 0),
-    RegisterInfo(108, "consumption_grid", "Home own consumption from grid", "W", "Float", "mdi:flash", "power", 0),
-    RegisterInfo(116, "consumption_pv", "Home own consumption from PV", "W", "Float", "mdi:flash", "power", 0),
-    RegisterInfo(110, "consumption_battery_total", " Total home consumption Battery", "Wh", "Float", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(112, "consumption_grid_total", " Total home consumption Grid", "Wh", "Float", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(114, "consumption_pv_total", " Total home consumption PV", "Wh", "Float", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(118, "consumption_total", "Total home consumption", "Wh", "Float", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(118, "worktime", "Worktime", "s", "Float", "mdi:timer", "duration", 0, SensorStateClass.TOTAL),
-    RegisterInfo(156, "active_power_phase_1", "Active power Phase 1", "W", "Float", "mdi:flash", "power", 0),
-    RegisterInfo(162, "active_power_phase_2", "Active power Phase 2", "W", "Float", "mdi:flash", "power", 0),
-    RegisterInfo(170, "active_power_phase_3", "Active power Phase 3", "W", "Float", "mdi:flash", "power", 0),
-    RegisterInfo(172, "total_ac_active_power", "Total AC active power", "W", "Float", "mdi:flash", "power", 0),
-    RegisterInfo(194, "number_battery_cycles", "Number of battery cycles", None, "Float", "mdi:counter", None, 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(200, "actual_battery_charge", "Actual battery charge", "A", "Float", "mdi:current-dc", "current", 2),
-    RegisterInfo(210, "act_state_of_charge", "Act. state of charge", "%", "Float", "mdi:battery", "BATTERY", 0),
-    RegisterInfo(214, "battery_temperature", "Battery Temperature", "°C", "Float", "mdi:thermometer", "TEMPERATURE", 1),
-    RegisterInfo(216, "battery_voltage", "Battery voltage", "V", "Float", "mdi:sine-wave", "voltage", 0),
-    RegisterInfo(224, "active_power_phase_1_powermeter", "Active power phase 1 (powermeter)", "W", "Float", "mdi:flash", "power", 0),
-    RegisterInfo(234, "active_power_phase_2_powermeter", "Active power phase 2 (powermeter)", "W", "Float", "mdi:flash", "power", 0),
-    RegisterInfo(244, "active_power_phase_3_powermeter", "Active power phase 3 (powermeter)", "W", "Float", "mdi:flash", "power", 0),
-    RegisterInfo(252, "total_active_power_powermeter", "Total active power (powermeter)", "W", "Float", "mdi:flash", "power", 0),
-    RegisterInfo(258, "current_dc_sensor_1", "Current DC 1", "A", "Float", "mdi:current-dc", "current", 2),
-    RegisterInfo(260, "power_dc_sensor_1", "Power DC 1", "W", "Float", "mdi:flash", "power", 0),
-    RegisterInfo(266, "voltage_dc_sensor_1", "Voltage DC 1", "V", "Float", "mdi:sine-wave", "voltage", 0),
-    RegisterInfo(268, "current_dc_sensor_2", "Current DC 2", "A", "Float", "mdi:current-dc", "current", 2),
-    RegisterInfo(270, "power_dc_sensor_2", "Power DC 2", "W", "Float", "mdi:flash", "power", 0),
-    RegisterInfo(276, "voltage_dc_sensor_2", "Voltage DC 2", "V", "Float", "mdi:sine-wave", "voltage", 0),
-    RegisterInfo(278, "current_dc_sensor_3", "Current DC 3", "A", "Float", "mdi:current-dc", "current", 2),
-    RegisterInfo(280, "power_dc_sensor_3", "Power DC 3", "W", "Float", "mdi:flash", "power", 0),
-    RegisterInfo(286, "voltage_dc_sensor_3", "Voltage DC 3", "V", "Float", "mdi:sine-wave", "voltage", 0),
-    RegisterInfo(320, "total_yield", " Total yield", "Wh", "Float", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(322, "daily_yield", " Daily yield", "Wh", "Float", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(324, "yearly_yield", " Yearly yield", "Wh", "Float", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(326, "monthly_yield", " Monthly yield", "Wh", "Float", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(514, "battery_actual_soc", "Battery actual SOC", "%", "U16", "mdi:battery", "BATTERY", 0),
-    RegisterInfo(1025, "power_scale_factor", "Power Scale Factor", None, "S16", "mdi:function-variant", None, 0),
-    RegisterInfo(1068, "battery_work_capacity_sensor", "Battery work capacity", "Wh", "Float", "mdi:battery", "energy_storage", 0),
-    RegisterInfo(1076, "max_charge_power_sensor", "Maximum Charge Power", "W", "Float", "mdi:battery-charging-90", "power", 0),
-    RegisterInfo(1078, "max_discharge_power_sensor", "Maximum Discharge Power", "W", "Float", "mdi:battery-charging-10", "power", 0),
-    RegisterInfo(1046, "total_dc_charge_energy_dc_to_battery", "Total DC charge energy (DC-side to battery)", "Wh", "Float", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(1048, "total_dc_discharge_energy_dc_from_battery", "Total DC discharge energy (DC-side from battery)", "Wh", "Float", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(1050, "total_ac_charge_energy_ac_to_battery", "Total AC charge energy (AC-side to battery)", "Wh", "Float", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(1052, "total_ac_discharge_energy_battery_to_grid", "Total AC discharge energy (battery to grid)", "Wh", "Float", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(1054, "total_ac_charge_energy_grid_to_battery", "Total AC charge energy (grid to battery)", "Wh", "Float", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(1056, "total_dc_pv_energy_sum_all_pv_inputs", "Total DC PV energy (sum of all PV inputs)", "Wh", "Float", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(1058, "total_dc_energy_from_pv1", "Total DC energy from PV1", "Wh", "Float", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(1060, "total_dc_energy_from_pv2", "Total DC energy from PV2", "Wh", "Float", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(1062, "total_dc_energy_from_pv3", "Total DC energy from PV3", "Wh", "Float", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(1064, "total_energy_ac_side_to_grid", "Total energy AC-side to grid", "Wh", "Float", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(1066, "total_dc_power_sum_of_all_pv_inputs", "Total DC power (sum of all PV inputs)", "W", "Float", "mdi:flash", "power", 0),
-    RegisterInfo(40346, "total_real_energy_exported", "Total Real Energy Exported", "Wh", "U32", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-    RegisterInfo(40354, "total_real_energy_imported", "Total Real Energy Imported", "Wh", "U32", "mdi:flash", "energy", 0, SensorStateClass.TOTAL_INCREASING),
-]
@@ -0,0 +1,314 @@
+"""Register map of the inverter, compiled from registers.json.
+
+Every entry of `registers` and `control_registers` describes one value:
+
+    address       first register of the value
+    key           unique id of the value and its entity
+    name          entity name
+    type          Float, S16, U16, S32, U32 or InverterState
+    unit          unit of measurement, default none
+    icon          entity icon
+    device_class  Home Assistant device class, default none
+    precision     suggested display precision, default 0
+    state_class   measurement, total or total_increasing, default measurement
+    access        RO or RW, default RO
+    tier          poll tier, default normal
+    word_order    low_first like Kostal or high_first, default low_first
+    scale         factor the raw value is multiplied with, default 1
+    deadband_abs  absolute deadband, default half the last displayed digit
+    deadband_rel  relative deadband, default 0
+    max_silence   seconds after which the state is written anyway
+    heartbeat     keep polling the value while the inverter is idle
+
+The file is compiled into the register definitions, the read plan of all
+registers and its flat decode table. The result is kept in memory and in
+`__pycache__`, both keyed by the hash of the file and of the compiler
+settings, so reloads and restarts only compile it again after either of
+them changed.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Collection
+from dataclasses import dataclass
+import hashlib
+import json
+import logging
+import marshal
+import os
+import sys
+
+from homeassistant.components.sensor import SensorStateClass
+
+from .const import POLL_TIER_INTERVALS, POLL_TIER_NORMAL, READ_PLAN_MAX_GAP
+from .decoder import STRUCT_FORMATS, DecodeTable, SnapshotDecoder, decode_table
+from .read_plan import MAX_REGISTERS_PER_READ, ReadBlock, ReadPlan, build_tiered_read_plan
+from .register_info import RegisterInfo
+
+_LOGGER = logging.getLogger(__name__)
+
+REGISTER_MAP_PATH = os.path.join(os.path.dirname(__file__), "registers.json")
+MANIFEST_PATH = os.path.join(os.path.dirname(__file__), "manifest.json")
+
+# Bump when the compiled form changes, older caches are then ignored. The
+# version of the integration and the read plan settings are part of the key.
+CACHE_VERSION = 3
+
+# Poll tiers, fastest first
+TIER_ORDER = tuple(POLL_TIER_INTERVALS)
+
+WORD_ORDERS = ("low_first", "high_first")
+
+# Compiled plans kept per register map for the sets of consumed values
+MAX_CACHED_PLANS = 8
+
+# Fields of a register entry in the order RegisterInfo takes them, with defaults
+_FIELDS = (
+    ("address", None),
+    ("key", None),
+    ("name", None),
+    ("unit", None),
+    ("type", None),
+    ("icon", None),
+    ("device_class", None),
+    ("precision", 0),
+    ("state_class", SensorStateClass.MEASUREMENT.value),
+    ("access", "RO"),
+    ("tier", POLL_TIER_NORMAL),
+    ("deadband_abs", None),
+    ("deadband_rel", 0.0),
+    ("max_silence", None),
+    ("heartbeat", False),
+    ("word_order", "low_first"),
+    ("scale", 1),
+)
+_REQUIRED_FIELDS = frozenset(("address", "key", "name", "type"))
+
+_LOADED: dict[str, RegisterMap] = {}
+
+
+def build_read_plan_for(registers) -> ReadPlan:
+    """Build the tiered read plan for `registers`.
+
+    A span listed by several registers is polled in the fastest of their
+    tiers, and kept in the heartbeat if any of them is a heartbeat register.
+    Slower spans next to faster blocks are read with them and heartbeat spans
+    get blocks of their own, see build_tiered_read_plan.
+    """
+    span_tiers = {}
+    heartbeat_spans = set()
+    for ri in registers:
+        span = (ri.address, ri.count)
+        tier = span_tiers.get(span)
+        if tier is None or TIER_ORDER.index(ri.poll_tier) < TIER_ORDER.index(tier):
+            span_tiers[span] = ri.poll_tier
+        if ri.heartbeat:
+            heartbeat_spans.add(span)
+
+    return build_tiered_read_plan(
+        {
+            (tier, heartbeat): [
+                span
+                for span, span_tier in span_tiers.items()
+                if span_tier == tier and (span in heartbeat_spans) == heartbeat
+            ]
+            for tier in TIER_ORDER
+            for heartbeat in (True, False)
+        },
+        READ_PLAN_MAX_GAP,
+    )
+
+
+@dataclass(frozen=True)
+class CompiledPlan:
+    """Read plan and decoder for a set of registers."""
+
+    registers: tuple[RegisterInfo, ...]
+    plan: ReadPlan
+    decoder: SnapshotDecoder
+
+
+class RegisterMap:
+    """Compiled register map.
+
+    Plans for subsets of the registers are compiled on first use and shared
+    by every coordinator, they are immutable.
+    """
+
+    def __init__(
+        self,
+        digest: str,
+        registers: tuple[RegisterInfo, ...],
+        control_registers: tuple[RegisterInfo, ...],
+        plan: ReadPlan,
+        table: DecodeTable,
+    ):
+        self.digest = digest
+        self.registers = registers
+        self.control_registers = control_registers
+        self.all_registers = registers + control_registers
+        self.keys = frozenset(ri.unique_id for ri in self.all_registers)
+        self._plans: dict[frozenset[str] | None, CompiledPlan] = {
+            None: CompiledPlan(self.all_registers, plan, SnapshotDecoder.from_table(table))
+        }
+
+    def compile_plan(self, keys: Collection[str] | None = None) -> CompiledPlan:
+        """Return the plan for the registers of `keys`, all registers for None."""
+        cache_key = None if keys is None else frozenset(keys) & self.keys
+        compiled = self._plans.get(cache_key)
+        if compiled is not None:
+            return compiled
+
+        registers = tuple(ri for ri in self.all_registers if ri.unique_id in cache_key)
+        plan = build_read_plan_for(registers)
+        if len(self._plans) > MAX_CACHED_PLANS:
+            # Drop the oldest subset, the plan of all registers stays first
+            del self._plans[next(key for key in self._plans if key is not None)]
+        compiled = self._plans[cache_key] = CompiledPlan(
+            registers, plan, SnapshotDecoder(plan, registers)
+        )
+        return compiled
+
+
+def load_register_map(path: str = REGISTER_MAP_PATH) -> RegisterMap:
+    """Return the compiled register map of `path`.
+
+    Reads the file, does blocking I/O.
+    """
+    with open(path, "rb") as file:
+        source = file.read()
+    digest = hashlib.sha256(source + _compiler_inputs()).hexdigest()
+    register_map = _LOADED.get(digest)
+    if register_map is not None:
+        return register_map
+
+    cache_path = os.path.join(
+        os.path.dirname(path),
+        "__pycache__",
+        f"{os.path.basename(path)}.{sys.implementation.cache_tag}.{digest[:16]}.marshal",
+    )
+    compiled = _read_cache(cache_path)
+    if compiled is None:
+        compiled = compile_register_map(json.loads(source))
+        _write_cache(cache_path, compiled)
+    else:
+        _LOGGER.debug("Loaded compiled register map from %s", cache_path)
+
+    registers = tuple(_register_info(row) for row in compiled["registers"])
+    control_registers = tuple(_register_info(row) for row in compiled["control_registers"])
+    plan = ReadPlan(tuple(ReadBlock(*block) for block in compiled["blocks"]), compiled["max_gap"])
+    register_map = _LOADED[digest] = RegisterMap(
+        digest, registers, control_registers, plan, compiled["table"]
+    )
+    return register_map
+
+
+def _compiler_inputs() -> bytes:
+    """Return the settings besides the file that the compiled register map depends on."""
+    with open(MANIFEST_PATH, "rb") as file:
+        version = json.load(file)["version"]
+    return repr(
+        (
+            CACHE_VERSION,
+            version,
+            READ_PLAN_MAX_GAP,
+            MAX_REGISTERS_PER_READ,
+            TIER_ORDER,
+            WORD_ORDERS,
+            _FIELDS,
+            STRUCT_FORMATS,
+        )
+    ).encode()
+
+
+def compile_register_map(document: dict) -> dict:
+    """Compile a parsed register map into plain data that marshal can store."""
+    rows = {
+        section: tuple(
+            _normalize(entry, f"{section}[{position}]")
+            for position, entry in enumerate(document.get(section, ()))
+        )
+        for section in ("registers", "control_registers")
+    }
+    all_rows = rows["registers"] + rows["control_registers"]
+    keys = [row[1] for row in all_rows]
+    duplicates = sorted({key for key in keys if keys.count(key) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate register keys: {', '.join(duplicates)}")
+
+    registers = [_register_info(row) for row in all_rows]
+    plan = build_read_plan_for(registers)
+    return {
+        **rows,
+        "blocks": tuple(
+            (block.address, block.count, block.used, block.tier, block.heartbeat)
+            for block in plan.blocks
+        ),
+        "max_gap": plan.max_gap,
+        "table": decode_table(plan, registers),
+    }
+
+
+def _normalize(entry: dict, where: str) -> tuple:
+    """Return `entry` as a tuple of all fields, defaults filled in."""
+    unknown = set(entry) - {name for name, _default in _FIELDS}
+    if unknown:
+        raise ValueError(f"{where}: unknown fields {', '.join(sorted(unknown))}")
+    missing = _REQUIRED_FIELDS - set(entry)
+    if missing:
+        raise ValueError(f"{where}: missing fields {', '.join(sorted(missing))}")
+
+    row = {name: entry.get(name, default) for name, default in _FIELDS}
+    if row["type"] not in STRUCT_FORMATS:
+        raise ValueError(f"{where}: unknown type {row['type']}")
+    if row["tier"] not in TIER_ORDER:
+        raise ValueError(f"{where}: unknown poll tier {row['tier']}")
+    if row["word_order"] not in WORD_ORDERS:
+        raise ValueError(f"{where}: unknown word order {row['word_order']}")
+    if row["access"] not in ("RO", "RW"):
+        raise ValueError(f"{where}: unknown access {row['access']}")
+    SensorStateClass(row["state_class"])
+    return tuple(row.values())
+
+
+def _register_info(row: tuple) -> RegisterInfo:
+    """Return the RegisterInfo of a row from `_normalize`."""
+    (
+        address, key, name, unit, register_type, icon, device_class, precision,
+        state_class, access, tier, deadband_abs, deadband_rel, max_silence,
+        heartbeat, word_order, scale,
+    ) = row
+    return RegisterInfo(
+        address, key, name, unit, register_type, icon, device_class, precision,
+        SensorStateClass(state_class), access, tier, deadband_abs, deadband_rel,
+        max_silence, heartbeat, word_order, scale,
+    )
+
+
+def _read_cache(cache_path: str) -> dict | None:
+    """Return the compiled register map stored at `cache_path`, None if unusable."""
+    try:
+        with open(cache_path, "rb") as file:
+            # marshal.load() reads the file in tiny chunks, read it at once
+            compiled = marshal.loads(file.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    return compiled if isinstance(compiled, dict) else None
+
+
+def _write_cache(cache_path: str, compiled: dict) -> None:
+    """Store `compiled` at `cache_path` and drop caches of older versions of the file."""
+    directory, name = os.path.split(cache_path)
+    prefix = name.rsplit(".", 2)[0] + "."
+    temporary = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(temporary, "wb") as file:
+            file.write(marshal.dumps(compiled))
+        os.replace(temporary, cache_path)
+        for stale in os.listdir(directory):
+            if stale.startswith(prefix) and stale.endswith(".marshal") and stale != name:
+                os.remove(os.path.join(directory, stale))
+    except OSError as err:
+        # A read-only installation compiles on every start, that is all
+        _LOGGER.debug("Could not cache compiled register map: %s", err)
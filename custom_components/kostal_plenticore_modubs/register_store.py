@@ -0,0 +1,106 @@
+"""Compact storage for the holding registers fetched in a poll cycle."""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Sequence
+import time
+
+from .read_plan import ReadPlan
+
+
+class RegisterStore:
+    """Sparse register image made of one segment per block of a read plan.
+
+    Each block that was read successfully is kept as an `array('H')`
+    segment. Addresses are resolved through the plan's address index, so
+    lookups are O(1). Registers that were not read, either because no block
+    covers them or because the block failed, read as zero.
+
+    Passing the store of the previous cycle carries over its segments, so
+    blocks that are not due or failed this cycle keep their last good
+    values. Every segment carries the time it was read and, while its reads
+    fail, the time the first of them failed. Segments are never modified
+    once stored, which makes sharing them safe.
+    """
+
+    __slots__ = ("_plan", "_index", "_segments", "_read_at", "_failing_since")
+
+    def __init__(self, plan: ReadPlan, previous: RegisterStore | None = None):
+        self._plan = plan
+        self._index = plan.index
+        if previous is not None and previous.plan is plan:
+            self._segments: list[array | None] = list(previous._segments)
+            self._read_at: list[float | None] = list(previous._read_at)
+            self._failing_since: list[float | None] = list(previous._failing_since)
+        else:
+            self._segments = [None] * len(plan.blocks)
+            self._read_at = [None] * len(plan.blocks)
+            self._failing_since = [None] * len(plan.blocks)
+
+    @property
+    def plan(self) -> ReadPlan:
+        """Return the read plan the segments belong to."""
+        return self._plan
+
+    def set_block(
+        self, block_index: int, registers: Sequence[int], read_at: float | None = None
+    ) -> None:
+        """Store the registers read for block number `block_index`."""
+        block = self._plan.blocks[block_index]
+        if len(registers) != block.count:
+            raise ValueError(
+                f"Block at {block.address} expects {block.count} registers, got {len(registers)}"
+            )
+        self._segments[block_index] = (
+            registers if isinstance(registers, array) else array("H", registers)
+        )
+        self._read_at[block_index] = time.monotonic() if read_at is None else read_at
+        self._failing_since[block_index] = None
+
+    def set_failed(self, block_index: int, failed_at: float | None = None) -> None:
+        """Record a failed read of block number `block_index`, keeping its last values."""
+        if self._failing_since[block_index] is None:
+            self._failing_since[block_index] = time.monotonic() if failed_at is None else failed_at
+
+    def segment(self, block_index: int) -> array | None:
+        """Return the registers of block number `block_index`, None if not read."""
+        return self._segments[block_index]
+
+    def age(self, block_index: int, now: float | None = None) -> float | None:
+        """Return the seconds since block number `block_index` was read, None if never."""
+        read_at = self._read_at[block_index]
+        if read_at is None:
+            return None
+        return (time.monotonic() if now is None else now) - read_at
+
+    def read_at(self, block_index: int) -> float | None:
+        """Return the time block number `block_index` was last read, None if never."""
+        return self._read_at[block_index]
+
+    def failing_for(self, block_index: int, now: float | None = None) -> float:
+        """Return the seconds reads of block number `block_index` have been failing."""
+        failing_since = self._failing_since[block_index]
+        if failing_since is None:
+            return 0.0
+        return (time.monotonic() if now is None else now) - failing_since
+
+    def has_block(self, block_index: int) -> bool:
+        """Return True if block number `block_index` was read."""
+        return self._segments[block_index] is not None
+
+    def get(self, address: int, count: int = 1) -> Sequence[int]:
+        """Return `count` registers starting at `address`."""
+        location = self._plan.locate(address, count)
+        if location is None:
+            return (0,) * count
+
+        block_index, offset = location
+        segment = self._segments[block_index]
+        if segment is None:
+            return (0,) * count
+        return segment[offset : offset + count]
+
+    def __contains__(self, address: int) -> bool:
+        location = self._index.get(address)
+        return location is not None and self._segments[location[0]] is not None
@@ -0,0 +1,130 @@
+"""Priority scheduling of the Modbus requests of one inverter."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import heapq
+import itertools
+import time
+from typing import TypeVar
+
+_T = TypeVar("_T")
+
+# Request priorities, lower runs first
+PRIORITY_CONTROL = 0
+PRIORITY_FAST = 1
+PRIORITY_BACKGROUND = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_CONTROL: "control",
+    PRIORITY_FAST: "fast",
+    PRIORITY_BACKGROUND: "background",
+}
+
+
+class WaitStatistics:
+    """Queue wait times of one priority class."""
+
+    __slots__ = ("count", "total", "max", "last")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def record(self, wait: float) -> None:
+        """Add one wait time in seconds."""
+        self.count += 1
+        self.total += wait
+        self.last = wait
+        if wait > self.max:
+            self.max = wait
+
+    def as_dict(self) -> dict:
+        """Return the statistics in milliseconds."""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+            "last_ms": round(self.last * 1000, 3),
+        }
+
+
+class RequestScheduler:
+    """Run the requests of one inverter by priority.
+
+    At most `max_in_flight` requests run at a time. When a slot frees up it
+    goes to the waiting request with the highest priority, in arrival order
+    within a priority. Since every block of a poll is a request of its own,
+    a control write queued during a long poll runs as soon as the next
+    block finished.
+    """
+
+    def __init__(self, max_in_flight: int):
+        self._max_in_flight = max_in_flight
+        self._in_flight = 0
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+        self._queued = 0
+        self._max_queued = 0
+        self._wait_statistics = {priority: WaitStatistics() for priority in PRIORITY_NAMES}
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a slot."""
+        return self._queued
+
+    async def async_run(self, priority: int, job: Callable[[], Awaitable[_T]]) -> _T:
+        """Run `job` once a slot is granted to `priority`."""
+        queued_at = time.monotonic()
+        await self._async_acquire(priority)
+        self._wait_statistics[priority].record(time.monotonic() - queued_at)
+        try:
+            return await job()
+        finally:
+            self._release()
+
+    def as_dict(self) -> dict:
+        """Return queue metrics for diagnostics."""
+        return {
+            "max_in_flight": self._max_in_flight,
+            "in_flight": self._in_flight,
+            "queue_depth": self._queued,
+            "max_queue_depth": self._max_queued,
+            "wait": {
+                name: self._wait_statistics[priority].as_dict()
+                for priority, name in PRIORITY_NAMES.items()
+            },
+        }
+
+    async def _async_acquire(self, priority: int) -> None:
+        """Wait until a slot is granted."""
+        if self._in_flight < self._max_in_flight and not self._queued:
+            self._in_flight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._queued += 1
+        self._max_queued = max(self._max_queued, self._queued)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just before the cancellation, pass it on.
+                self._release()
+            else:
+                self._queued -= 1
+            raise
+
+    def _release(self) -> None:
+        """Hand the slot to the next waiter or free it."""
+        while self._waiters:
+            _priority, _sequence, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._queued -= 1
+                future.set_result(None)
+                return
+        self._in_flight -= 1
@@ -6,11 +6,23 @@ The sensors are updated using a coordinator
 that fetches data from the inverter at regular intervals.
 """
 
+from __future__ import annotations
+
+from dataclasses import dataclass
 import logging
+import time
 
 from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.const import PERCENTAGE
+from homeassistant.const import (
+    PERCENTAGE,
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
+    EntityCategory,
+    UnitOfInformation,
+    UnitOfTime,
+)
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -20,152 +32,186 @@ from homeassistant.components.sensor import (
 
 from homeassistant.core import HomeAssistant, callback
 
-from .const import DOMAIN, CONF_IP_ADDRESS, MANUFACTURER, MODEL, NAME
-
-from .register_info import REGISTERS, RegisterInfo
+from .aggregate import is_aggregated
+from .derived import DERIVED_VALUES, DerivedValue
+from .energy import INTEGRATED_ENERGIES, IntegratedEnergy
+from .register_info import Deadband, RegisterInfo
+from .register_map import RegisterMap
 
 _LOGGER = logging.getLogger(__name__)
 
+_DESCRIPTIONS: dict[str, tuple[RegisterSensorDescription, ...]] = {}
+
+# Diagnostic sensors: key, name, unit, icon, state class and how to get the value from the coordinator
+DIAGNOSTIC_SENSORS = (
+    (
+        "poll_cycle_duration",
+        "Poll cycle duration",
+        UnitOfTime.MILLISECONDS,
+        "mdi:timer-outline",
+        SensorStateClass.MEASUREMENT,
+        lambda coordinator: round(coordinator.cycle_statistics.duration * 1000, 1),
+    ),
+    (
+        "poll_requests",
+        "Requests per poll",
+        None,
+        "mdi:swap-horizontal",
+        SensorStateClass.MEASUREMENT,
+        lambda coordinator: coordinator.cycle_statistics.requests,
+    ),
+    (
+        "poll_bytes",
+        "Bytes per poll",
+        UnitOfInformation.BYTES,
+        "mdi:download-network",
+        SensorStateClass.MEASUREMENT,
+        lambda coordinator: coordinator.cycle_statistics.bytes,
+    ),
+    (
+        "reconnects",
+        "Reconnects",
+        None,
+        "mdi:lan-disconnect",
+        SensorStateClass.TOTAL_INCREASING,
+        lambda coordinator: coordinator.connection.reconnects,
+    ),
+    (
+        "decode_time",
+        "Decode time",
+        UnitOfTime.MILLISECONDS,
+        "mdi:timer-cog-outline",
+        SensorStateClass.MEASUREMENT,
+        lambda coordinator: round(coordinator.cycle_statistics.decode_time * 1000, 3),
+    ),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class RegisterSensorDescription:
+    """What a register, derived value or energy counter sensor shows.
+
+    Shared by the sensors of every inverter.
+    """
+
+    key: str
+    name: str
+    icon: str | None
+    device_class: str | None
+    unit: str | None
+    precision: int
+    state_class: SensorStateClass
+    deadband: Deadband
+    # Cumulative values keep their last state over a reading of zero
+    hold_zero: bool
+
+    @classmethod
+    def from_register(cls, ri: RegisterInfo) -> RegisterSensorDescription:
+        """Return the description of the sensor of `ri`."""
+        return cls(
+            ri.unique_id,
+            ri.name,
+            ri.icon,
+            ri.device_class,
+            ri.unit,
+            ri.display_precision,
+            ri.sensor_state_class,
+            ri.deadband,
+            ri.sensor_state_class == SensorStateClass.TOTAL_INCREASING,
+        )
+
+    @classmethod
+    def from_computed(cls, computed: DerivedValue | IntegratedEnergy) -> RegisterSensorDescription:
+        """Return the description of the sensor of a derived value or energy counter."""
+        return cls(
+            computed.key,
+            computed.name,
+            computed.icon,
+            computed.device_class,
+            computed.unit,
+            computed.precision,
+            computed.state_class,
+            Deadband(
+                0.5 * 10 ** -computed.precision
+                if computed.deadband_abs is None
+                else computed.deadband_abs,
+                computed.deadband_rel,
+            ),
+            False,
+        )
+
+
+# Descriptions of the values computed by the coordinator, with the registers they need
+COMPUTED_DESCRIPTIONS = tuple(
+    (computed.inputs, RegisterSensorDescription.from_computed(computed))
+    for computed in (*DERIVED_VALUES, *INTEGRATED_ENERGIES)
+)
+
+
+def register_sensor_descriptions(register_map: RegisterMap) -> tuple[RegisterSensorDescription, ...]:
+    """Return the descriptions of the register sensors, built once per register map."""
+    descriptions = _DESCRIPTIONS.get(register_map.digest)
+    if descriptions is None:
+        descriptions = _DESCRIPTIONS[register_map.digest] = tuple(
+            RegisterSensorDescription.from_register(ri)
+            for ri in register_map.registers
+            if ri.type != "InverterState"
+        )
+    return descriptions
+
 
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up the sensor platform."""
     _LOGGER.info("async_setup_entry")
-    ip_address = entry.data[CONF_IP_ADDRESS]
 
     # add sensors
     inverter_coordinator = entry.runtime_data.inverter_coordinator
+    # Inverters behind one gateway share the address, the key tells them apart
+    ip_address = inverter_coordinator.device_key
     sensors = []
 
     # add sensors from registers
-    for ri in REGISTERS:
-        match ri.type:
-            case "U16":
-                sensors.append(
-                    KostalUInt16Sensor(
-                        inverter_coordinator,
-                        ip_address,
-                        ri.address,
-                        ri.unique_id,
-                        ri.name,
-                        ri.icon,
-                        ri.device_class,
-                        ri.unit,
-                        ri.display_precision,
-                        ri.sensor_state_class,
-                    )
-                )
-            case "S16":
-                sensors.append(
-                    KostalInt16Sensor(
-                        inverter_coordinator,
-                        ip_address,
-                        ri.address,
-                        ri.unique_id,
-                        ri.name,
-                        ri.icon,
-                        ri.device_class,
-                        ri.unit,
-                        ri.display_precision,
-                        ri.sensor_state_class,
-                    )
-                )
-            case "U32":
-                sensors.append(
-                    KostalUInt32Sensor(
-                        inverter_coordinator,
-                        ip_address,
-                        ri.address,
-                        ri.unique_id,
-                        ri.name,
-                        ri.icon,
-                        ri.device_class,
-                        ri.unit,
-                        ri.display_precision,
-                        ri.sensor_state_class,
-                    )
-                )
-            case "S32":
-                sensors.append(
-                    KostalInt32Sensor(
-                        inverter_coordinator,
-                        ip_address,
-                        ri.address,
-                        ri.unique_id,
-                        ri.name,
-                        ri.icon,
-                        ri.device_class,
-                        ri.unit,
-                        ri.display_precision,
-                        ri.sensor_state_class,
-                    )
-                )
-            case "Float":
-                sensors.append(
-                    KostalFloat32Sensor(
-                        inverter_coordinator,
-                        ip_address,
-                        ri.address,
-                        ri.unique_id,
-                        ri.name,
-                        ri.icon,
-                        ri.device_class,
-                        ri.unit,
-                        ri.display_precision,
-                        ri.sensor_state_class,
-                    )
-                )
-            case "InverterState":
-                sensors.append(
-                    InverterStateSensor(
-                        inverter_coordinator,
-                        ip_address,
-                        ri,
-                    )
-                )
+    register_map = inverter_coordinator.register_map
+    for ri in register_map.registers:
+        if ri.type == "InverterState":
+            sensors.append(InverterStateSensor(inverter_coordinator, ip_address, ri))
+    aggregated_keys = {ri.unique_id for ri in register_map.registers if is_aggregated(ri)}
+    for description in register_sensor_descriptions(register_map):
+        sensors.append(KostalSensor(inverter_coordinator, ip_address, description))
+        # add windowed aggregates of fast power values, disabled by default
+        if description.key in aggregated_keys:
+            sensors.append(KostalWindowSensor(inverter_coordinator, ip_address, description))
+
+    # add power flows and energy counters computed from the registers, if
+    # the map has their inputs
+    for inputs, description in COMPUTED_DESCRIPTIONS:
+        if register_map.keys.issuperset(inputs):
+            sensors.append(KostalSensor(inverter_coordinator, ip_address, description))
+
+    # add diagnostic sensors, disabled by default
+    for key, name, unit, icon, state_class, value_fn in DIAGNOSTIC_SENSORS:
+        sensors.append(
+            KostalDiagnosticSensor(
+                inverter_coordinator, ip_address, key, name, unit, icon, state_class, value_fn
+            )
+        )
 
     async_add_entities(sensors)
 
 
-class KostalSensor(CoordinatorEntity, SensorEntity):
-    """Kostal sensor."""
-
-    _attr_icon = None
-    _attr_device_class = None
-    _attr_native_unit_of_measurement = None
-    _attr_suggested_display_precision = None
-
-    def __init__(
-        self,
-        coordinator,
-        ip_address,
-        register_address,
-        unique_id,
-        name,
-        icon,
-        device_class,
-        native_unit_of_measurement,
-        suggested_display_precision,
-        sensor_state_class=SensorStateClass.MEASUREMENT,
-    ):
-        super().__init__(coordinator, context=0)
+class DescribedSensor(CoordinatorEntity, SensorEntity):
+    """Kostal sensor whose name, unit and icon come from a RegisterSensorDescription."""
 
-        self._register_address = register_address
-        self._last_valid_state = None
-
-        self._name = name
-        self._unique_id = f"{unique_id}_{ip_address.replace('.', '_')}"
-        self._device_id = f"{NAME}_{ip_address.replace('.', '_')}"
+    def __init__(self, coordinator, ip_address, description: RegisterSensorDescription):
+        super().__init__(coordinator, context=0)
 
-        self._attr_icon = icon
-        self._attr_device_class = device_class
-        self._attr_native_unit_of_measurement = native_unit_of_measurement
-        self._attr_suggested_display_precision = suggested_display_precision
-        self._attr_state_class = sensor_state_class
+        self._description = description
+        self._unique_id = f"{description.key}_{ip_address.replace('.', '_')}"
 
     @property
     def name(self):
         """Return the name of the sensor."""
-        return self._name
+        return self._description.name
 
     @property
     def unique_id(self):
@@ -175,16 +221,103 @@ class KostalSensor(CoordinatorEntity, SensorEntity):
     @property
     def device_info(self):
         """Get information about this device."""
-        return {
-            "identifiers": {(DOMAIN, self._device_id)},
-            "name": NAME,
-            "manufacturer": MANUFACTURER,
-            "model": MODEL,
-        }
+        return self.coordinator.device_info
+
+    @property
+    def icon(self):
+        """Return the icon of the sensor."""
+        return self._description.icon
+
+    @property
+    def device_class(self):
+        """Return the device class of the sensor."""
+        return self._description.device_class
+
+    @property
+    def native_unit_of_measurement(self):
+        """Return the unit of the value."""
+        return self._description.unit
+
+    @property
+    def suggested_display_precision(self):
+        """Return the number of decimals to display."""
+        return self._description.precision
+
+    @property
+    def state_class(self):
+        """Return the state class of the sensor."""
+        return self._description.state_class
+
+
+class KostalSensor(DescribedSensor, RestoreEntity):
+    """Kostal sensor of one register, described by a shared RegisterSensorDescription.
+
+    Until the coordinator polled every block after startup, a value that was
+    not read yet shows the state restored from before the restart.
+    """
+
+    def __init__(self, coordinator, ip_address, description: RegisterSensorDescription):
+        super().__init__(coordinator, ip_address, description)
+
+        self._last_valid_state = None
+        self._restored_state = None
+        self._published_value = None
+        self._published_available = None
+        self._published_at = 0.0
+
+    async def async_added_to_hass(self) -> None:
+        """Register the consumed value when the entity is enabled."""
+        await super().async_added_to_hass()
+        if not self.coordinator.startup_complete:
+            last_state = await self.async_get_last_state()
+            if last_state is not None and last_state.state not in (STATE_UNKNOWN, STATE_UNAVAILABLE):
+                self._restored_state = last_state.state
+        self.async_on_remove(self.coordinator.async_add_consumer((self._description.key,)))
+
+    @property
+    def available(self) -> bool:
+        """Return False while the value was never read or went stale."""
+        return super().available and (
+            self._description.key in self.coordinator.data["values"] or self._restoring
+        )
+
+    @property
+    def state(self):
+        """Return the state of the sensor."""
+        value = self.coordinator.data["values"].get(self._description.key)
+        if value is None and self._restoring:
+            return self._restored_state
+        return self._filtered_state(value)
+
+    @property
+    def _restoring(self) -> bool:
+        """Return True while the restored state stands in for a value not read yet."""
+        return self._restored_state is not None and not self.coordinator.startup_complete
 
     @callback
     def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
+        """Handle updated data from the coordinator.
+
+        The state is only written when the value moved beyond the deadband,
+        the availability changed or the maximum silence interval elapsed.
+        """
+        deadband = self._description.deadband
+        value = self.coordinator.data["values"].get(self._description.key)
+        available = self.available
+        now = time.monotonic()
+        max_silence = deadband.max_silence
+        if max_silence is None:
+            max_silence = self.coordinator.max_silence
+        if (
+            available == self._published_available
+            and now - self._published_at < max_silence
+            and not deadband.is_significant(self._published_value, value)
+        ):
+            return
+
+        self._published_value = value
+        self._published_available = available
+        self._published_at = now
         self.async_write_ha_state()
 
     async def async_update(self):
@@ -193,186 +326,81 @@ class KostalSensor(CoordinatorEntity, SensorEntity):
 
     def _filtered_state(self, state):
         """Return the last valid state when a cumulative register briefly reports zero."""
-        if self._attr_state_class == SensorStateClass.TOTAL_INCREASING and state == 0 and self._last_valid_state:
+        if self._description.hold_zero and state == 0 and self._last_valid_state:
             return self._last_valid_state
 
         self._last_valid_state = state
         return state
 
 
-class KostalFloat32Sensor(KostalSensor):
-    """Kostal FLOAT32 sensor."""
-
-    def __init__(
-        self,
-        coordinator,
-        ip_address,
-        register_address,
-        unique_id,
-        name,
-        icon,
-        device_class,
-        native_unit_of_measurement,
-        suggested_display_precision,
-        sensor_state_class=SensorStateClass.MEASUREMENT,
-    ):
-        super().__init__(
-            coordinator,
-            ip_address,
-            register_address,
-            unique_id,
-            name,
-            icon,
-            device_class,
-            native_unit_of_measurement,
-            suggested_display_precision,
-            sensor_state_class,
-        )
+class KostalWindowSensor(DescribedSensor):
+    """Mean of a fast power value per aggregate window.
+
+    The state is written once per window, with the minimum, maximum and last
+    value of the window as attributes.
+    """
+
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator, ip_address, description: RegisterSensorDescription):
+        super().__init__(coordinator, ip_address, description)
+
+        self._unique_id = f"{description.key}_window_{ip_address.replace('.', '_')}"
+        self._published = None
 
     @property
-    def state(self):
-        """Return the state of the sensor."""
-        return self._filtered_state(self.coordinator.read_float32(self._register_address))
-
-
-class KostalInt16Sensor(KostalSensor):
-    """Kostal INT16 sensor."""
-
-    def __init__(
-        self,
-        coordinator,
-        ip_address,
-        register_address,
-        unique_id,
-        name,
-        icon,
-        device_class,
-        native_unit_of_measurement,
-        suggested_display_precision,
-        sensor_state_class=SensorStateClass.MEASUREMENT,
-    ):
-        super().__init__(
-            coordinator,
-            ip_address,
-            register_address,
-            unique_id,
-            name,
-            icon,
-            device_class,
-            native_unit_of_measurement,
-            suggested_display_precision,
-            sensor_state_class,
-        )
+    def name(self):
+        """Return the name of the sensor."""
+        return f"{self._description.name} window"
 
     @property
-    def state(self):
-        """Return the state of the sensor."""
-        return self._filtered_state(self.coordinator.read_int16(self._register_address))
-
-
-class KostalUInt16Sensor(KostalSensor):
-    """Kostal UINT16 sensor."""
-
-    def __init__(
-        self,
-        coordinator,
-        ip_address,
-        register_address,
-        unique_id,
-        name,
-        icon,
-        device_class,
-        native_unit_of_measurement,
-        suggested_display_precision,
-        sensor_state_class=SensorStateClass.MEASUREMENT,
-    ):
-        super().__init__(
-            coordinator,
-            ip_address,
-            register_address,
-            unique_id,
-            name,
-            icon,
-            device_class,
-            native_unit_of_measurement,
-            suggested_display_precision,
-            sensor_state_class,
-        )
+    def state_class(self):
+        """Return the state class of the sensor."""
+        return SensorStateClass.MEASUREMENT
+
+    async def async_added_to_hass(self) -> None:
+        """Register the consumed value when the entity is enabled."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self.coordinator.async_add_consumer((self._description.key,)))
 
     @property
-    def state(self):
-        """Return the state of the sensor."""
-        return self._filtered_state(self.coordinator.read_uint16(self._register_address))
-
-
-class KostalInt32Sensor(KostalSensor):
-    """Kostal INT32 sensor."""
-
-    def __init__(
-        self,
-        coordinator,
-        ip_address,
-        register_address,
-        unique_id,
-        name,
-        icon,
-        device_class,
-        native_unit_of_measurement,
-        suggested_display_precision,
-        sensor_state_class=SensorStateClass.MEASUREMENT,
-    ):
-        super().__init__(
-            coordinator,
-            ip_address,
-            register_address,
-            unique_id,
-            name,
-            icon,
-            device_class,
-            native_unit_of_measurement,
-            suggested_display_precision,
-            sensor_state_class,
-        )
+    def _aggregate(self):
+        return self.coordinator.data["aggregates"].get(self._description.key)
 
     @property
-    def state(self):
-        """Return the state of the sensor."""
-        return self._filtered_state(self.coordinator.read_int32(self._register_address))
-
-
-class KostalUInt32Sensor(KostalSensor):
-    """Kostal UINT32 sensor."""
-
-    def __init__(
-        self,
-        coordinator,
-        ip_address,
-        register_address,
-        unique_id,
-        name,
-        icon,
-        device_class,
-        native_unit_of_measurement,
-        suggested_display_precision,
-        sensor_state_class=SensorStateClass.MEASUREMENT,
-    ):
-        super().__init__(
-            coordinator,
-            ip_address,
-            register_address,
-            unique_id,
-            name,
-            icon,
-            device_class,
-            native_unit_of_measurement,
-            suggested_display_precision,
-            sensor_state_class,
-        )
+    def available(self) -> bool:
+        """Return False until a window with samples of the value ended."""
+        return super().available and self._aggregate is not None
 
     @property
-    def state(self):
-        """Return the state of the sensor."""
-        return self._filtered_state(self.coordinator.read_uint32(self._register_address))
+    def native_value(self):
+        """Return the mean of the last window."""
+        aggregate = self._aggregate
+        return None if aggregate is None else aggregate["mean"]
+
+    @property
+    def extra_state_attributes(self):
+        """Return the minimum, maximum and last value of the last window."""
+        aggregate = self._aggregate
+        if aggregate is None:
+            return None
+        return {
+            "min": aggregate["min"],
+            "max": aggregate["max"],
+            "last": aggregate["last"],
+            "samples": aggregate["samples"],
+            "window": self.coordinator.aggregate_window,
+        }
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state when a window ended."""
+        aggregates = self.coordinator.data["aggregates"]
+        if aggregates is self._published:
+            return
+
+        self._published = aggregates
+        self.async_write_ha_state()
 
 
 class InverterStateSensor(CoordinatorEntity, SensorEntity):
@@ -413,8 +441,8 @@ class InverterStateSensor(CoordinatorEntity, SensorEntity):
         self._state = None
 
         self._name = register_info.name
-        self._unique_id = register_info.unique_id
-        self._device_id = f"{NAME}_{ip_address.replace('.', '_')}"
+        self._value_key = register_info.unique_id
+        self._unique_id = f"{register_info.unique_id}_{ip_address.replace('.', '_')}"
 
     @property
     def name(self):
@@ -429,12 +457,17 @@ class InverterStateSensor(CoordinatorEntity, SensorEntity):
     @property
     def device_info(self):
         """Get information about this device."""
-        return {
-            "identifiers": {(DOMAIN, self._device_id)},
-            "name": NAME,
-            "manufacturer": MANUFACTURER,
-            "model": MODEL,
-        }
+        return self.coordinator.device_info
+
+    async def async_added_to_hass(self) -> None:
+        """Register the consumed value when the entity is enabled."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self.coordinator.async_add_consumer((self._value_key,)))
+
+    @property
+    def available(self) -> bool:
+        """Return False while the state was never read or went stale."""
+        return super().available and self._value_key in self.coordinator.data["values"]
 
     @property
     def state(self):
@@ -455,3 +488,41 @@ class InverterStateSensor(CoordinatorEntity, SensorEntity):
     def options(self):
         """Return the list of available options."""
         return list(self._options_enum)
+
+
+class KostalDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """Performance figure of the integration itself."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator, ip_address, key, name, unit, icon, state_class, value_fn):
+        super().__init__(coordinator, context=0)
+
+        self._name = name
+        self._unique_id = f"{key}_{ip_address.replace('.', '_')}"
+        self._value_fn = value_fn
+
+        self._attr_icon = icon
+        self._attr_native_unit_of_measurement = unit
+        self._attr_state_class = state_class
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return self._name
+
+    @property
+    def unique_id(self):
+        """Return the unique ID of the sensor."""
+        return self._unique_id
+
+    @property
+    def device_info(self):
+        """Get information about this device."""
+        return self.coordinator.device_info
+
+    @property
+    def native_value(self):
+        """Return the current figure."""
+        return self._value_fn(self.coordinator)
@@ -0,0 +1,266 @@
+"""Recording and replay of the raw register blocks polled from an inverter.
+
+A trace is a gzip stream of records, one per polled block:
+
+    header   <dHHB  wall clock time, block address, register count, kind
+    FULL     count words
+    DELTA    number of changes, then (offset, word) per changed register
+    FAILED   no payload, the read failed
+
+Blocks are delta encoded against the last record of the same block in the
+file. Every file starts over with full records, so a rotated file can be
+read on its own.
+"""
+
+from __future__ import annotations
+
+from array import array
+import asyncio
+from collections.abc import Iterable, Iterator, Sequence
+import gzip
+import logging
+import os
+import struct
+import sys
+import time
+
+from homeassistant.core import HomeAssistant, callback
+
+from .connection import ModbusConnection, ModbusIOException
+
+_LOGGER = logging.getLogger(__name__)
+
+RECORD_HEADER = struct.Struct("<dHHB")
+DELTA_COUNT = struct.Struct("<B")
+DELTA_CHANGE = struct.Struct("<BH")
+
+KIND_FULL = 0
+KIND_DELTA = 1
+KIND_FAILED = 2
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def _words_to_bytes(registers: Sequence[int]) -> bytes:
+    """Return `registers` as little-endian words."""
+    words = registers if isinstance(registers, array) else array("H", registers)
+    if not _LITTLE_ENDIAN:
+        words = array("H", words)
+        words.byteswap()
+    return words.tobytes()
+
+
+def _bytes_to_words(data: bytes) -> array:
+    """Return little-endian words as an `array('H')` in host order."""
+    words = array("H", data)
+    if not _LITTLE_ENDIAN:
+        words.byteswap()
+    return words
+
+
+class TraceWriter:
+    """Encode records and append them to a size-rotated trace file.
+
+    Not thread safe, only one write may run at a time. Meant to run in the
+    executor, it does all encoding, compression and file I/O.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backups: int):
+        self._path = path
+        self._max_bytes = max_bytes
+        self._backups = backups
+        self._previous: dict[tuple[int, int], array] = {}
+
+    def write(self, records: Iterable[tuple[float, int, int, array | None]]) -> None:
+        """Append `(timestamp, address, count, registers)` records, None registers for failed reads."""
+        chunk = bytearray()
+        for timestamp, address, count, registers in records:
+            chunk += self._encode(timestamp, address, count, registers)
+
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            # Every write appends a gzip member of its own, readers see one stream.
+            with gzip.open(self._path, "ab") as file:
+                file.write(chunk)
+        except OSError:
+            # The chunk is lost, later deltas must not refer to it.
+            self._previous.clear()
+            raise
+
+        if os.path.getsize(self._path) >= self._max_bytes:
+            self._rotate()
+
+    def _encode(self, timestamp: float, address: int, count: int, registers: array | None) -> bytes:
+        key = (address, count)
+        if registers is None:
+            return RECORD_HEADER.pack(timestamp, address, count, KIND_FAILED)
+
+        previous = self._previous.get(key)
+        self._previous[key] = registers
+        if previous is not None:
+            changes = [
+                (offset, word)
+                for offset, (word, last) in enumerate(zip(registers, previous))
+                if word != last
+            ]
+            # A change costs 3 bytes, a full record 2 bytes per register.
+            if 3 * len(changes) + DELTA_COUNT.size < 2 * count:
+                return b"".join(
+                    (
+                        RECORD_HEADER.pack(timestamp, address, count, KIND_DELTA),
+                        DELTA_COUNT.pack(len(changes)),
+                        *(DELTA_CHANGE.pack(offset, word) for offset, word in changes),
+                    )
+                )
+
+        return RECORD_HEADER.pack(timestamp, address, count, KIND_FULL) + _words_to_bytes(registers)
+
+    def _rotate(self) -> None:
+        """Shift the trace to `.1`, `.1` to `.2` and so on, dropping the oldest."""
+        for index in range(self._backups, 0, -1):
+            source = self._path if index == 1 else f"{self._path}.{index - 1}"
+            if os.path.exists(source):
+                os.replace(source, f"{self._path}.{index}")
+        if not self._backups:
+            os.remove(self._path)
+        # The new file must not depend on the old one.
+        self._previous.clear()
+
+
+class TraceRecorder:
+    """Buffer polled blocks on the event loop and write them in the executor."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        path: str,
+        max_bytes: int,
+        backups: int,
+        flush_records: int,
+        flush_interval: float,
+    ):
+        self._hass = hass
+        self._writer = TraceWriter(path, max_bytes, backups)
+        self._flush_records = flush_records
+        self._flush_interval = flush_interval
+        self._buffer: list[tuple[float, int, int, array | None]] = []
+        self._flush_lock = asyncio.Lock()
+        self._flushed_at = time.monotonic()
+
+    @callback
+    def async_record(self, timestamp: float, address: int, count: int, registers: array | None) -> None:
+        """Add a polled block, None registers if the read failed.
+
+        Segments are never modified once read, so they are buffered as is.
+        """
+        self._buffer.append((timestamp, address, count, registers))
+        if (
+            len(self._buffer) >= self._flush_records
+            or time.monotonic() - self._flushed_at >= self._flush_interval
+        ) and not self._flush_lock.locked():
+            self._flushed_at = time.monotonic()
+            self._hass.async_create_background_task(self.async_flush(), "kostal trace flush")
+
+    async def async_flush(self) -> None:
+        """Write everything buffered so far."""
+        async with self._flush_lock:
+            while self._buffer:
+                records, self._buffer = self._buffer, []
+                try:
+                    await self._hass.async_add_executor_job(self._writer.write, records)
+                except OSError as err:
+                    _LOGGER.error("Writing register trace failed: %s", err)
+
+
+def read_trace(paths: Iterable[str]) -> Iterator[tuple[float, int, int, array | None]]:
+    """Yield `(timestamp, address, count, registers)` from trace files, oldest first."""
+    for path in paths:
+        with gzip.open(path, "rb") as file:
+            data = file.read()
+
+        previous: dict[tuple[int, int], array] = {}
+        position = 0
+        while position < len(data):
+            timestamp, address, count, kind = RECORD_HEADER.unpack_from(data, position)
+            position += RECORD_HEADER.size
+            key = (address, count)
+            if kind == KIND_FAILED:
+                yield timestamp, address, count, None
+                continue
+
+            if kind == KIND_FULL:
+                registers = _bytes_to_words(data[position : position + 2 * count])
+                position += 2 * count
+            elif kind == KIND_DELTA:
+                (changes,) = DELTA_COUNT.unpack_from(data, position)
+                position += DELTA_COUNT.size
+                registers = array("H", previous[key])
+                for _ in range(changes):
+                    offset, word = DELTA_CHANGE.unpack_from(data, position)
+                    position += DELTA_CHANGE.size
+                    registers[offset] = word
+            else:
+                raise ValueError(f"Unknown record kind {kind} in {path}")
+
+            previous[key] = registers
+            yield timestamp, address, count, registers
+
+
+class ReplayConnection(ModbusConnection):
+    """Connection that answers reads from a recorded trace.
+
+    The trace is replayed into a register image as time passes, `speed`
+    times faster than it was recorded. A read returns the registers as they
+    were at the current replay time and fails where the recorded read
+    failed. Writes go into the image. Once the trace is exhausted the last
+    state stays.
+    """
+
+    def __init__(self, records: Sequence[tuple[float, int, int, array | None]], speed: float = 1.0, **kwargs):
+        super().__init__("replay", **kwargs)
+        self._records = records
+        self._speed = speed
+        self._position = 0
+        self._image = array("H", bytes(2 * 0x10000))
+        self._failed: set[tuple[int, int]] = set()
+        self._started: float | None = None
+
+    @property
+    def finished(self) -> bool:
+        """Return True once every record was replayed."""
+        return self._position >= len(self._records)
+
+    async def _async_send(self, pdu: bytes, unit_id: int | None = None) -> bytes:
+        """Answer `pdu` from the register image at the current replay time."""
+        self._advance()
+        function, address, count = struct.unpack_from(">BHH", pdu)
+        if function == 0x10:
+            self._image[address : address + count] = array(
+                "H", struct.unpack_from(f">{count}H", pdu, 6)
+            )
+            return pdu[:5]
+
+        end = address + count
+        for failed_address, failed_count in self._failed:
+            if failed_address < end and address < failed_address + failed_count:
+                raise ModbusIOException(f"Recorded read of {failed_address} failed")
+        return struct.pack(f">BB{count}H", function, 2 * count, *self._image[address:end])
+
+    def _advance(self) -> None:
+        """Apply every record up to the current replay time."""
+        if not self._records:
+            return
+        now = time.monotonic()
+        if self._started is None:
+            self._started = now
+        replay_time = self._records[0][0] + (now - self._started) * self._speed
+
+        records = self._records
+        while self._position < len(records) and records[self._position][0] <= replay_time:
+            _timestamp, address, count, registers = records[self._position]
+            self._position += 1
+            if registers is None:
+                self._failed.add((address, count))
+                continue
+            self._failed.discard((address, count))
+            self._image[address : address + count] = registers
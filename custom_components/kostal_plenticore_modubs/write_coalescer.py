@@ -0,0 +1,94 @@
+"""Debounced, coalesced register writes."""
+
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+import logging
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+_LOGGER = logging.getLogger(__name__)
+
+# Modbus limits a single write_registers request to 123 registers.
+MAX_REGISTERS_PER_WRITE = 123
+
+
+def merge_writes(
+    pending: dict[int, list[int]], max_count: int = MAX_REGISTERS_PER_WRITE
+) -> list[tuple[int, list[int]]]:
+    """Merge writes to adjacent registers into as few requests as possible.
+
+    `pending` maps start addresses to register values in the order the writes
+    were queued. Where writes overlap, the later one wins.
+    """
+    words: dict[int, int] = {}
+    for address, values in pending.items():
+        for offset, value in enumerate(values):
+            words[address + offset] = value
+
+    writes: list[tuple[int, list[int]]] = []
+    for address in sorted(words):
+        if writes:
+            start, values = writes[-1]
+            if start + len(values) == address and len(values) < max_count:
+                values.append(words[address])
+                continue
+        writes.append((address, [words[address]]))
+    return writes
+
+
+class WriteCoalescer:
+    """Collect register writes and send them after a quiet period.
+
+    Only the latest value queued for a register is written. Once no write was
+    queued for `delay` seconds, all pending writes are merged into one
+    write_registers request per run of adjacent registers and handed to
+    `write_batch`.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        delay: float,
+        write_batch: Callable[[list[tuple[int, list[int]]]], Awaitable[None]],
+    ):
+        self._hass = hass
+        self._delay = delay
+        self._write_batch = write_batch
+        self._pending: dict[int, list[int]] = {}
+        self._unsub_flush: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_queue(self, address: int, values: list[int]) -> None:
+        """Queue `values` for the registers starting at `address`."""
+        # Re-insert so the latest write also comes last when writes overlap.
+        self._pending.pop(address, None)
+        self._pending[address] = list(values)
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+        self._unsub_flush = async_call_later(self._hass, self._delay, self._async_flush_later)
+
+    async def async_flush(self) -> None:
+        """Write everything that is pending now."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, {}
+        writes = merge_writes(pending)
+        _LOGGER.debug(
+            "Writing %s registers of %s queued writes in %s requests",
+            sum(len(values) for _address, values in writes),
+            len(pending),
+            len(writes),
+        )
+        await self._write_batch(writes)
+
+    async def _async_flush_later(self, _now) -> None:
+        """Flush once the quiet period elapsed."""
+        self._unsub_flush = None
+        await self.async_flush()
@@ -0,0 +1,6 @@
+"""Shared test setup: import the integration from the repository root."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
@@ -0,0 +1,69 @@
+"""Tests of the windowed aggregates of fast power values."""
+
+import math
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.kostal_plenticore_modubs.aggregate import (  # noqa: E402
+    RunningAggregate,
+    WindowAggregator,
+)
+
+
+def test_running_aggregate():
+    running = RunningAggregate(10.0)
+    for value in (30.0, -5.0, 5.0):
+        running.add(value)
+
+    assert running.as_dict() == {"min": -5.0, "max": 30.0, "mean": 10.0, "last": 5.0, "samples": 4}
+
+
+def test_window_is_published_when_it_ends():
+    aggregator = WindowAggregator(60)
+    assert not aggregator.roll(0.0)
+
+    aggregator.add("power", 100.0, 1.0)
+    aggregator.add("power", 300.0, 31.0)
+    assert not aggregator.roll(59.0)
+    assert aggregator.published == {}
+
+    assert aggregator.roll(60.0)
+    assert dict(aggregator.published["power"]) == {
+        "min": 100.0,
+        "max": 300.0,
+        "mean": 200.0,
+        "last": 300.0,
+        "samples": 2,
+    }
+
+
+def test_next_window_starts_empty_and_stays_on_the_grid():
+    aggregator = WindowAggregator(60)
+    aggregator.roll(0.0)
+    aggregator.add("power", 100.0, 1.0)
+    # The refresh comes late, the next window still ends at 120
+    assert aggregator.roll(75.0)
+    first = aggregator.published
+
+    assert not aggregator.roll(119.0)
+    assert aggregator.published is first
+    assert aggregator.roll(120.0)
+    # No sample in the window, the value is left out
+    assert aggregator.published == {}
+
+
+def test_stale_and_unknown_samples_are_not_counted():
+    aggregator = WindowAggregator(60)
+    aggregator.roll(0.0)
+    aggregator.add("power", 100.0, 1.0)
+    # Same block read time: the register was not read again
+    aggregator.add("power", 500.0, 1.0)
+    aggregator.add("power", None, 2.0)
+    aggregator.add("power", math.nan, 3.0)
+    aggregator.add("power", 700.0, None)
+    aggregator.roll(60.0)
+
+    assert aggregator.published["power"]["samples"] == 1
+    assert aggregator.published["power"]["max"] == 100.0
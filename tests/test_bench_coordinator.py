@@ -0,0 +1,48 @@
+"""Short pass of the coordinator benchmark against the simulator.
+
+The full benchmark runs from benchmarks/bench_coordinator.py with its
+latency and CPU limits, this only checks that the figures it reports are
+consistent.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks"))
+
+from bench_coordinator import HOST, async_benchmark, parse_args  # noqa: E402
+from simulator import PlenticoreSimulator  # noqa: E402
+
+from custom_components.kostal_plenticore_modubs.register_map import load_register_map  # noqa: E402
+
+
+async def async_run_benchmark(*argv: str) -> dict:
+    simulator = PlenticoreSimulator(latency=0.002, jitter=0.001)
+    server = await simulator.async_start(HOST, 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        return await async_benchmark(parse_args(["--port", str(port), *argv]))
+
+
+def test_full_cycles_read_every_block():
+    result = asyncio.run(
+        async_run_benchmark("--cycles", "20", "--warmup", "2", "--alloc-cycles", "2")
+    )
+
+    assert result["requests"] == load_register_map().compile_plan().plan.requests
+    assert result["p50_ms"] <= result["p90_ms"] <= result["p99_ms"] <= result["max_ms"]
+    assert result["cpu_ms"] > 0
+
+
+def test_fast_tier_cycles_read_less():
+    full = asyncio.run(async_run_benchmark("--cycles", "5", "--alloc-cycles", "0"))
+    fast = asyncio.run(
+        async_run_benchmark("--cycles", "5", "--alloc-cycles", "0", "--fast-tier-only")
+    )
+
+    assert fast["requests"] < full["requests"]
@@ -0,0 +1,114 @@
+"""Tests of the circuit breaker and how the connection drives it."""
+
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.kostal_plenticore_modubs.circuit_breaker import (  # noqa: E402
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+)
+from custom_components.kostal_plenticore_modubs.connection import (  # noqa: E402
+    ConnectionException,
+    ModbusConnection,
+)
+
+
+def test_failure_opens_until_the_backoff_elapsed():
+    breaker = CircuitBreaker(5.0, 300.0, 0.0)
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow_request(now=0.0)
+
+    assert breaker.record_failure(now=100.0) == 5.0
+    assert breaker.state == STATE_OPEN
+    assert not breaker.ready(now=104.0)
+    assert not breaker.allow_request(now=104.0)
+    assert breaker.retry_in(now=104.0) == pytest.approx(1.0)
+
+    assert breaker.allow_request(now=105.0)
+    assert breaker.state == STATE_HALF_OPEN
+    # Only the probe is let through while half-open
+    assert not breaker.ready(now=105.0)
+
+
+def test_failed_probe_doubles_the_backoff_up_to_the_maximum():
+    breaker = CircuitBreaker(5.0, 12.0, 0.0)
+    now = 0.0
+    backoffs = []
+    for _ in range(4):
+        backoffs.append(breaker.record_failure(now=now))
+        now += backoffs[-1]
+        assert breaker.allow_request(now=now)
+
+    assert backoffs == [5.0, 10.0, 12.0, 12.0]
+
+
+def test_failures_while_open_do_not_extend_the_backoff():
+    breaker = CircuitBreaker(5.0, 300.0, 0.0)
+    breaker.record_failure(now=0.0)
+
+    assert breaker.record_failure(now=1.0) is None
+    assert breaker.retry_in(now=1.0) == pytest.approx(4.0)
+
+
+def test_success_closes_and_resets_the_backoff():
+    breaker = CircuitBreaker(5.0, 300.0, 0.0)
+    breaker.record_failure(now=0.0)
+    breaker.allow_request(now=5.0)
+    breaker.record_failure(now=5.0)
+    breaker.allow_request(now=15.0)
+
+    assert breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert not breaker.record_success()
+    assert breaker.record_failure(now=20.0) == 5.0
+
+
+def test_jitter_randomizes_the_backoff():
+    breaker = CircuitBreaker(10.0, 300.0, 0.2)
+
+    assert 8.0 <= breaker.record_failure(now=0.0) <= 12.0
+
+
+def test_cancelled_half_open_connect_opens_the_breaker_again():
+    async def run():
+        peer_closed = asyncio.Event()
+
+        async def silent_inverter(reader, writer):
+            # Accept the probe but never answer it
+            await reader.read()
+            peer_closed.set()
+            writer.close()
+
+        server = await asyncio.start_server(silent_inverter, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        connection = ModbusConnection("127.0.0.1", port)
+        try:
+            connection.breaker.record_failure(now=time.monotonic() - 1000)
+            read = asyncio.create_task(connection.async_read_holding_registers(2, 1))
+            await asyncio.sleep(0.2)
+            assert connection.breaker.state == STATE_HALF_OPEN
+
+            read.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await read
+            await asyncio.wait_for(peer_closed.wait(), 1)
+
+            state = connection.breaker.state
+            with pytest.raises(ConnectionException):
+                await connection.async_read_holding_registers(2, 1)
+            return state, connection.connected
+        finally:
+            await connection.async_close()
+            server.close()
+            await server.wait_closed()
+
+    state, connected = asyncio.run(run())
+
+    assert state == STATE_OPEN
+    assert not connected
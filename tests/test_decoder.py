@@ -0,0 +1,119 @@
+"""Tests of the batch decoder against decoding every value on its own."""
+
+import random
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.kostal_plenticore_modubs.decoder import (  # noqa: E402
+    SnapshotDecoder,
+    decode_words,
+    encode_value,
+)
+from custom_components.kostal_plenticore_modubs.read_plan import (  # noqa: E402
+    build_read_plan,
+    build_tiered_read_plan,
+)
+from custom_components.kostal_plenticore_modubs.register_info import RegisterInfo  # noqa: E402
+from custom_components.kostal_plenticore_modubs.register_map import load_register_map  # noqa: E402
+from custom_components.kostal_plenticore_modubs.register_store import RegisterStore  # noqa: E402
+
+
+def decode_per_value(store, registers):
+    """Decode every value on its own from its registers."""
+    values = {}
+    for ri in registers:
+        words = list(store.get(ri.address, ri.count))
+        if ri.word_order == "high_first":
+            words.reverse()
+        values[ri.unique_id] = decode_words(words, ri.type) * ri.scale
+    return values
+
+
+def same(left, right):
+    return left == right or left != left and right != right
+
+
+def register(address, key, register_type, **kwargs):
+    return RegisterInfo(address, key, key, None, register_type, None, None, 0, **kwargs)
+
+
+def filled_store(plan, seed=42):
+    rng = random.Random(seed)
+    store = RegisterStore(plan)
+    for block_index, block in enumerate(plan.blocks):
+        store.set_block(block_index, [rng.randrange(0x10000) for _ in range(block.count)])
+    return store
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_register_map_decodes_like_per_value(seed):
+    compiled = load_register_map().compile_plan()
+    store = filled_store(compiled.plan, seed)
+
+    reference = decode_per_value(store, compiled.registers)
+    values = compiled.decoder.decode(store)
+
+    assert values.keys() == reference.keys()
+    mismatches = [key for key, value in reference.items() if not same(value, values[key])]
+    assert not mismatches
+
+
+def test_word_order_scale_and_overlapping_fields():
+    registers = [
+        register(0, "float", "Float"),
+        register(2, "u32_high", "U32", word_order="high_first"),
+        register(2, "u16_high_word", "U16"),
+        register(3, "s16_scaled", "S16", scale=0.1),
+        register(4, "s32", "S32"),
+        register(4, "s32_again", "S32"),
+    ]
+    plan = build_read_plan(((ri.address, ri.count) for ri in registers), max_gap=0)
+    store = RegisterStore(plan)
+    store.set_block(0, [*encode_value(1.5, "Float"), 0x0001, 0xFFFE, *encode_value(-7, "S32")])
+
+    values = SnapshotDecoder(plan, registers).decode(store)
+
+    assert values == pytest.approx(
+        {
+            "float": 1.5,
+            "u32_high": 0x0001FFFE,
+            "u16_high_word": 1,
+            "s16_scaled": -0.2,
+            "s32": -7,
+            "s32_again": -7,
+        }
+    )
+
+
+def test_value_across_the_end_of_a_faster_block_decodes_from_its_own_block():
+    registers = [register(0, "fast", "S32"), register(2, "fast_word", "U16"), register(3, "slow", "U32")]
+    plan = build_tiered_read_plan(
+        {("fast", False): [(0, 2), (2, 1)], ("slow", False): [(3, 2)]}, max_gap=4, max_count=3
+    )
+    store = RegisterStore(plan)
+    store.set_block(0, [*encode_value(-1, "S32"), 5])
+    store.set_block(1, encode_value(70000, "U32"))
+
+    assert SnapshotDecoder(plan, registers).decode(store) == {"fast": -1, "fast_word": 5, "slow": 70000}
+    assert list(store.get(3, 2)) == encode_value(70000, "U32")
+
+
+def test_unread_and_skipped_blocks_are_left_out():
+    registers = [register(0, "first", "U16"), register(100, "second", "U16")]
+    plan = build_read_plan(((ri.address, ri.count) for ri in registers), max_gap=0)
+    decoder = SnapshotDecoder(plan, registers)
+    store = RegisterStore(plan)
+    store.set_block(0, [7])
+
+    assert decoder.decode(store) == {"first": 7}
+    assert decoder.decode(store, skip=(0,)) == {}
+
+
+@pytest.mark.parametrize(
+    ("value", "register_type"),
+    [(-1.25, "Float"), (-300, "S16"), (65535, "U16"), (-70000, "S32"), (4_000_000_000, "U32")],
+)
+def test_encode_value_round_trips(value, register_type):
+    assert decode_words(encode_value(value, register_type), register_type) == value
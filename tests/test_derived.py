@@ -0,0 +1,89 @@
+"""Tests of the power flows derived from one snapshot."""
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.kostal_plenticore_modubs.derived import (  # noqa: E402
+    DERIVED_VALUES,
+    derive_values,
+    derived_inputs,
+)
+from custom_components.kostal_plenticore_modubs.sensor import (  # noqa: E402
+    RegisterSensorDescription,
+)
+
+
+def snapshot(ac=0.0, battery=0.0, grid=0.0, pv=0.0, strings=(0.0, 0.0, 0.0), voltage=0.0, current=0.0):
+    values = {
+        "total_ac_active_power": ac,
+        "consumption_battery": battery,
+        "consumption_grid": grid,
+        "consumption_pv": pv,
+        "battery_voltage": voltage,
+        "actual_battery_charge": current,
+    }
+    values.update(zip(("power_dc_sensor_1", "power_dc_sensor_2", "power_dc_sensor_3"), strings))
+    derive_values(values)
+    return values
+
+
+def test_feeding_in():
+    values = snapshot(ac=5000.0, pv=1500.0, strings=(3000.0, 2500.0, 0.0))
+
+    assert values["home_consumption_power"] == 1500.0
+    assert values["grid_export_power"] == 3500.0
+    assert values["grid_import_power"] == 0.0
+    assert values["pv_power"] == 5500.0
+    assert values["self_consumption_ratio"] == pytest.approx(100 * 2000 / 5500)
+    assert values["autarky_ratio"] == 100.0
+
+
+def test_drawing_from_the_grid():
+    values = snapshot(ac=1000.0, grid=800.0, pv=1000.0, strings=(1000.0, 0.0, 0.0))
+
+    assert values["grid_export_power"] == 0.0
+    assert values["grid_import_power"] == 800.0
+    assert values["self_consumption_ratio"] == 100.0
+    assert values["autarky_ratio"] == pytest.approx(100 * 1000 / 1800)
+
+
+def test_battery_power_is_positive_while_discharging():
+    assert snapshot(voltage=400.0, current=2.5)["battery_power"] == 1000.0
+    assert snapshot(voltage=400.0, current=-2.5)["battery_power"] == -1000.0
+
+
+def test_ratios_are_left_out_without_power():
+    # At night: no PV power and nothing consumed
+    values = snapshot()
+
+    assert values["pv_power"] == 0.0
+    assert "self_consumption_ratio" not in values
+    assert "autarky_ratio" not in values
+
+
+def test_values_with_a_missing_input_are_left_out():
+    # Values of stale blocks are left out of the snapshot like unread ones
+    values = {"total_ac_active_power": 100.0, "consumption_battery": 1.0, "consumption_grid": 2.0}
+    derive_values(values)
+
+    assert not {derived.key for derived in DERIVED_VALUES} & values.keys()
+
+
+def test_derived_inputs():
+    assert derived_inputs(["battery_power", "total_dc_power"]) == {
+        "battery_voltage",
+        "actual_battery_charge",
+    }
+
+
+def test_power_values_use_the_power_register_deadband():
+    descriptions = {
+        derived.key: RegisterSensorDescription.from_computed(derived) for derived in DERIVED_VALUES
+    }
+
+    deadband = descriptions["grid_import_power"].deadband
+    assert (deadband.absolute, deadband.relative) == (5.0, 0.01)
+    assert not deadband.is_significant(1000.0, 1009.0)
+    assert deadband.is_significant(1000.0, 1011.0)
+    assert descriptions["autarky_ratio"].deadband.absolute == 0.5
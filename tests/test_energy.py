@@ -0,0 +1,103 @@
+"""Tests of the energy counters integrated from power values."""
+
+import asyncio
+import types
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.kostal_plenticore_modubs import async_remove_entry  # noqa: E402
+from custom_components.kostal_plenticore_modubs.const import CONF_IP_ADDRESS  # noqa: E402
+from custom_components.kostal_plenticore_modubs.coordinator import (  # noqa: E402
+    InverterCoordinator,
+    energy_store,
+)
+from custom_components.kostal_plenticore_modubs.energy import (  # noqa: E402
+    EnergyIntegrator,
+    IntegratedEnergy,
+    signed_area,
+)
+
+CHARGE = IntegratedEnergy("charge", "Charge", "mdi:battery", "battery_power", -1)
+DISCHARGE = IntegratedEnergy("discharge", "Discharge", "mdi:battery", "battery_power", 1)
+
+
+def test_signed_area():
+    assert signed_area(100.0, 300.0, 10.0) == 2000.0
+    assert signed_area(-100.0, -300.0, 10.0) == 0.0
+    # Only the triangle up to the zero crossing at 2.5 s counts
+    assert signed_area(100.0, -300.0, 10.0) == pytest.approx(125.0)
+    assert signed_area(-300.0, 100.0, 10.0) == pytest.approx(125.0)
+
+
+def test_zero_crossing_is_split_between_the_counters():
+    integrator = EnergyIntegrator((CHARGE, DISCHARGE), max_gap=90)
+    integrator.add_sample("battery_power", 3600.0, 0.0)
+
+    assert integrator.add_sample("battery_power", -3600.0, 20.0)
+    assert integrator.totals["discharge"] == pytest.approx(5.0)
+    assert integrator.totals["charge"] == pytest.approx(5.0)
+
+
+def test_nothing_is_added_across_a_gap():
+    integrator = EnergyIntegrator((DISCHARGE,), max_gap=90)
+    integrator.add_sample("battery_power", 3600.0, 0.0)
+
+    assert not integrator.add_sample("battery_power", 3600.0, 91.0)
+    assert integrator.totals["discharge"] == 0.0
+    assert integrator.add_sample("battery_power", 3600.0, 101.0)
+    assert integrator.totals["discharge"] == pytest.approx(10.0)
+
+
+def test_samples_not_read_again_or_unknown_add_nothing():
+    integrator = EnergyIntegrator((DISCHARGE,), max_gap=90)
+    integrator.add_sample("battery_power", 3600.0, 0.0)
+
+    assert not integrator.add_sample("battery_power", 7200.0, 0.0)
+    assert not integrator.add_sample("battery_power", None, 10.0)
+    # Unknown power restarts the integration with the next two samples
+    assert not integrator.add_sample("battery_power", 3600.0, 20.0)
+    assert integrator.add_sample("battery_power", 3600.0, 30.0)
+    assert integrator.totals["discharge"] == pytest.approx(10.0)
+
+
+def test_restored_totals_keep_counting():
+    integrator = EnergyIntegrator((CHARGE, DISCHARGE), max_gap=90, totals={"charge": 42.0, "gone": 1.0})
+
+    assert integrator.totals == {"charge": 42.0, "discharge": 0.0}
+    integrator.add_sample("battery_power", -3600.0, 0.0)
+    integrator.add_sample("battery_power", -3600.0, 10.0)
+    assert integrator.totals["charge"] == pytest.approx(52.0)
+
+
+def test_counters_are_restored_from_the_store_and_removed_with_the_entry(tmp_path):
+    async def run():
+        hass = HomeAssistant(str(tmp_path))
+        entry = types.SimpleNamespace(
+            entry_id="energy_test",
+            title="Energy test",
+            data={CONF_IP_ADDRESS: "127.0.0.1"},
+            options={},
+        )
+        await energy_store(hass, entry.entry_id).async_save(
+            {"totals": {"battery_charge_energy": 1234.5}}
+        )
+
+        coordinator = InverterCoordinator(hass, entry, "127.0.0.1")
+        try:
+            await coordinator.async_load_energy()
+            totals = dict(coordinator.energy_totals)
+        finally:
+            await coordinator.async_shutdown()
+
+        await async_remove_entry(hass, entry)
+        return totals, await energy_store(hass, entry.entry_id).async_load()
+
+    totals, stored = asyncio.run(run())
+
+    assert totals["battery_charge_energy"] == 1234.5
+    assert totals["battery_discharge_energy"] == 0.0
+    assert stored is None
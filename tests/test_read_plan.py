@@ -0,0 +1,111 @@
+"""Tests of the read plan builders."""
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.kostal_plenticore_modubs.read_plan import (  # noqa: E402
+    build_read_plan,
+    build_tiered_read_plan,
+)
+from custom_components.kostal_plenticore_modubs.register_map import (  # noqa: E402
+    TIER_ORDER,
+    load_register_map,
+)
+
+
+def test_neighbouring_spans_share_a_request():
+    plan = build_read_plan([(10, 2), (0, 2), (14, 1), (40, 2)], max_gap=4)
+
+    assert [(b.address, b.count, b.used) for b in plan.blocks] == [(0, 2, 2), (10, 5, 3), (40, 2, 2)]
+    assert plan.requests == 3
+    assert plan.wasted == 2
+
+
+def test_requests_stay_within_max_count():
+    plan = build_read_plan([(0, 2), (2, 2), (4, 2)], max_gap=0, max_count=4)
+
+    assert [(b.address, b.count) for b in plan.blocks] == [(0, 4), (4, 2)]
+
+
+def test_span_longer_than_a_request_is_rejected():
+    with pytest.raises(ValueError):
+        build_read_plan([(0, 6)], max_gap=0, max_count=4)
+
+
+def test_slower_span_covered_by_a_faster_block_is_not_read_again():
+    plan = build_tiered_read_plan(
+        {("fast", False): [(0, 4)], ("slow", False): [(2, 2)]}, max_gap=4
+    )
+
+    assert [(b.address, b.count, b.tier) for b in plan.blocks] == [(0, 4, "fast")]
+
+
+def test_slower_span_near_a_faster_block_is_read_with_it():
+    plan = build_tiered_read_plan(
+        {("fast", False): [(0, 2)], ("slow", False): [(4, 2)], ("static", False): [(100, 2)]},
+        max_gap=4,
+    )
+
+    assert [(b.address, b.count, b.tier) for b in plan.blocks] == [(0, 6, "fast"), (100, 2, "static")]
+    assert plan.locate(4, 2) == (0, 4)
+
+
+def test_heartbeat_spans_get_blocks_of_their_own():
+    plan = build_tiered_read_plan(
+        {
+            ("fast", True): [(0, 2)],
+            ("fast", False): [(2, 2), (50, 1)],
+            ("normal", True): [(60, 2)],
+            ("normal", False): [(1, 2)],
+        },
+        max_gap=4,
+    )
+
+    assert [(b.address, b.count, b.tier, b.heartbeat) for b in plan.blocks] == [
+        (0, 2, "fast", True),
+        (1, 3, "fast", False),
+        (50, 1, "fast", False),
+        (60, 2, "normal", True),
+    ]
+
+
+def test_span_overlapping_the_end_of_a_faster_block_is_located_in_its_own_block():
+    plan = build_tiered_read_plan(
+        {("fast", False): [(0, 2), (2, 2)], ("slow", False): [(3, 2)]}, max_gap=4, max_count=4
+    )
+
+    assert [(b.address, b.count, b.tier) for b in plan.blocks] == [(0, 4, "fast"), (3, 2, "slow")]
+    assert plan.index[3] == (0, 3)
+    assert plan.locate(3, 2) == (1, 0)
+    assert plan.locate(3) == (0, 3)
+    assert plan.locate(10) is None
+
+
+def test_register_map_plan_covers_every_register_once():
+    register_map = load_register_map()
+    plan = register_map.compile_plan().plan
+
+    for ri in register_map.all_registers:
+        block_index, offset = plan.locate(ri.address, ri.count)
+        block = plan.blocks[block_index]
+        assert offset + ri.count <= block.count
+        assert TIER_ORDER.index(block.tier) <= TIER_ORDER.index(ri.poll_tier)
+        if ri.heartbeat:
+            assert block.heartbeat, f"{ri.unique_id} not in a heartbeat block"
+
+    used = {
+        address
+        for ri in register_map.all_registers
+        for address in range(ri.address, ri.address + ri.count)
+    }
+    assert plan.registers - plan.wasted == len(used)
+
+
+def test_idle_heartbeat_reads_a_few_small_blocks():
+    plan = load_register_map().compile_plan().plan
+
+    heartbeat = [block for block in plan.blocks if block.heartbeat]
+    assert len(heartbeat) <= 4
+    assert sum(block.count for block in heartbeat) <= 64
+    assert sum(block.count for block in heartbeat) * 3 < plan.registers
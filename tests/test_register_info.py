@@ -0,0 +1,49 @@
+"""Tests of the register metadata."""
+
+import math
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.kostal_plenticore_modubs.register_info import (  # noqa: E402
+    Deadband,
+    RegisterInfo,
+)
+
+
+def test_absolute_deadband():
+    deadband = Deadband(absolute=5.0)
+
+    assert not deadband.is_significant(1000.0, 1005.0)
+    assert deadband.is_significant(1000.0, 1005.5)
+    assert deadband.is_significant(1000.0, 994.0)
+
+
+def test_relative_deadband_of_the_last_written_value():
+    deadband = Deadband(absolute=5.0, relative=0.01)
+
+    # 1 % of 2000 W is more than the absolute 5 W
+    assert not deadband.is_significant(2000.0, 2019.0)
+    assert deadband.is_significant(2000.0, 2021.0)
+    # Near zero the absolute deadband applies
+    assert not deadband.is_significant(100.0, 104.0)
+    assert deadband.is_significant(100.0, 106.0)
+
+
+def test_missing_and_non_numeric_values():
+    deadband = Deadband(absolute=5.0)
+
+    assert deadband.is_significant(None, 1.0)
+    assert deadband.is_significant(1.0, None)
+    assert not deadband.is_significant(None, None)
+    assert deadband.is_significant(1.0, math.nan)
+    assert not deadband.is_significant(math.nan, math.nan)
+    assert deadband.is_significant("FeedIn", "Standby")
+    assert not deadband.is_significant("FeedIn", "FeedIn")
+
+
+def test_default_deadband_is_half_the_last_displayed_digit():
+    ri = RegisterInfo(100, "power", "Power", "W", "Float", None, None, 1)
+
+    assert ri.deadband == Deadband(0.05, 0.0)
@@ -0,0 +1,54 @@
+"""Tests of the compiled register map and its cache."""
+
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.kostal_plenticore_modubs import register_map  # noqa: E402
+
+
+@pytest.fixture
+def map_path(tmp_path, monkeypatch):
+    """Return a copy of registers.json, loaded maps are forgotten like after a restart."""
+    monkeypatch.setattr(register_map, "_LOADED", {})
+    path = tmp_path / "registers.json"
+    shutil.copyfile(register_map.REGISTER_MAP_PATH, path)
+    return str(path)
+
+
+def _cache_files(map_path):
+    return sorted(os.listdir(os.path.join(os.path.dirname(map_path), "__pycache__")))
+
+
+def test_restart_loads_the_cached_map(map_path, monkeypatch):
+    compiled = register_map.load_register_map(map_path)
+    monkeypatch.setattr(register_map, "_LOADED", {})
+
+    def fail(document):
+        raise AssertionError("compiled again")
+
+    monkeypatch.setattr(register_map, "compile_register_map", fail)
+    loaded = register_map.load_register_map(map_path)
+
+    assert loaded is not compiled
+    assert loaded.digest == compiled.digest
+    assert loaded.compile_plan().plan.blocks == compiled.compile_plan().plan.blocks
+
+
+def test_changed_plan_settings_compile_again(map_path, monkeypatch):
+    compiled = register_map.load_register_map(map_path)
+    cache_files = _cache_files(map_path)
+    monkeypatch.setattr(register_map, "_LOADED", {})
+    monkeypatch.setattr(register_map, "READ_PLAN_MAX_GAP", 0)
+
+    loaded = register_map.load_register_map(map_path)
+
+    assert loaded.digest != compiled.digest
+    assert loaded.compile_plan().plan.wasted == 0
+    assert compiled.compile_plan().plan.wasted > 0
+    # The cache of the old settings is replaced
+    assert len(_cache_files(map_path)) == 1
+    assert _cache_files(map_path) != cache_files
@@ -0,0 +1,110 @@
+"""Tests of the request scheduler."""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.kostal_plenticore_modubs.scheduler import (  # noqa: E402
+    PRIORITY_BACKGROUND,
+    PRIORITY_CONTROL,
+    PRIORITY_FAST,
+    RequestScheduler,
+)
+
+
+async def _hold_slot(scheduler):
+    """Occupy the only slot of `scheduler`, return the event that frees it and the task."""
+    release = asyncio.Event()
+    task = asyncio.create_task(scheduler.async_run(PRIORITY_BACKGROUND, release.wait))
+    await asyncio.sleep(0)
+    return release, task
+
+
+def test_slots_go_to_the_highest_priority_first():
+    async def run():
+        scheduler = RequestScheduler(1)
+        release, holder = await _hold_slot(scheduler)
+        order = []
+
+        async def job(name):
+            order.append(name)
+
+        tasks = [
+            asyncio.create_task(scheduler.async_run(priority, lambda name=name: job(name)))
+            for priority, name in (
+                (PRIORITY_BACKGROUND, "background 1"),
+                (PRIORITY_FAST, "fast"),
+                (PRIORITY_BACKGROUND, "background 2"),
+                (PRIORITY_CONTROL, "control"),
+            )
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.queue_depth == 4
+
+        release.set()
+        await asyncio.gather(holder, *tasks)
+        return order, scheduler.as_dict()
+
+    order, metrics = asyncio.run(run())
+
+    assert order == ["control", "fast", "background 1", "background 2"]
+    assert metrics["in_flight"] == 0
+    assert metrics["queue_depth"] == 0
+    assert metrics["max_queue_depth"] == 4
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def run():
+        scheduler = RequestScheduler(1)
+        release, holder = await _hold_slot(scheduler)
+        ran = []
+
+        cancelled = asyncio.create_task(scheduler.async_run(PRIORITY_CONTROL, lambda: asyncio.sleep(0)))
+        waiting = asyncio.create_task(
+            scheduler.async_run(PRIORITY_FAST, lambda: asyncio.sleep(0, ran.append("fast")))
+        )
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert scheduler.queue_depth == 1
+
+        release.set()
+        await asyncio.gather(holder, waiting)
+        return ran, scheduler.as_dict()
+
+    ran, metrics = asyncio.run(run())
+
+    assert ran == ["fast"]
+    assert metrics["in_flight"] == 0
+    assert metrics["queue_depth"] == 0
+
+
+def test_slot_granted_to_a_cancelled_waiter_is_passed_on():
+    async def run():
+        scheduler = RequestScheduler(1)
+        release, holder = await _hold_slot(scheduler)
+        ran = []
+
+        first = asyncio.create_task(scheduler.async_run(PRIORITY_CONTROL, lambda: asyncio.sleep(0)))
+        second = asyncio.create_task(
+            scheduler.async_run(PRIORITY_FAST, lambda: asyncio.sleep(0, ran.append("fast")))
+        )
+        await asyncio.sleep(0)
+
+        # Grant the slot to the first waiter and cancel it before it runs
+        release.set()
+        await holder
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        await second
+        return ran, scheduler.as_dict()
+
+    ran, metrics = asyncio.run(run())
+
+    assert ran == ["fast"]
+    assert metrics["in_flight"] == 0
@@ -0,0 +1,117 @@
+"""Tests of when register sensors write their state."""
+
+import asyncio
+import dataclasses
+import types
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.kostal_plenticore_modubs import sensor  # noqa: E402
+from custom_components.kostal_plenticore_modubs.register_info import Deadband  # noqa: E402
+
+DESCRIPTION = sensor.RegisterSensorDescription(
+    "power", "Power", "mdi:flash", "power", "W", 0, "measurement", Deadband(5.0, 0.01, None), False
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(sensor, "time", clock)
+    return clock
+
+
+def make_sensor(max_silence=300.0, startup_complete=True, description=DESCRIPTION):
+    coordinator = types.SimpleNamespace(
+        data={"values": {}},
+        last_update_success=True,
+        max_silence=max_silence,
+        startup_complete=startup_complete,
+        device_info={},
+        async_add_listener=lambda update, context=None: lambda: None,
+        async_add_consumer=lambda keys: lambda: None,
+    )
+    entity = sensor.KostalSensor(coordinator, "192.168.1.2", description)
+    entity.writes = []
+    entity.async_write_ha_state = lambda: entity.writes.append((entity.available, entity.state))
+    return entity
+
+
+def update(entity, **values):
+    entity.coordinator.data = {"values": values}
+    entity._handle_coordinator_update()
+
+
+def test_changes_within_the_deadband_are_not_written(clock):
+    entity = make_sensor()
+
+    update(entity, power=1000.0)
+    update(entity, power=1009.0)
+    update(entity, power=995.0)
+    update(entity, power=1011.0)
+
+    assert entity.writes == [(True, 1000.0), (True, 1011.0)]
+
+
+def test_max_silence_forces_a_write(clock):
+    entity = make_sensor(max_silence=60.0)
+
+    update(entity, power=1000.0)
+    clock.now += 59.0
+    update(entity, power=1001.0)
+    clock.now += 1.0
+    update(entity, power=1001.0)
+
+    assert entity.writes == [(True, 1000.0), (True, 1001.0)]
+
+
+def test_register_max_silence_overrides_the_option(clock):
+    entity = make_sensor(
+        max_silence=300.0,
+        description=dataclasses.replace(DESCRIPTION, deadband=Deadband(5.0, 0.01, 10.0)),
+    )
+
+    update(entity, power=1000.0)
+    clock.now += 10.0
+    update(entity, power=1000.0)
+
+    assert len(entity.writes) == 2
+
+
+def test_availability_change_is_written(clock):
+    entity = make_sensor()
+
+    update(entity, power=1000.0)
+    update(entity)
+    update(entity, power=1000.0)
+
+    assert entity.writes == [(True, 1000.0), (False, None), (True, 1000.0)]
+
+
+def test_first_value_after_restore_replaces_the_restored_state(clock):
+    entity = make_sensor(startup_complete=False)
+    last_state = types.SimpleNamespace(state="1234")
+
+    async def async_get_last_state():
+        return last_state
+
+    entity.async_get_last_state = async_get_last_state
+    asyncio.run(entity.async_added_to_hass())
+
+    # Not read yet: the restored state stands in
+    update(entity)
+    assert entity.writes == [(True, "1234")]
+
+    entity.coordinator.startup_complete = True
+    update(entity, power=1234.0)
+    assert entity.writes[-1] == (True, 1234.0)
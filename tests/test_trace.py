@@ -0,0 +1,71 @@
+"""Tests of writing and reading register traces."""
+
+from array import array
+import os
+import random
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.kostal_plenticore_modubs.trace import TraceWriter, read_trace  # noqa: E402
+
+
+def make_records(count, seed=1):
+    """Return polls of two blocks that mostly repeat, with some failed reads."""
+    rng = random.Random(seed)
+    blocks = {(100, 8): array("H", [rng.randrange(0x10000) for _ in range(8)]), (2, 40): array("H", range(40))}
+    records = []
+    for index in range(count):
+        for (address, words), registers in blocks.items():
+            if rng.random() < 0.05:
+                records.append((float(index), address, words, None))
+                continue
+            registers = array("H", registers)
+            for _ in range(rng.choice((0, 1, 5, words))):
+                registers[rng.randrange(words)] = rng.randrange(0x10000)
+            blocks[(address, words)] = registers
+            records.append((float(index), address, words, registers))
+    return records
+
+
+def trace_files(path, backups):
+    """Return the trace files that exist, oldest first."""
+    paths = [f"{path}.{index}" for index in range(backups, 0, -1)] + [path]
+    return [p for p in paths if os.path.exists(p)]
+
+
+def test_round_trip_across_rotation(tmp_path):
+    path = str(tmp_path / "trace" / "registers.trace.gz")
+    records = make_records(300)
+    writer = TraceWriter(path, max_bytes=2048, backups=100)
+    for start in range(0, len(records), 10):
+        writer.write(records[start : start + 10])
+
+    files = trace_files(path, 100)
+    assert len(files) > 2, "trace did not rotate"
+    assert list(read_trace(files)) == records
+
+
+def test_rotated_out_files_leave_a_readable_tail(tmp_path):
+    path = str(tmp_path / "registers.trace.gz")
+    records = make_records(300, seed=2)
+    writer = TraceWriter(path, max_bytes=2048, backups=1)
+    for start in range(0, len(records), 10):
+        writer.write(records[start : start + 10])
+
+    files = trace_files(path, 1)
+    read = list(read_trace(files))
+    assert files == [f"{path}.1", path]
+    assert 0 < len(read) < len(records)
+    assert read == records[-len(read) :]
+
+
+def test_without_backups_the_trace_starts_over(tmp_path):
+    path = str(tmp_path / "registers.trace.gz")
+    writer = TraceWriter(path, max_bytes=1, backups=0)
+    writer.write(make_records(5))
+
+    assert not os.path.exists(path)
+    writer.write([(1.0, 2, 2, array("H", (1, 2)))])
+    assert not os.path.exists(path)
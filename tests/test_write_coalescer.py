@@ -0,0 +1,30 @@
+"""Tests of merging queued register writes."""
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.kostal_plenticore_modubs.write_coalescer import merge_writes  # noqa: E402
+
+
+def test_adjacent_writes_are_merged():
+    assert merge_writes({1036: [3, 4], 1034: [1, 2]}) == [(1034, [1, 2, 3, 4])]
+
+
+def test_separate_writes_stay_apart_in_address_order():
+    assert merge_writes({1040: [5], 1034: [1, 2]}) == [(1034, [1, 2]), (1040, [5])]
+
+
+def test_later_write_wins_where_writes_overlap():
+    pending = {1034: [1, 2]}
+    pending[1035] = [9, 10]
+
+    assert merge_writes(pending) == [(1034, [1, 9, 10])]
+
+
+def test_merged_writes_stay_within_max_count():
+    assert merge_writes({0: [1, 2, 3, 4, 5]}, max_count=2) == [(0, [1, 2]), (2, [3, 4]), (4, [5])]
+
+
+def test_nothing_pending():
+    assert merge_writes({}) == []